@@ -12,17 +12,13 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize
 from PyQt6.QtGui import QIcon, QFont, QTextCursor, QPalette, QColor, QAction, QPixmap, QPainter
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
 from mcp.core import MCP
-from agents.vision import VisionAgent
 from agents.memory import MemorySystem
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from ui.agent_marketplace import AddAgentDialog
 # Import existing agents to register with MCP
-from agents.researcher import ResearchAgent
-from agents.coder import CoderAgent
-from agents.executor import ExecutorAgent
+from agents.agent_registry import shared_llm, default_agents
 import pyautogui
 from PIL import Image
 from io import BytesIO
@@ -46,7 +42,7 @@ class AgentThread(QThread):
             if self.image_data:
                 # Vision task
                 self.agent_type.emit("Vision")
-                vision_agent = VisionAgent(self.orchestrator.llm)
+                vision_agent = self.orchestrator.agents['vision']
                 result = vision_agent.execute(self.task, image_data=self.image_data)
             else:
                 # Regular task - SmartOrchestrator returns (result, agent_name)
@@ -68,19 +64,12 @@ class ChatWindow(QMainWindow):
         self.setWindowFlags(Qt.WindowType.Window | Qt.WindowType.WindowStaysOnTopHint)
         
         # Initialize systems
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.7,
-        )
+        self.llm = shared_llm()
         # Initialize MCP
         self.mcp = MCP(self.llm)
         
-        # Register core agents
-        self.mcp.register_agent('researcher', ResearchAgent(self.llm))
-        self.mcp.register_agent('coder', CoderAgent(self.llm))
-        self.mcp.register_agent('executor', ExecutorAgent(self.llm))
-        self.mcp.register_agent('vision', VisionAgent(self.llm))
+        # Register core agents (built on first use)
+        default_agents(self.llm, registry=self.mcp.agents)
         
         # For backward compatibility
         self.orchestrator = self.mcp
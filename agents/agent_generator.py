@@ -4,6 +4,7 @@ Agent Generator - Uses Gemini Architect to build new local agents
 import os
 import re
 from typing import Dict, Any, Optional
+from agents.llm_cache import cached_llm
 
 class AgentGenerator:
     """
@@ -13,7 +14,7 @@ class AgentGenerator:
     
     def __init__(self, architect_agent, local_llm=None):
         self.architect = architect_agent
-        self.local_llm = local_llm
+        self.local_llm = cached_llm(local_llm)  # Retries of the same request hit the LLM cache
         self.output_dir = os.path.join(os.path.dirname(__file__), "..", "agents")
         
     def generate_agent(self, name: str, description: str, capabilities: list, model: str = "qwen2.5-coder:7b") -> Dict[str, str]:
@@ -0,0 +1,157 @@
+"""
+Agent Registry - Lazily built sub-agents and shared LLM clients
+
+Agents are registered as factories and built on first lookup, so a UI or
+CLI only pays for the agents a session actually uses. Every agent built
+here talks to the model through shared_llm(), which hands out one client
+(and so one HTTP connection pool) per (base_url, model, options) for the
+whole process. Identical prompts sent to a client concurrently share one
+generation (single_flight.CoalescingLLM).
+"""
+import os
+import threading
+import time
+from collections.abc import Mapping
+from typing import Callable, Dict, Optional
+
+_llm_clients = {}       # (base_url, model, options) -> CoalescingLLM(ChatOllama)
+_llm_lock = threading.Lock()
+_llm_stats = {'created': 0, 'reused': 0}
+
+
+def shared_llm(model: str = None, base_url: str = None, temperature: float = 0.7, **options):
+    """One ChatOllama per (base_url, model, options), shared by every caller (and coalescing)"""
+    model = model or os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b")
+    base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    key = (base_url.rstrip('/'), model, temperature, tuple(sorted(options.items())))
+
+    with _llm_lock:
+        client = _llm_clients.get(key)
+        if client is not None:
+            _llm_stats['reused'] += 1
+            return client
+
+        from langchain_ollama import ChatOllama
+        from agents.single_flight import CoalescingLLM
+        client = CoalescingLLM(ChatOllama(model=model, base_url=base_url, temperature=temperature, **options))
+        _llm_clients[key] = client
+        _llm_stats['created'] += 1
+        return client
+
+
+def llm_pool_stats() -> Dict:
+    with _llm_lock:
+        coalesced = sum(client.flights.stats['coalesced'] + client.flights.stats['stream_subscribers']
+                        for client in _llm_clients.values())
+        return {**_llm_stats, 'coalesced': coalesced,
+                'clients': [f"{model} @ {url}" for url, model, _, _ in _llm_clients]}
+
+
+class AgentRegistry(Mapping):
+    """
+    name -> agent mapping whose values are built on first access.
+
+    Behaves like the plain dicts it replaces (`in`, `[]`, `.get()`, `.keys()`);
+    membership checks never build an agent. Construction is serialized per
+    agent, so concurrent first lookups build it once.
+    """
+
+    def __init__(self):
+        self._factories = {}    # name -> zero-arg callable
+        self._agents = {}       # name -> built agent
+        self._init_ms = {}      # name -> build time
+        self._errors = {}       # name -> last build error
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], object]):
+        """Register an agent to be built on first use"""
+        with self._lock:
+            self._factories[name] = factory
+            self._agents.pop(name, None)
+            self._locks.setdefault(name, threading.Lock())
+
+    def add(self, name: str, agent):
+        """Register an agent that is already built"""
+        with self._lock:
+            self._factories[name] = lambda: agent
+            self._agents[name] = agent
+            self._init_ms.setdefault(name, 0.0)
+            self._locks.setdefault(name, threading.Lock())
+
+    def __getitem__(self, name: str):
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        if name not in self._factories:
+            raise KeyError(name)
+
+        with self._locks[name]:
+            agent = self._agents.get(name)
+            if agent is None:
+                start = time.perf_counter()
+                try:
+                    agent = self._factories[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._init_ms[name] = (time.perf_counter() - start) * 1000
+                self._agents[name] = agent
+                print(f"🔧 Built {name} agent ({self._init_ms[name]:.0f} ms)")
+        return agent
+
+    def __contains__(self, name) -> bool:
+        return name in self._factories
+
+    def __iter__(self):
+        return iter(list(self._factories))
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def is_built(self, name: str) -> bool:
+        return name in self._agents
+
+    def warm(self, *names: str):
+        """Build agents ahead of time (all of them if no names given)"""
+        for name in names or list(self._factories):
+            self[name]
+
+    def init_report(self) -> Dict[str, Dict]:
+        """Per-agent build status and cost"""
+        return {
+            name: {
+                'built': name in self._agents,
+                'init_ms': round(self._init_ms[name], 1) if name in self._init_ms else None,
+                'error': self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+
+def default_agents(llm=None, registry: Optional[AgentRegistry] = None) -> AgentRegistry:
+    """Researcher / Coder / Executor / Vision, built on demand around one shared LLM"""
+    registry = registry if registry is not None else AgentRegistry()
+    llm = llm or shared_llm()
+
+    def researcher():
+        from agents.researcher import ResearchAgent
+        return ResearchAgent(llm)
+
+    def coder():
+        from agents.coder import CoderAgent
+        return CoderAgent(llm)
+
+    def executor():
+        from agents.executor import ExecutorAgent
+        return ExecutorAgent(llm)
+
+    def vision():
+        from agents.vision import VisionAgent
+        return VisionAgent(llm)
+
+    registry.register('researcher', researcher)
+    registry.register('coder', coder)
+    registry.register('executor', executor)
+    registry.register('vision', vision)
+    return registry
@@ -0,0 +1,303 @@
+"""
+Agent Stats - Live latency, TTFT, token and cost statistics per agent
+
+Every agent call records its total latency (and time-to-first-token for
+streams), tokens used and dollar cost. Each metric keeps an EWMA, so recent
+calls count most, and latencies also go into a fixed-bucket histogram for
+percentiles. Stats are kept per agent and per (agent, task category), and
+are saved to AGENT_STATS_FILE so routing keeps what it learned across
+restarts.
+
+Token counts come from the provider's usage fields when the response has
+them (ExternalAgent.last_usage), otherwise from characters / 4.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Histogram buckets (seconds), roughly log-spaced from 50 ms to 5 min
+BUCKETS = [0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 300]
+EWMA_ALPHA = float(os.getenv("STATS_EWMA_ALPHA", "0.2"))
+STATS_FILE = os.getenv("AGENT_STATS_FILE", "memory/agent_stats.json")
+SAVE_INTERVAL_S = 10
+CHARS_PER_TOKEN = 4
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (thread-safe)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # Last bucket is overflow
+        self.total = 0
+        self.sum = 0.0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total += 1
+            self.sum += seconds
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th sample (None if empty)"""
+        with self._lock:
+            if not self.total:
+                return None
+            rank = q * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return self.buckets[i] if i < len(self.buckets) else self.buckets[-1] * 2
+            return self.buckets[-1] * 2
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.total,
+            'failures': self.failures,
+            'mean_s': round(self.sum / self.total, 3) if self.total else None,
+            'p50_s': self.quantile(0.5),
+            'p90_s': self.quantile(0.9),
+            'p99_s': self.quantile(0.99),
+        }
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {'counts': list(self.counts), 'sum': self.sum, 'failures': self.failures}
+
+    def load(self, data: Dict):
+        counts = data.get('counts') or []
+        if len(counts) != len(self.counts):
+            return      # Saved with different buckets
+        with self._lock:
+            self.counts = list(counts)
+            self.total = sum(counts)
+            self.sum = data.get('sum', 0.0)
+            self.failures = data.get('failures', 0)
+
+
+class Ewma:
+    """Exponentially weighted moving average; the first sample seeds it"""
+
+    def __init__(self, alpha: float = None):
+        self.alpha = alpha or EWMA_ALPHA
+        self.value = None
+
+    def update(self, sample: float):
+        self.value = sample if self.value is None else self.alpha * sample + (1 - self.alpha) * self.value
+
+
+class AgentStats:
+    """Latency / TTFT / tokens / cost for one agent (or agent + category)"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.ttft = LatencyHistogram()
+        self.latency_ewma = Ewma()
+        self.ttft_ewma = Ewma()
+        self.tokens_ewma = Ewma()
+        self.cost_ewma = Ewma()
+        self.tokens_total = 0
+        self.cost_total = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> int:
+        return self.latency.total
+
+    @property
+    def success_rate(self) -> float:
+        attempts = self.latency.total + self.latency.failures
+        return self.latency.total / attempts if attempts else 1.0
+
+    def record(self, latency_s: float, ttft_s: float = None, tokens: int = 0, cost_usd: float = 0.0):
+        self.latency.record(latency_s)
+        if ttft_s is not None:
+            self.ttft.record(ttft_s)
+        with self._lock:
+            self.latency_ewma.update(latency_s)
+            if ttft_s is not None:
+                self.ttft_ewma.update(ttft_s)
+            self.tokens_ewma.update(tokens)
+            self.cost_ewma.update(cost_usd)
+            self.tokens_total += tokens
+            self.cost_total += cost_usd
+
+    def record_failure(self):
+        self.latency.record_failure()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'failures': self.latency.failures,
+                'success_rate': round(self.success_rate, 3),
+                'latency_ewma_s': _round(self.latency_ewma.value, 3),
+                'ttft_ewma_s': _round(self.ttft_ewma.value, 3),
+                'latency_p90_s': self.latency.quantile(0.9),
+                'ttft_p90_s': self.ttft.quantile(0.9),
+                'tokens_ewma': _round(self.tokens_ewma.value, 0),
+                'cost_ewma_usd': _round(self.cost_ewma.value, 6),
+                'tokens_total': self.tokens_total,
+                'cost_total_usd': round(self.cost_total, 6),
+            }
+
+    def summary(self) -> str:
+        """One-line summary for agent listings ('' before the first call)"""
+        if not self.calls:
+            return ""
+        parts = [f"{self.latency_ewma.value:.1f}s"]
+        if self.ttft_ewma.value is not None:
+            parts.append(f"TTFT {self.ttft_ewma.value:.1f}s")
+        if self.cost_total:
+            parts.append(f"${self.cost_ewma.value:.4f}/task")
+        parts.append(f"{self.calls} calls")
+        if self.latency.failures:
+            parts.append(f"{self.success_rate:.0%} ok")
+        return " · ".join(parts)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'latency': self.latency.to_dict(),
+                'ttft': self.ttft.to_dict(),
+                'ewma': {'latency': self.latency_ewma.value, 'ttft': self.ttft_ewma.value,
+                         'tokens': self.tokens_ewma.value, 'cost': self.cost_ewma.value},
+                'tokens_total': self.tokens_total,
+                'cost_total': self.cost_total,
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AgentStats":
+        stats = cls()
+        stats.latency.load(data.get('latency', {}))
+        stats.ttft.load(data.get('ttft', {}))
+        ewma = data.get('ewma', {})
+        stats.latency_ewma.value = ewma.get('latency')
+        stats.ttft_ewma.value = ewma.get('ttft')
+        stats.tokens_ewma.value = ewma.get('tokens')
+        stats.cost_ewma.value = ewma.get('cost')
+        stats.tokens_total = data.get('tokens_total', 0)
+        stats.cost_total = data.get('cost_total', 0.0)
+        return stats
+
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+def call_usage(agent, task: str, text: str):
+    """(tokens, cost_usd) for a finished call: provider usage when reported, else an estimate"""
+    usage = getattr(agent, 'last_usage', None) or {}
+    tokens = usage['total_tokens'] if 'total_tokens' in usage else (len(task) + len(text or "")) // CHARS_PER_TOKEN
+    return tokens, tokens / 1000 * (getattr(agent, 'cost_per_1k_tokens', 0) or 0)
+
+
+class StatsStore:
+    """
+    AgentStats per agent and per (agent, category), optionally persisted to
+    a JSON file (saved at most every SAVE_INTERVAL_S, and at exit)
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._agents = {}       # name -> AgentStats
+        self._categories = {}   # (name, category) -> AgentStats
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+        self._dirty = False
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def agent(self, name: str, category: str = None) -> AgentStats:
+        key = name if category is None else (name, category)
+        table = self._agents if category is None else self._categories
+        with self._lock:
+            if key not in table:
+                table[key] = AgentStats()
+            return table[key]
+
+    def record(self, name: str, latency_s: float, ttft_s: float = None, tokens: int = 0,
+               cost_usd: float = 0.0, category: str = None):
+        self.agent(name).record(latency_s, ttft_s, tokens, cost_usd)
+        if category:
+            self.agent(name, category).record(latency_s, ttft_s, tokens, cost_usd)
+        self._changed()
+
+    def record_failure(self, name: str, category: str = None):
+        self.agent(name).record_failure()
+        if category:
+            self.agent(name, category).record_failure()
+        self._changed()
+
+    def names(self):
+        with self._lock:
+            return list(self._agents)
+
+    def report(self) -> Dict[str, Dict]:
+        report = {}
+        for name in self.names():
+            stats = self.agent(name)
+            if stats.calls or stats.latency.failures:
+                report[name] = stats.snapshot()
+        return report
+
+    def summary(self, name: str) -> str:
+        with self._lock:
+            stats = self._agents.get(name)
+        return stats.summary() if stats else ""
+
+    # === PERSISTENCE ===
+
+    def _changed(self):
+        self._dirty = True
+        if self.path and time.monotonic() - self._saved_at >= SAVE_INTERVAL_S:
+            self.save()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Could not load agent stats: {e}")
+            return
+        with self._lock:
+            for name, stats in data.get('agents', {}).items():
+                self._agents[name] = AgentStats.from_dict(stats)
+            for key, stats in data.get('categories', {}).items():
+                name, _, category = key.rpartition('|')
+                self._categories[(name, category)] = AgentStats.from_dict(stats)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            agents = dict(self._agents)
+            categories = dict(self._categories)
+            self._saved_at = time.monotonic()
+            self._dirty = False
+        data = {
+            'agents': {name: stats.to_dict() for name, stats in agents.items()},
+            'categories': {f"{name}|{category}": stats.to_dict() for (name, category), stats in categories.items()},
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"⚠️ Could not save agent stats: {e}")
@@ -1,6 +1,10 @@
 """
 Coder Agent - Handles code generation, debugging, and code-related tasks
 """
+import threading
+
+from agents.llm_cache import cached_llm
+
 
 class CoderAgent:
     """
@@ -8,15 +12,13 @@ class CoderAgent:
     """
     
     def __init__(self, llm):
-        self.llm = llm
+        self.llm = cached_llm(llm)  # Repeated prompts are served from the LLM cache (LLM_CACHE=true)
+        self._local = threading.local()  # Whether each thread's last stream failed
         self.role = "Software Engineer"
         self.goal = "Write clean, efficient, and well-documented code"
     
-    def execute(self, task: str) -> str:
-        """
-        Execute a coding task
-        """
-        coding_prompt = f"""You are an expert software engineer. Complete the following coding task:
+    def _build_prompt(self, task: str) -> str:
+        return f"""You are an expert software engineer. Complete the following coding task:
 
 Task: {task}
 
@@ -26,9 +28,30 @@ Provide:
 3. Usage examples if applicable
 
 Format your response with code blocks using ```language``` syntax."""
-
+    
+    def execute(self, task: str, cache: bool = True) -> str:
+        """
+        Execute a coding task
+        """
         try:
-            response = self.llm.invoke(coding_prompt)
+            response = self.llm.invoke(self._build_prompt(task), cache=cache)
             return response.content
         except Exception as e:
             return f"❌ Error during code generation: {str(e)}"
+    
+    def stream_execute(self, task: str):
+        """
+        Execute a coding task, yielding text as it is generated
+        """
+        self._local.failed = False
+        try:
+            for chunk in self.llm.stream(self._build_prompt(task)):
+                yield chunk.content
+        except Exception as e:
+            self._local.failed = True
+            yield f"❌ Error during code generation: {str(e)}"
+    
+    @property
+    def last_call_failed(self) -> bool:
+        """Whether this thread's last stream_execute() ended in an error"""
+        return getattr(self._local, 'failed', False)
@@ -5,11 +5,13 @@ import os
 import json
 from datetime import datetime
 from typing import Dict, Any, Optional, Generator
-from langchain_ollama import ChatOllama
 from dotenv import load_dotenv
 
 load_dotenv()
 
+COMMAND_TIMEOUT_S = int(os.getenv("RILEY_COMMAND_TIMEOUT", "60"))
+TERMINAL_TOKEN_BUDGET = int(os.getenv("RILEY_TERMINAL_TOKEN_BUDGET", "1500"))
+
 class CompanionAgent:
     def __init__(self, mcp, architect, memory_system, ollama_base_url=None, model_name=None, terminal_widget=None):
         """Initialize Riley Companion with personality and optional terminal access"""
@@ -21,11 +23,20 @@ class CompanionAgent:
         base_url = ollama_base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         model = model_name or os.getenv("COMPANION_MODEL", "llama3.2:latest")
         
-        self.llm = ChatOllama(
-            base_url=base_url,
-            model=model,
-            temperature=0.7
-        )
+        self.base_url = base_url
+        self.model = model
+        # Shared with every other agent on the same model (one connection pool)
+        from agents.agent_registry import shared_llm
+        self._shared_llm = shared_llm
+        self.llm = shared_llm(model, base_url=base_url, temperature=0.7)
+        
+        # LOAD-AWARE MODEL LADDER: smaller model / context when the Mac is stressed
+        self.scheduler = None
+        try:
+            from agents.model_scheduler import shared_scheduler
+            self.scheduler = shared_scheduler(model)
+        except Exception as e:
+            print(f"⚠️ Adaptive model scheduling disabled: {e}")
         
         self.terminal_widget = terminal_widget  # For executing commands
         
@@ -53,6 +64,19 @@ Be helpful and explain what you're doing when running commands.
             # Fallback if file missing
             self.get_system_prompt = lambda u, c: f"You are Riley, a helpful AI assistant for {u}."
 
+    def _select_llm(self):
+        """Pick the model rung for current system load (falls back to the default LLM)"""
+        if not self.scheduler:
+            return self.llm
+        try:
+            decision = self.scheduler.choose()
+        except Exception as e:
+            print(f"⚠️ Scheduler error, using default model: {e}")
+            return self.llm
+        
+        return self._shared_llm(decision.model, base_url=self.base_url, temperature=0.7,
+                                num_ctx=decision.num_ctx)
+
     def process(self, user_message: str, context: Optional[Dict[str, Any]] = None) -> str:
         acc = ""
         for token in self.stream_process(user_message, context): 
@@ -85,6 +109,13 @@ Be helpful and explain what you're doing when running commands.
                 role = "User" if msg['role'] == 'user' else "Riley"
                 conversation_history += f"{role}: {msg['content']}\n"
 
+        # Results of terminal commands finished since the last reply
+        terminal_results = (context or {}).get('terminal_results')
+        if terminal_results is None:
+            terminal_results = self._terminal_digest()
+            if terminal_results and context is not None:
+                context['terminal_results'] = terminal_results
+
         # 3. CHAT (Local Llama)
         # Vibe Check: Proactive if message is short
         guidance = ""
@@ -98,9 +129,11 @@ Be helpful and explain what you're doing when running commands.
         full_prompt = f"{system_prompt}\n\n"
         if conversation_history:
             full_prompt += f"Conversation History:\n{conversation_history}\n"
+        if terminal_results:
+            full_prompt += f"Terminal Results (commands run since your last reply, output may be truncated):\n{terminal_results}\n\n"
         full_prompt += f"User: {user_message}\n{guidance}"
             
-        stream = self.llm.stream(full_prompt)
+        stream = self._select_llm().stream(full_prompt)
         accumulated = ""
         for chunk in stream:
             accumulated += chunk.content
@@ -109,12 +142,43 @@ Be helpful and explain what you're doing when running commands.
         # Check if Riley wants to execute a terminal command
         if self.terminal_widget and "EXECUTE:" in accumulated:
             import re
-            commands = re.findall(r'EXECUTE:\s*(.+)', accumulated)
-            for cmd in commands:
-                cmd = cmd.strip()
-                yield f"\n\n🖥️ Executing: `{cmd}`\n"
-                # Execute in terminal
-                self.terminal_widget.execute_command_programmatic(cmd)
+            commands = [c.strip() for c in re.findall(r'EXECUTE:\s*(.+)', accumulated)]
+            yield from self._run_commands(commands)
+    
+    def _terminal_digest(self):
+        """Head/tail-truncated digest of unread terminal results (None if nothing new)"""
+        capture = getattr(self.terminal_widget, 'capture', None)
+        if not capture:
+            return None
+        return capture.take_digest(TERMINAL_TOKEN_BUDGET)
+    
+    def _run_commands(self, commands):
+        """Run EXECUTE: commands as terminal jobs and report each exit code"""
+        parallel = os.getenv("RILEY_PARALLEL_COMMANDS", "true").lower() == "true"
+        jobs = []
+        previous = None
+        for cmd in commands:
+            yield f"\n\n🖥️ Executing: `{cmd}`\n"
+            job_id = self.terminal_widget.execute_command_programmatic(
+                cmd, timeout=COMMAND_TIMEOUT_S, after=None if parallel else previous)
+            if job_id is None:
+                yield "⚠️ Blocked (needs confirmation)\n"
+                continue
+            jobs.append((cmd, job_id))
+            previous = job_id
+        
+        for cmd, job_id in jobs:
+            result = self.terminal_widget.jobs.wait(job_id, timeout=COMMAND_TIMEOUT_S + 5)
+            if result is None:
+                yield f"\n⏳ `{cmd}` is still running\n"
+            elif result['exit_code'] == 0:
+                yield f"\n✅ `{cmd}` finished ({result['duration_s']:.1f}s)\n"
+            else:
+                yield f"\n❌ `{cmd}` {result['status']} with exit code {result['exit_code']}\n"
         
     def get_status(self):
-        return {"name": self.name, "model": "Hybrid (Llama + Gemini)"}
+        status = {"name": self.name, "model": "Hybrid (Llama + Gemini)"}
+        if self.scheduler:
+            status["recent_model_decisions"] = self.scheduler.recent_decisions(5)
+            status["deferred_jobs"] = self.scheduler.deferred_count()
+        return status
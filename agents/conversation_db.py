@@ -42,6 +42,8 @@ class ConversationDB:
                 FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
             )
         """)
+        # Paged history reads walk (conversation_id, id) backwards
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, id)")
         self.conn.commit()
         
         # Run migration for existing databases
@@ -83,6 +85,29 @@ class ConversationDB:
             meta = json.loads(row['metadata']) if row['metadata'] else {}
             messages.append({'role': row['role'], 'content': row['content'], 'metadata': meta})
         return messages
+
+    def get_messages_page(self, conversation_id: int, before_id: int = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get one page of messages, oldest first, ending just before `before_id`
+        (or at the newest message). Used by the chat view to lazy-load history.
+        """
+        cursor = self.conn.cursor()
+        if before_id is None:
+            cursor.execute("""
+                SELECT * FROM messages WHERE conversation_id = ?
+                ORDER BY id DESC LIMIT ?
+            """, (conversation_id, limit))
+        else:
+            cursor.execute("""
+                SELECT * FROM messages WHERE conversation_id = ? AND id < ?
+                ORDER BY id DESC LIMIT ?
+            """, (conversation_id, before_id, limit))
+
+        messages = []
+        for row in reversed(cursor.fetchall()):
+            meta = json.loads(row['metadata']) if row['metadata'] else {}
+            messages.append({'id': row['id'], 'role': row['role'], 'content': row['content'], 'metadata': meta})
+        return messages
     
     def get_recent_conversations(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get list of recent conversations"""
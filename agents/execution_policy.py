@@ -0,0 +1,210 @@
+"""
+Execution Policy - Single, hedged and fan-out agent execution
+Runs agent calls on a shared thread pool and records each call's latency,
+tokens and cost per agent (agent_stats.StatsStore). The latency histograms
+drive hedging: if the primary agent is slower than its own p90, a backup
+agent is started and the first good answer wins.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agents.agent_stats import BUCKETS, LatencyHistogram, StatsStore, call_usage  # noqa: F401
+from agents.http_transport import cancel_scope
+
+SINGLE = "single"
+HEDGED = "hedged"
+FANOUT = "fanout"
+MODES = (SINGLE, HEDGED, FANOUT)
+
+MIN_SAMPLES_FOR_HEDGE = 5        # Below this, use DEFAULT_HEDGE_AFTER_S
+DEFAULT_HEDGE_AFTER_S = float(os.getenv("HEDGE_AFTER_S", "8"))
+MIN_HEDGE_AFTER_S = 0.25
+
+
+class AgentResult:
+    """Outcome of one agent call"""
+
+    def __init__(self, name: str, text: str = "", latency_s: float = 0.0, error: str = None):
+        self.name = name
+        self.text = text
+        self.latency_s = latency_s
+        self.error = error
+        self.hedged = False         # A backup was started before this result arrived
+        self.contributors = [name]  # Agents merged into this result (fan-out)
+
+    @property
+    def ok(self) -> bool:
+        # Agents report failures as "❌ ..." strings rather than raising
+        return self.error is None and bool(self.text) and not self.text.lstrip().startswith("❌")
+
+
+class ExecutionEngine:
+    """
+    Thread-pool executor for agent calls with single / hedged / fan-out modes.
+
+    Agents that are still running when another answer wins are abandoned:
+    queued calls are cancelled, and each running call's cancel event is set,
+    so an external agent hangs up its stream at the next chunk instead of
+    generating (and billing) the rest of an answer nobody will read.
+    """
+
+    def __init__(self, max_workers: int = None, stats: StatsStore = None):
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("ORCHESTRATOR_MAX_WORKERS", "8")),
+            thread_name_prefix="agent-exec"
+        )
+        self.stats = stats or StatsStore()     # Per-agent latency histograms + EWMA stats
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        return self.stats.agent(name).latency
+
+    def hedge_delay(self, name: str) -> float:
+        """How long to wait on an agent before starting a backup: its p90"""
+        histogram = self.histogram(name)
+        if histogram.total < MIN_SAMPLES_FOR_HEDGE:
+            return DEFAULT_HEDGE_AFTER_S
+        return max(MIN_HEDGE_AFTER_S, histogram.quantile(0.9))
+
+    def _call(self, name, agent, task, kwargs, category=None, cancel: threading.Event = None) -> AgentResult:
+        start = time.monotonic()
+        try:
+            with cancel_scope(cancel):
+                text = agent.execute(task, **kwargs)
+            result = AgentResult(name, text, time.monotonic() - start)
+        except Exception as e:
+            result = AgentResult(name, latency_s=time.monotonic() - start, error=str(e))
+
+        if not result.ok and cancel is not None and cancel.is_set():
+            return result       # Cut short by _abandon: says nothing about the agent
+        if result.ok:
+            tokens, cost = call_usage(agent, task, result.text)
+            self.stats.record(name, result.latency_s, tokens=tokens, cost_usd=cost, category=category)
+        else:
+            self.stats.record_failure(name, category)
+        return result
+
+    def submit(self, name, agent, task, kwargs=None, category=None):
+        """Start a call on the pool; the future's .cancel_event stops it once set (see _abandon)"""
+        cancel = threading.Event()
+        future = self.pool.submit(self._call, name, agent, task, kwargs or {}, category, cancel)
+        future.cancel_event = cancel
+        return future
+
+    # === MODES ===
+
+    def run_single(self, name, agent, task, category: str = None, **kwargs) -> AgentResult:
+        return self._call(name, agent, task, kwargs, category)
+
+    def run_hedged(self, candidates: List[Tuple[str, object]], task: str,
+                   deadline_s: float = None, category: str = None, **kwargs) -> AgentResult:
+        """
+        Start candidates[0]; each time the newest running agent exceeds its
+        p90 (or fails), start the next candidate. First good answer wins.
+        """
+        remaining = list(candidates)
+        running = {}
+        failures = []
+        hedged = False
+        started_at = time.monotonic()
+
+        def launch():
+            name, agent = remaining.pop(0)
+            running[self.submit(name, agent, task, kwargs, category)] = name
+            return name
+
+        newest = launch()
+        while running:
+            timeout = self.hedge_delay(newest) if remaining else None
+            if deadline_s is not None:
+                left = max(0.0, deadline_s - (time.monotonic() - started_at))
+                timeout = left if timeout is None else min(timeout, left)
+
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if deadline_s is not None and time.monotonic() - started_at >= deadline_s:
+                    break
+                if remaining:
+                    newest = launch()   # Primary is slow - hedge with the next candidate
+                    hedged = True
+                continue
+
+            for future in done:
+                running.pop(future)
+                result = future.result()
+                if result.ok:
+                    self._abandon(running)
+                    result.hedged = hedged
+                    return result
+                failures.append(result)
+
+            if not running and remaining:
+                newest = launch()   # Everything running failed - fail over
+
+        self._abandon(running)
+        if failures:
+            return failures[-1]
+        return AgentResult(candidates[0][0], error=f"No answer within {deadline_s}s")
+
+    def run_fanout(self, candidates: List[Tuple[str, object]], task: str,
+                   merge: Optional[Callable[[str, List[AgentResult]], str]] = None,
+                   timeout_s: float = None, category: str = None, **kwargs) -> AgentResult:
+        """Ask every candidate at once and merge the good answers"""
+        futures = {self.submit(name, agent, task, kwargs, category): name for name, agent in candidates}
+        done, not_done = wait(list(futures), timeout=timeout_s)
+        self._abandon({f: futures[f] for f in not_done})
+
+        results = [f.result() for f in done]
+        good = [r for r in results if r.ok]
+        if not good:
+            return results[0] if results else AgentResult(candidates[0][0], error="No agent answered")
+        if len(good) == 1:
+            return good[0]
+
+        # Keep the caller's preference order
+        order = {name: i for i, (name, _) in enumerate(candidates)}
+        good.sort(key=lambda r: order[r.name])
+        merged = AgentResult(
+            " + ".join(r.name for r in good),
+            (merge or concat_merge)(task, good),
+            max(r.latency_s for r in good)
+        )
+        merged.contributors = [r.name for r in good]
+        return merged
+
+    def _abandon(self, running):
+        for future in running:
+            future.cancel()                 # Calls that haven't started yet
+            future.cancel_event.set()       # Running ones stop at their next check
+
+    def latency_report(self) -> Dict[str, Dict]:
+        return {name: self.histogram(name).snapshot() for name in self.stats.names()}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def concat_merge(task: str, results: List[AgentResult]) -> str:
+    """Default fan-out merge: each answer under its agent's name"""
+    return "\n\n".join(f"### {r.name}\n{r.text.strip()}" for r in results)
+
+
+def llm_merge(llm) -> Callable[[str, List[AgentResult]], str]:
+    """Fan-out merge that asks an LLM to synthesize one answer"""
+    def merge(task, results):
+        answers = "\n\n".join(f"[{r.name}]\n{r.text.strip()}" for r in results)
+        prompt = f"""Several assistants answered the same request. Combine them into one
+accurate, well-organized answer. Keep facts they agree on, resolve conflicts, and
+drop repetition. Do not mention the assistants.
+
+Request: {task}
+
+Answers:
+{answers}"""
+        try:
+            return llm.invoke(prompt).content
+        except Exception:
+            return concat_merge(task, results)
+    return merge
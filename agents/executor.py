@@ -1,6 +1,10 @@
 """
 Executor Agent - Handles general reasoning, planning, and analysis tasks
 """
+import threading
+
+from agents.llm_cache import cached_llm
+
 
 class ExecutorAgent:
     """
@@ -8,22 +12,41 @@ class ExecutorAgent:
     """
     
     def __init__(self, llm):
-        self.llm = llm
+        self.llm = cached_llm(llm)  # Repeated prompts are served from the LLM cache (LLM_CACHE=true)
+        self._local = threading.local()  # Whether each thread's last stream failed
         self.role = "General Assistant"
         self.goal = "Provide helpful, accurate responses to general queries"
     
-    def execute(self, task: str) -> str:
-        """
-        Execute a general task
-        """
-        prompt = f"""You are a helpful AI assistant. Please respond to the following request:
+    def _build_prompt(self, task: str) -> str:
+        return f"""You are a helpful AI assistant. Please respond to the following request:
 
 {task}
 
 Provide a clear, well-organized, and helpful response."""
-
+    
+    def execute(self, task: str, cache: bool = True) -> str:
+        """
+        Execute a general task
+        """
         try:
-            response = self.llm.invoke(prompt)
+            response = self.llm.invoke(self._build_prompt(task), cache=cache)
             return response.content
         except Exception as e:
             return f"❌ Error during execution: {str(e)}"
+    
+    def stream_execute(self, task: str):
+        """
+        Execute a general task, yielding text as it is generated
+        """
+        self._local.failed = False
+        try:
+            for chunk in self.llm.stream(self._build_prompt(task)):
+                yield chunk.content
+        except Exception as e:
+            self._local.failed = True
+            yield f"❌ Error during execution: {str(e)}"
+    
+    @property
+    def last_call_failed(self) -> bool:
+        """Whether this thread's last stream_execute() ended in an error"""
+        return getattr(self._local, 'failed', False)
@@ -3,25 +3,149 @@ External Agent Integrations
 Connect to Claude, ChatGPT, Gemini, and any API
 """
 import os
+import itertools
+import threading
 from abc import ABC, abstractmethod
-import requests
+from agents.http_transport import CallCancelled, check_cancelled, current_cancel, default_transport, iter_sse_json
+from agents.resilience import CircuitOpenError, RetryPolicy, RetryableStatus, RETRY_STATUSES, breaker_for
+from agents.rate_limiter import RateLimitTimeout, limiter_for, estimate_tokens
+from agents.llm_cache import cached_execute
 
 class ExternalAgent(ABC):
     """Base class for external AI service agents"""
     
+    provider = None  # AVAILABLE_AGENTS key (rate limits live in its metadata)
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.name = "External"
         self.cost_per_1k_tokens = 0
         self.usage_count = 0
+        self.transport = default_transport()  # Pooled keep-alive session per host
+        self.retry_policy = RetryPolicy()     # 429/5xx/connection errors, jittered backoff
+        self._local = threading.local()       # Token usage and failure of each thread's last call
+    
+    @property
+    def breaker(self):
+        """This provider's circuit breaker (shared by every instance with the same name)"""
+        return breaker_for(self.name)
+    
+    @property
+    def rate_limiter(self):
+        """Shared requests/tokens-per-minute limiter for this provider and model"""
+        meta = AVAILABLE_AGENTS.get(self.provider) or {}
+        return limiter_for(self.provider or self.name, getattr(self, 'model', ''), meta.get('rate_limits'))
+    
+    def _rate_limit(self, kwargs):
+        """Returns a callable that waits for rate-limit capacity for this request"""
+        body = kwargs.get('json') or kwargs.get('data') or ""
+        max_tokens = body.get('max_tokens') if isinstance(body, dict) else None
+        tokens = estimate_tokens(body, max_tokens)
+        return lambda: self.rate_limiter.acquire(tokens)
+    
+    def post(self, url: str, **kwargs):
+        """
+        POST through the shared transport (connection reuse + default timeouts),
+        retrying 429/5xx and connection errors. Raises CircuitOpenError
+        without sending anything (or using rate-limit capacity) while the
+        provider's breaker is open, else waits for rate-limit capacity first.
+        """
+        check_cancelled()
+        
+        def call():
+            response = self.transport.post(url, **kwargs)
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableStatus(response)
+            return response
+        
+        return self.retry_policy.run(call, self.breaker, self._rate_limit(kwargs))
+    
+    def stream_events(self, url: str, **kwargs):
+        """
+        POST and yield (event, json_data) server-sent events as they arrive.
+        Retries cover the request up to its first line; a stream that breaks
+        after that is not replayed.
+        """
+        check_cancelled()
+        
+        def call():
+            lines = self.transport.stream_lines("POST", url, **kwargs)
+            try:
+                first = next(lines)
+            except StopIteration:
+                return iter(())
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                if response is not None and response.status_code in RETRY_STATUSES:
+                    raise RetryableStatus(response) from e
+                raise
+            return itertools.chain([first], lines)
+        
+        return iter_sse_json(self.retry_policy.run(call, self.breaker, self._rate_limit(kwargs)))
     
     @abstractmethod
     def execute(self, task: str, **kwargs) -> str:
         pass
     
+    def _execute_streamed(self, task: str, **kwargs) -> str:
+        """
+        execute() over the SSE stream, used inside a cancel_scope: a plain
+        POST can't be interrupted, a stream hangs up as soon as it is cancelled
+        """
+        deltas = list(self.stream_execute(task, **kwargs))
+        return deltas[-1] if self.last_call_failed else "".join(deltas)
+    
+    def stream_execute(self, task: str, **kwargs):
+        """
+        Yield the response as text deltas. Providers with an SSE API override
+        this; the default yields the full execute() result once.
+        """
+        self._local.failed = False    # A cache hit skips execute(), so reset here too
+        yield self.execute(task, **kwargs)
+    
     def track_usage(self):
         """Track how many times this agent is used"""
         self.usage_count += 1
+        self._local.usage = None
+        self._local.failed = False
+    
+    def fail(self, label: str, error, hint: str = "Check your API key in Settings.") -> str:
+        """Mark this thread's call as failed and return the "❌" message shown in its place"""
+        self._local.failed = True
+        if isinstance(error, CallCancelled):
+            return f"❌ {label} cancelled"
+        if isinstance(error, CircuitOpenError):
+            return (f"❌ {label} skipped: {error}\n"
+                    "Its recent calls kept failing, so calls to it are paused until then.")
+        if isinstance(error, RateLimitTimeout):
+            return f"❌ {label} skipped: {error}"
+        return f"❌ {label} Error: {error}" + (f"\n{hint}" if hint else "")
+    
+    @property
+    def last_usage(self):
+        """Token counts the provider reported for this thread's last call (None if it didn't)"""
+        return getattr(self._local, 'usage', None)
+    
+    @property
+    def last_call_failed(self) -> bool:
+        """Whether this thread's last call ended in an error (streams may fail after some text)"""
+        return getattr(self._local, 'failed', False)
+    
+    def record_usage(self, data: dict):
+        """Pick token counts out of a response or stream event (Anthropic, OpenAI or Gemini format)"""
+        usage = data.get('usage') or (data.get('message') or {}).get('usage') or {}
+        meta = data.get('usageMetadata') or {}
+        counts = {
+            'input_tokens': usage.get('input_tokens') or usage.get('prompt_tokens') or meta.get('promptTokenCount'),
+            'output_tokens': usage.get('output_tokens') or usage.get('completion_tokens') or meta.get('candidatesTokenCount'),
+        }
+        if not any(counts.values()):
+            return
+        # Streams repeat or grow the counts as they go, so keep the largest seen
+        previous = self.last_usage or {}
+        merged = {k: max(v or 0, previous.get(k, 0)) for k, v in counts.items()}
+        merged['total_tokens'] = merged['input_tokens'] + merged['output_tokens']
+        self._local.usage = merged
 
 
 class ClaudeAgent(ExternalAgent):
@@ -30,6 +154,8 @@ class ClaudeAgent(ExternalAgent):
     Best for: Deep reasoning, coding, analysis
     """
     
+    provider = 'claude'
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.name = "Claude"
@@ -37,39 +163,102 @@ class ClaudeAgent(ExternalAgent):
         self.cost_per_1k_tokens = 0.003  # $3 per million tokens
         self.endpoint = "https://api.anthropic.com/v1/messages"
     
-    def execute(self, task: str, **kwargs) -> str:
-        """Execute with Claude"""
-        self.track_usage()
-        
-        headers = {
+    def _headers(self):
+        return {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
             "content-type": "application/json"
         }
-        
-        data = {
+    
+    def _body(self, task: str, **kwargs):
+        return {
             "model": self.model,
             "max_tokens": kwargs.get('max_tokens', 4096),
             "messages": [
                 {"role": "user", "content": task}
             ]
         }
+    
+    @cached_execute
+    def execute(self, task: str, **kwargs) -> str:
+        """Execute with Claude"""
+        if current_cancel() is not None:
+            return self._execute_streamed(task, **kwargs)
+        self.track_usage()
         
         try:
-            response = requests.post(self.endpoint, headers=headers, json=data)
+            response = self.post(self.endpoint, headers=self._headers(), json=self._body(task, **kwargs))
             response.raise_for_status()
             result = response.json()
+            self.record_usage(result)
             return result['content'][0]['text']
         except Exception as e:
-            return f"❌ Claude Error: {str(e)}\nCheck your API key in Settings."
+            return self.fail("Claude", e)
+    
+    def stream_execute(self, task: str, **kwargs):
+        """Stream with Claude (content_block_delta events)"""
+        self.track_usage()
+        
+        try:
+            body = {**self._body(task, **kwargs), "stream": True}
+            for event, data in self.stream_events(self.endpoint, headers=self._headers(), json=body):
+                self.record_usage(data)
+                if data.get('type') == 'content_block_delta':
+                    text = data.get('delta', {}).get('text')
+                    if text:
+                        yield text
+                elif data.get('type') == 'error':
+                    raise RuntimeError(data.get('error', {}).get('message', 'stream error'))
+                elif data.get('type') == 'message_stop':
+                    return
+        except Exception as e:
+            yield self.fail("Claude", e)
 
 
-class ChatGPTAgent(ExternalAgent):
+class OpenAIStyleAgent(ExternalAgent):
+    """Shared request/stream handling for OpenAI-compatible chat completion APIs"""
+    
+    def _headers(self):
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _body(self, task: str, **kwargs):
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": task}
+            ]
+        }
+    
+    def _stream_chunks(self, task: str, **kwargs):
+        """Yield each decoded chat.completion.chunk"""
+        body = {**self._body(task, **kwargs), "stream": True, **self._stream_options()}
+        for _, data in self.stream_events(self.endpoint, headers=self._headers(), json=body):
+            if 'error' in data:
+                raise RuntimeError(data['error'].get('message', 'stream error'))
+            self.record_usage(data)
+            yield data
+    
+    def _stream_options(self):
+        """Extra body fields for streaming requests"""
+        return {}
+    
+    @staticmethod
+    def _delta_text(chunk) -> str:
+        choices = chunk.get('choices') or [{}]
+        return (choices[0].get('delta') or {}).get('content') or ""
+
+
+class ChatGPTAgent(OpenAIStyleAgent):
     """
     OpenAI ChatGPT integration
     Best for: Fast responses, general tasks
     """
     
+    provider = 'chatgpt'
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.name = "ChatGPT"
@@ -77,38 +266,49 @@ class ChatGPTAgent(ExternalAgent):
         self.cost_per_1k_tokens = 0.005
         self.endpoint = "https://api.openai.com/v1/chat/completions"
     
+    def _body(self, task: str, **kwargs):
+        return {**super()._body(task), "max_tokens": kwargs.get('max_tokens', 4096)}
+    
+    def _stream_options(self):
+        return {"stream_options": {"include_usage": True}}    # Final chunk carries token usage
+    
+    @cached_execute
     def execute(self, task: str, **kwargs) -> str:
         """Execute with ChatGPT"""
+        if current_cancel() is not None:
+            return self._execute_streamed(task, **kwargs)
         self.track_usage()
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": self.model,
-            "messages": [
-                {"role": "user", "content": task}
-            ],
-            "max_tokens": kwargs.get('max_tokens', 4096)
-        }
-        
         try:
-            response = requests.post(self.endpoint, headers=headers, json=data)
+            response = self.post(self.endpoint, headers=self._headers(), json=self._body(task, **kwargs))
             response.raise_for_status()
             result = response.json()
+            self.record_usage(result)
             return result['choices'][0]['message']['content']
         except Exception as e:
-            return f"❌ ChatGPT Error: {str(e)}\nCheck your API key in Settings."
+            return self.fail("ChatGPT", e)
+    
+    def stream_execute(self, task: str, **kwargs):
+        """Stream with ChatGPT (chat.completion.chunk deltas)"""
+        self.track_usage()
+        
+        try:
+            for chunk in self._stream_chunks(task, **kwargs):
+                text = self._delta_text(chunk)
+                if text:
+                    yield text
+        except Exception as e:
+            yield self.fail("ChatGPT", e)
 
 
-class PerplexityAgent(ExternalAgent):
+class PerplexityAgent(OpenAIStyleAgent):
     """
     Perplexity AI integration
     Best for: Research with citations, up-to-date info
     """
     
+    provider = 'perplexity'
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.name = "Perplexity"
@@ -116,39 +316,50 @@ class PerplexityAgent(ExternalAgent):
         self.cost_per_1k_tokens = 0.001
         self.endpoint = "https://api.perplexity.ai/chat/completions"
     
+    @staticmethod
+    def _format_sources(citations) -> str:
+        if not citations:
+            return ""
+        sources = "\n\n📚 **Sources:**\n"
+        for i, citation in enumerate(citations[:5], 1):
+            sources += f"{i}. {citation}\n"
+        return sources
+    
+    @cached_execute
     def execute(self, task: str, **kwargs) -> str:
         """Execute with Perplexity"""
+        if current_cancel() is not None:
+            return self._execute_streamed(task, **kwargs)
         self.track_usage()
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": self.model,
-            "messages": [
-                {"role": "user", "content": task}
-            ]
-        }
-        
         try:
-            response = requests.post(self.endpoint, headers=headers, json=data)
+            response = self.post(self.endpoint, headers=self._headers(), json=self._body(task, **kwargs))
             response.raise_for_status()
             result = response.json()
+            self.record_usage(result)
             
             # Perplexity returns citations
             answer = result['choices'][0]['message']['content']
-            citations = result.get('citations', [])
-            
-            if citations:
-                answer += "\n\n📚 **Sources:**\n"
-                for i, citation in enumerate(citations[:5], 1):
-                    answer += f"{i}. {citation}\n"
-            
-            return answer
+            return answer + self._format_sources(result.get('citations', []))
+        except Exception as e:
+            return self.fail("Perplexity", e)
+    
+    def stream_execute(self, task: str, **kwargs):
+        """Stream with Perplexity; citations arrive with the chunks and are appended at the end"""
+        self.track_usage()
+        
+        try:
+            citations = []
+            for chunk in self._stream_chunks(task, **kwargs):
+                citations = chunk.get('citations') or citations
+                text = self._delta_text(chunk)
+                if text:
+                    yield text
+            sources = self._format_sources(citations)
+            if sources:
+                yield sources
         except Exception as e:
-            return f"❌ Perplexity Error: {str(e)}\nCheck your API key in Settings."
+            yield self.fail("Perplexity", e)
 
 
 class GeminiAgent(ExternalAgent):
@@ -157,6 +368,8 @@ class GeminiAgent(ExternalAgent):
     Best for: Multimodal (text + images), Google ecosystem
     """
     
+    provider = 'gemini'
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
         self.name = "Gemini"
@@ -164,25 +377,48 @@ class GeminiAgent(ExternalAgent):
         self.cost_per_1k_tokens = 0.00025
         self.endpoint = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent"
     
+    def _body(self, task: str):
+        return {
+            "contents": [{
+                "parts": [{"text": task}]
+            }]
+        }
+    
+    @cached_execute
     def execute(self, task: str, **kwargs) -> str:
         """Execute with Gemini"""
+        if current_cancel() is not None:
+            return self._execute_streamed(task, **kwargs)
         self.track_usage()
         
         url = f"{self.endpoint}?key={self.api_key}"
         
-        data = {
-            "contents": [{
-                "parts": [{"text": task}]
-            }]
-        }
-        
         try:
-            response = requests.post(url, json=data)
+            response = self.post(url, json=self._body(task))
             response.raise_for_status()
             result = response.json()
+            self.record_usage(result)
             return result['candidates'][0]['content']['parts'][0]['text']
         except Exception as e:
-            return f"❌ Gemini Error: {str(e)}\nCheck your API key in Settings."
+            return self.fail("Gemini", e)
+    
+    def stream_execute(self, task: str, **kwargs):
+        """Stream with Gemini (streamGenerateContent with alt=sse)"""
+        self.track_usage()
+        
+        url = f"{self.endpoint.replace(':generateContent', ':streamGenerateContent')}?alt=sse&key={self.api_key}"
+        
+        try:
+            for _, data in self.stream_events(url, json=self._body(task)):
+                if 'error' in data:
+                    raise RuntimeError(data['error'].get('message', 'stream error'))
+                self.record_usage(data)
+                for candidate in data.get('candidates', []):
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
+        except Exception as e:
+            yield self.fail("Gemini", e)
 
 
 class CustomAPIAgent(ExternalAgent):
@@ -191,11 +427,14 @@ class CustomAPIAgent(ExternalAgent):
     For any other service
     """
     
+    provider = 'custom'
+    
     def __init__(self, api_key: str, endpoint: str, name: str = "Custom"):
         super().__init__(api_key)
         self.name = name
         self.endpoint = endpoint
     
+    @cached_execute
     def execute(self, task: str, **kwargs) -> str:
         """Execute with custom API"""
         self.track_usage()
@@ -212,11 +451,11 @@ class CustomAPIAgent(ExternalAgent):
         }
         
         try:
-            response = requests.post(self.endpoint, headers=headers, json=data)
+            response = self.post(self.endpoint, headers=headers, json=data)
             response.raise_for_status()
             return response.text
         except Exception as e:
-            return f"❌ {self.name} Error: {str(e)}"
+            return self.fail(self.name, e, hint=None)
 
 
 # Agent registry
@@ -237,7 +476,8 @@ AVAILABLE_AGENTS = {
         'description': 'Best for deep reasoning, coding, and complex analysis',
         'icon': '🧠',
         'requires': ['api_key'],
-        'env_key': 'ANTHROPIC_API_KEY'
+        'env_key': 'ANTHROPIC_API_KEY',
+        'rate_limits': {'rpm': 50, 'tpm': 40000},  # Client-side, per model; raise to match your account tier
     },
     'chatgpt': {
         'class': ChatGPTAgent,
@@ -245,7 +485,8 @@ AVAILABLE_AGENTS = {
         'description': 'Fast, reliable, great for general tasks',
         'icon': '💬',
         'requires': ['api_key'],
-        'env_key': 'OPENAI_API_KEY'
+        'env_key': 'OPENAI_API_KEY',
+        'rate_limits': {'rpm': 500, 'tpm': 30000},
     },
     'perplexity': {
         'class': PerplexityAgent,
@@ -253,7 +494,8 @@ AVAILABLE_AGENTS = {
         'description': 'Research with citations and up-to-date information',
         'icon': '🔍',
         'requires': ['api_key'],
-        'env_key': 'PERPLEXITY_API_KEY'
+        'env_key': 'PERPLEXITY_API_KEY',
+        'rate_limits': {'rpm': 50},
     },
     'gemini': {
         'class': GeminiAgent,
@@ -261,7 +503,8 @@ AVAILABLE_AGENTS = {
         'description': 'Multimodal AI, great for images and Google integration',
         'icon': '✨',
         'requires': ['api_key'],
-        'env_key': 'GOOGLE_API_KEY'
+        'env_key': 'GOOGLE_API_KEY',
+        'rate_limits': {'rpm': 15, 'tpm': 1000000},
     },
     'custom': {
         'class': CustomAPIAgent,
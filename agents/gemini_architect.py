@@ -1,18 +1,26 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from agents.llm_cache import cached_llm
 
 load_dotenv()
 
 class GeminiArchitectAgent:
     def __init__(self):
-        # UPGRADE: Gemini 2.5 Flash (Latest stable model - 1M context)
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",  # Fastest, newest stable model
-            google_api_key=os.getenv("GEMINI_API_KEY"),
-            temperature=0.3, # Low temp for precise architecture
-            convert_system_message_to_human=True
-        )
+        self._llm = None
+
+    @property
+    def llm(self):
+        # langchain_google_genai is slow to import - load it on first use
+        if self._llm is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            # UPGRADE: Gemini 2.5 Flash (Latest stable model - 1M context)
+            self._llm = cached_llm(ChatGoogleGenerativeAI(
+                model="gemini-2.5-flash",  # Fastest, newest stable model
+                google_api_key=os.getenv("GEMINI_API_KEY"),
+                temperature=0.3, # Low temp for precise architecture
+                convert_system_message_to_human=True
+            ))
+        return self._llm
 
     def execute(self, task):
         system_prompt = """You are the ARCHITECT. You are a strategic technical genius.
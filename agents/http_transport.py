@@ -0,0 +1,229 @@
+"""
+HTTP Transport - Pooled keep-alive sessions for external AI providers
+
+One requests.Session per host (scheme://host:port), shared by every
+ExternalAgent in the process, so repeat calls reuse an open TCP+TLS
+connection instead of handshaking each time. Every request gets a
+connect/read timeout and asks for gzip responses.
+
+HTTP/2 is used when EXTERNAL_HTTP2=true and httpx is installed with its
+http2 extra (pip install "httpx[http2]"); otherwise HTTP/1.1 keep-alive.
+
+cancel_scope(event) marks the calls made on this thread as cancellable:
+once the event is set, check_cancelled() raises CallCancelled, which
+streaming readers use to hang up (ExecutionEngine sets it for the agents
+that lose a hedge).
+"""
+import codecs
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT_S = float(os.getenv("EXTERNAL_CONNECT_TIMEOUT_S", "5"))
+READ_TIMEOUT_S = float(os.getenv("EXTERNAL_READ_TIMEOUT_S", "120"))
+POOL_SIZE = int(os.getenv("EXTERNAL_POOL_SIZE", "8"))      # Keep-alive connections per host
+USE_HTTP2 = os.getenv("EXTERNAL_HTTP2", "false").lower() == "true"
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+class HttpTransport:
+    """Per-host pooled HTTP sessions with default timeouts (thread-safe)"""
+
+    def __init__(self, connect_timeout_s: float = None, read_timeout_s: float = None,
+                 pool_size: int = None, http2: bool = None):
+        self.timeout = (connect_timeout_s or CONNECT_TIMEOUT_S, read_timeout_s or READ_TIMEOUT_S)
+        self.pool_size = pool_size or POOL_SIZE
+        self.http2 = USE_HTTP2 if http2 is None else http2
+        if self.http2:
+            try:
+                import httpx
+                import h2  # noqa: F401  (httpx needs it for http2=True)
+            except ImportError:
+                print("⚠️ EXTERNAL_HTTP2 needs 'httpx[http2]'; using HTTP/1.1 keep-alive")
+                self.http2 = False
+
+        self._sessions = {}     # host -> requests.Session | httpx.Client
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'sessions': 0}
+
+    def session(self, url: str):
+        """The pooled session for url's host (created on first use)"""
+        key = _host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._new_session()
+                self._sessions[key] = session
+                self.stats['sessions'] += 1
+            self.stats['requests'] += 1
+            return session
+
+    def _new_session(self):
+        if self.http2:
+            import httpx
+            connect, read = self.timeout
+            return httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_keepalive_connections=self.pool_size),
+                headers={"Accept-Encoding": "gzip"},
+            )
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        return session
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return self.timeout
+        return timeout if isinstance(timeout, tuple) else (self.timeout[0], timeout)
+
+    def request(self, method: str, url: str, timeout=None, **kwargs):
+        session = self.session(url)
+        timeout = self._timeout(timeout)
+        if self.http2:
+            import httpx
+            return session.request(method, url, timeout=httpx.Timeout(timeout[1], connect=timeout[0]), **kwargs)
+        return session.request(method, url, timeout=timeout, **kwargs)
+
+    def post(self, url: str, timeout=None, **kwargs):
+        return self.request("POST", url, timeout=timeout, **kwargs)
+
+    def get(self, url: str, timeout=None, **kwargs):
+        return self.request("GET", url, timeout=timeout, **kwargs)
+
+    def stream_lines(self, method: str, url: str, timeout=None, **kwargs) -> Iterator[str]:
+        """
+        Send a request and yield response lines as they arrive (for SSE).
+        Raises for HTTP errors before yielding anything, and CallCancelled
+        (closing the connection) once the enclosing cancel_scope is set.
+        """
+        session = self.session(url)
+        timeout = self._timeout(timeout)
+        if self.http2:
+            import httpx
+            with session.stream(method, url, timeout=httpx.Timeout(timeout[1], connect=timeout[0]), **kwargs) as response:
+                if response.is_error:
+                    response.read()
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    check_cancelled()
+                    yield line
+            return
+
+        response = session.request(method, url, timeout=timeout, stream=True, **kwargs)
+        try:
+            response.raise_for_status()
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")    # SSE is always UTF-8
+            pending = ""
+            # chunk_size=None: hand over each chunk as it arrives instead of filling a buffer
+            for chunk in response.iter_content(chunk_size=None):
+                check_cancelled()
+                pending += decoder.decode(chunk)
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    yield line.rstrip("\r")
+            pending += decoder.decode(b"", final=True)
+            if pending:
+                yield pending.rstrip("\r")
+        finally:
+            response.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'hosts': sorted(self._sessions), 'http2': self.http2}
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+def iter_sse(lines) -> Iterator[Tuple[str, str]]:
+    """
+    Parse server-sent events from an iterable of lines, yielding
+    (event, data) per event as soon as its terminating blank line arrives.
+    """
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue    # Comment / keep-alive ping
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+    if data:
+        yield event, "\n".join(data)
+
+
+def iter_sse_json(lines) -> Iterator[Tuple[str, dict]]:
+    """iter_sse with JSON data decoded; stops at OpenAI's "[DONE]" sentinel"""
+    for event, data in iter_sse(lines):
+        if data.strip() == "[DONE]":
+            return
+        yield event, json.loads(data)
+
+
+class CallCancelled(RuntimeError):
+    """The caller gave up on this request (e.g. another agent won a hedge)"""
+
+
+_call_state = threading.local()
+
+
+@contextmanager
+def cancel_scope(event: Optional[threading.Event]):
+    """Make calls on this thread stop once `event` is set"""
+    previous = getattr(_call_state, 'cancel', None)
+    _call_state.cancel = event
+    try:
+        yield
+    finally:
+        _call_state.cancel = previous
+
+
+def current_cancel() -> Optional[threading.Event]:
+    """The cancel event of the enclosing cancel_scope (None outside one)"""
+    return getattr(_call_state, 'cancel', None)
+
+
+def check_cancelled():
+    """Raise CallCancelled if this thread's call has been cancelled"""
+    event = current_cancel()
+    if event is not None and event.is_set():
+        raise CallCancelled("request cancelled")
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> HttpTransport:
+    """Process-wide transport shared by all ExternalAgents"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpTransport()
+        return _default
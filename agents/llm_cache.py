@@ -0,0 +1,347 @@
+"""
+LLM Cache - Disk-backed response cache shared by every agent
+
+Responses are stored in SQLite, keyed by (model, temperature, normalized
+prompt hash), so an identical code request, research question or agent
+generator retry is answered from disk instead of Ollama or a paid API.
+
+- exact mode: only the same prompt (whitespace-normalized) hits
+- semantic mode: a prompt whose embedding is within LLM_CACHE_SIMILARITY
+  (cosine) of a cached one for the same model/temperature also hits; the
+  shared cache embeds and stores new answers in the background
+  (model_scheduler.run_background), so callers never wait on the embedder
+
+Entries expire after LLM_CACHE_TTL_S; when the cache grows past
+LLM_CACHE_MAX_MB the least recently used entries are evicted. Error
+answers ("❌ ...") are never stored. Pass cache=False to any wrapped call
+to skip the cache for it.
+
+Off unless LLM_CACHE=true: with temperature > 0 a cached answer replaces
+a fresh sample, which is what you want for repeats but not for "try again".
+"""
+import array
+import functools
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+ENABLED = os.getenv("LLM_CACHE", "false").lower() == "true"
+CACHE_FILE = os.getenv("LLM_CACHE_FILE", "memory/llm_cache.db")
+TTL_S = float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+MODE = os.getenv("LLM_CACHE_MODE", "exact")     # exact | semantic
+SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.95"))
+EMBED_MODEL = os.getenv("LLM_CACHE_EMBED_MODEL", "nomic-embed-text")
+
+EXACT = "exact"
+SEMANTIC = "semantic"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-insensitive form of a prompt (indentation inside code is kept per line)"""
+    lines = [line.rstrip() for line in prompt.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def cache_key(model: str, temperature, prompt: str) -> str:
+    raw = json.dumps([model, temperature, normalize_prompt(prompt)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def ollama_embedder(model: str = None) -> Optional[Callable[[str], List[float]]]:
+    """Embedding function backed by the local Ollama server (None if unavailable)"""
+    try:
+        from langchain_ollama import OllamaEmbeddings
+    except ImportError:
+        return None
+    embeddings = OllamaEmbeddings(model=model or EMBED_MODEL,
+                                  base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    return embeddings.embed_query
+
+
+class LLMCache:
+    """SQLite response cache with TTL and LRU size eviction (thread-safe)"""
+
+    def __init__(self, path: str = None, ttl_s: float = None, max_bytes: int = None,
+                 mode: str = None, similarity: float = None,
+                 embed: Callable[[str], List[float]] = None, clock=time.time,
+                 background: Callable = None):
+        self.path = path or CACHE_FILE
+        self.ttl_s = ttl_s or TTL_S
+        self.max_bytes = max_bytes or MAX_BYTES
+        self.mode = mode or MODE
+        self.similarity = similarity or SIMILARITY
+        self.clock = clock
+        self.embed = embed
+        self.background = background  # Runs semantic stores (embedding + insert) off the caller's thread
+        if self.mode == SEMANTIC and self.embed is None:
+            self.embed = ollama_embedder()
+            if self.embed is None:
+                print("⚠️ LLM_CACHE_MODE=semantic needs langchain_ollama; using exact matching")
+                self.mode = EXACT
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._init_db()
+        self.stats = {'hits': 0, 'semantic_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _init_db(self):
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    temperature TEXT,
+                    response TEXT,
+                    embedding BLOB,
+                    size INTEGER,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_model ON responses(model, temperature)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self.conn.commit()
+            self._bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, model: str, temperature, prompt: str) -> Optional[str]:
+        """Cached response for this prompt (or a close enough one in semantic mode), else None"""
+        key = cache_key(model, temperature, prompt)
+        now = self.clock()
+        with self._lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_s:
+                self._touch(key, now)
+                self.stats['hits'] += 1
+                return row[0]
+
+        if self.mode == SEMANTIC:
+            match = self._nearest(model, temperature, prompt, now)
+            if match is not None:
+                with self._lock:
+                    self._touch(match[0], now)
+                    self.stats['semantic_hits'] += 1
+                return match[1]
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def _touch(self, key, now):
+        self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+
+    def _nearest(self, model, temperature, prompt, now):
+        try:
+            query = self.embed(normalize_prompt(prompt))
+        except Exception as e:
+            print(f"⚠️ LLM cache embedding failed: {e}")
+            return None
+        best, best_score = None, self.similarity
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, response, embedding FROM responses "
+                "WHERE model = ? AND temperature = ? AND created_at >= ? AND embedding IS NOT NULL",
+                (model, str(temperature), now - self.ttl_s)).fetchall()
+        for key, response, blob in rows:
+            score = _cosine(query, array.array('f', blob))
+            if score >= best_score:
+                best, best_score = (key, response), score
+        return best
+
+    def put(self, model: str, temperature, prompt: str, response: str):
+        """Store a response (error answers are skipped)"""
+        if not response or response.lstrip().startswith("❌"):
+            return
+        if self.mode == SEMANTIC and self.background:
+            self.background(self._store, model, temperature, prompt, response)
+        else:
+            self._store(model, temperature, prompt, response)
+
+    def _store(self, model: str, temperature, prompt: str, response: str):
+        embedding = None
+        if self.mode == SEMANTIC:
+            try:
+                embedding = array.array('f', self.embed(normalize_prompt(prompt))).tobytes()
+            except Exception as e:
+                print(f"⚠️ LLM cache embedding failed: {e}")
+        key = cache_key(model, temperature, prompt)
+        size = len(response.encode("utf-8")) + len(embedding or b"")
+        now = self.clock()
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, str(temperature), response, embedding, size, now, now))
+            self._bytes += size - (old[0] if old else 0)
+            self.stats['stores'] += 1
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones down to 90% of max_bytes"""
+        if self._bytes <= self.max_bytes:
+            return
+        self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+        self._bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._bytes -= size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+            self._bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {**self.stats, 'entries': entries, 'bytes': self._bytes, 'mode': self.mode}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> Optional[LLMCache]:
+    """The process-wide cache, or None unless LLM_CACHE=true"""
+    global _default
+    if not ENABLED:
+        return None
+    with _default_lock:
+        if _default is None:
+            from agents.model_scheduler import run_background
+            _default = LLMCache(background=run_background)
+        return _default
+
+
+class CachedResponse:
+    """Stands in for the AIMessage of a cached call (agents only read .content)"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.response_metadata = {'cached': True}
+
+
+def prompt_text(prompt) -> Optional[str]:
+    """Cache-key text for a prompt string or message list (None if it can't be keyed)"""
+    if isinstance(prompt, str):
+        return prompt
+    if not isinstance(prompt, (list, tuple)):
+        return None
+    parts = []
+    for message in prompt:
+        if isinstance(message, (list, tuple)) and len(message) == 2:
+            parts.append(f"{message[0]}: {message[1]}")
+        elif isinstance(getattr(message, 'content', None), str):
+            parts.append(f"{getattr(message, 'type', '')}: {message.content}")
+        else:
+            return None
+    return "\n".join(parts)
+
+
+class CachedLLM:
+    """
+    Wraps a LangChain chat model: invoke()/stream() go through the cache,
+    everything else is passed through to the model.
+    """
+
+    def __init__(self, llm, cache: LLMCache = None):
+        self.llm = llm
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _key_parts(self):
+        return getattr(self.llm, 'model', type(self.llm).__name__), getattr(self.llm, 'temperature', None)
+
+    def _cache(self, enabled):
+        return (self.cache or default_cache()) if enabled else None
+
+    def invoke(self, prompt, cache: bool = True, **kwargs):
+        text = prompt_text(prompt)
+        store = self._cache(cache and text is not None and not kwargs)
+        if store is None:
+            return self.llm.invoke(prompt, **kwargs)
+        model, temperature = self._key_parts()
+        hit = store.get(model, temperature, text)
+        if hit is not None:
+            return CachedResponse(hit)
+        response = self.llm.invoke(prompt)
+        if isinstance(response.content, str):
+            store.put(model, temperature, text, response.content)
+        return response
+
+    def stream(self, prompt, cache: bool = True, **kwargs):
+        text = prompt_text(prompt)
+        store = self._cache(cache and text is not None and not kwargs)
+        if store is None:
+            yield from self.llm.stream(prompt, **kwargs)
+            return
+        model, temperature = self._key_parts()
+        hit = store.get(model, temperature, text)
+        if hit is not None:
+            yield CachedResponse(hit)
+            return
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            parts.append(chunk.content if isinstance(chunk.content, str) else "")
+            yield chunk
+        store.put(model, temperature, text, "".join(parts))
+
+
+def cached_llm(llm, cache: LLMCache = None):
+    """Wrap llm in a CachedLLM (once); pass-through when llm is None"""
+    if llm is None or isinstance(llm, CachedLLM):
+        return llm
+    return CachedLLM(llm, cache)
+
+
+def cached_execute(execute):
+    """
+    Decorator for ExternalAgent.execute: repeats of the same task (and
+    options) for the same provider/model are answered from the cache.
+    Callers can pass cache=False.
+    """
+    @functools.wraps(execute)
+    def wrapper(self, task: str, cache: bool = True, **kwargs):
+        store = (getattr(self, 'cache', None) or default_cache()) if cache else None
+        if store is None:
+            return execute(self, task, **kwargs)
+        model = f"{self.name}/{getattr(self, 'model', '')}"
+        prompt = f"{task}\n{json.dumps(kwargs, sort_keys=True, default=str)}" if kwargs else task
+        hit = store.get(model, None, prompt)
+        if hit is not None:
+            self.track_usage()
+            self._local.usage = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
+            return hit
+        result = execute(self, task, **kwargs)
+        store.put(model, None, prompt, result)
+        return result
+    return wrapper
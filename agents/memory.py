@@ -3,6 +3,7 @@ Memory System - Persistent context and external service integration
 """
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, List, Any
 
@@ -17,6 +18,8 @@ class MemorySystem:
         self.context = {}
         self.conversations = []
         self.external_services = {}
+        self._lock = threading.RLock()
+        self._save_pending = False
         self.load_memory()
     
     def load_memory(self):
@@ -32,16 +35,29 @@ class MemorySystem:
             print(f"Could not load memory: {e}")
     
     def save_memory(self):
-        """Save memory to disk"""
-        try:
-            with open(self.memory_file, 'w') as f:
-                json.dump({
-                    'context': self.context,
-                    'conversations': self.conversations[-100:],  # Keep last 100
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            print(f"Could not save memory: {e}")
+        """Save memory to disk (written to a temp file, then swapped in)"""
+        with self._lock:
+            self._save_pending = False
+            try:
+                tmp_file = f"{self.memory_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump({
+                        'context': self.context,
+                        'conversations': self.conversations[-100:],  # Keep last 100
+                        'last_updated': datetime.now().isoformat()
+                    }, f, indent=2)
+                os.replace(tmp_file, self.memory_file)
+            except Exception as e:
+                print(f"Could not save memory: {e}")
+    
+    def save_in_background(self):
+        """Save off the caller's thread (deferred while the system is stressed)"""
+        with self._lock:
+            if self._save_pending:
+                return  # The queued save will include this change
+            self._save_pending = True
+        from agents.model_scheduler import run_background
+        run_background(self.save_memory)
     
     def get(self, key: str, default=None):
         """Get a value from context"""
@@ -53,14 +69,15 @@ class MemorySystem:
         self.save_memory()
     
     def add_conversation(self, user_message: str, agent_response: str, agent_type: str):
-        """Store a conversation turn"""
-        self.conversations.append({
-            'timestamp': datetime.now().isoformat(),
-            'user': user_message,
-            'agent': agent_response,
-            'agent_type': agent_type
-        })
-        self.save_memory()
+        """Store a conversation turn (written to disk in the background)"""
+        with self._lock:
+            self.conversations.append({
+                'timestamp': datetime.now().isoformat(),
+                'user': user_message,
+                'agent': agent_response,
+                'agent_type': agent_type
+            })
+        self.save_in_background()
     
     def set_context(self, key: str, value: Any):
         """Set a context value"""
@@ -0,0 +1,269 @@
+"""
+Adaptive Model Scheduler - Load-aware model and context selection
+Uses live telemetry from SystemObserver to pick a rung from a configured
+model ladder (e.g. 3B / 7B / 14B) and a context size, defers background
+jobs while the machine is STRESSED, and records every decision.
+
+Background work (conversation memory writes, semantic-cache embeddings,
+agent warm-ups) goes through run_background(), which uses one shared
+scheduler for the whole process and flushes deferred jobs at exit.
+
+Configure via .env:
+    COMPANION_MODEL_LADDER=llama3.2:3b,llama3.1:8b,qwen2.5:14b
+    COMPANION_CTX_LADDER=2048,4096,8192
+"""
+import atexit
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# CPU thresholds (EWMA / p95 %) for moving between rungs
+STEP_DOWN_CPU = 75
+STEP_UP_CPU_P95 = 50
+UPGRADE_WINDOW_S = 30     # Load must stay low this long before stepping up
+DEFER_POLL_S = 5          # How often deferred jobs re-check the load
+
+
+def estimate_model_gb(model: str) -> float:
+    """Rough resident size of a 4-bit quantized model from its tag (e.g. '7b')"""
+    match = re.search(r'(\d+(?:\.\d+)?)b\b', model.lower())
+    if not match:
+        return 0.0
+    return float(match.group(1)) * 0.6 + 1.0
+
+
+class ModelRung:
+    """One step on the model ladder"""
+
+    def __init__(self, model: str, num_ctx: int, min_available_gb: float = None):
+        self.model = model
+        self.num_ctx = num_ctx
+        self.min_available_gb = (min_available_gb if min_available_gb is not None
+                                 else estimate_model_gb(model))
+
+    def __repr__(self):
+        return f"ModelRung({self.model}, ctx={self.num_ctx})"
+
+
+def ladder_from_env(default_model: str) -> List[ModelRung]:
+    """Build the ladder (smallest first) from COMPANION_MODEL_LADDER / COMPANION_CTX_LADDER"""
+    models = [m.strip() for m in os.getenv("COMPANION_MODEL_LADDER", "").split(",") if m.strip()]
+    contexts = [int(c) for c in os.getenv("COMPANION_CTX_LADDER", "").split(",") if c.strip()]
+
+    if not models:
+        # Single model: only the context size adapts to load
+        return [ModelRung(default_model, 2048), ModelRung(default_model, 4096)]
+
+    if not contexts:
+        contexts = [2048 * (2 ** min(i, 2)) for i in range(len(models))]
+    contexts += [contexts[-1]] * (len(models) - len(contexts))
+    return [ModelRung(model, ctx) for model, ctx in zip(models, contexts)]
+
+
+class Decision:
+    """A recorded scheduling decision"""
+
+    def __init__(self, rung: ModelRung, tier: int, reason: str, load: Dict):
+        self.rung = rung
+        self.tier = tier
+        self.reason = reason
+        self.load = load
+        self.timestamp = datetime.now()
+
+    @property
+    def model(self):
+        return self.rung.model
+
+    @property
+    def num_ctx(self):
+        return self.rung.num_ctx
+
+    def to_dict(self):
+        return {
+            'model': self.rung.model,
+            'num_ctx': self.rung.num_ctx,
+            'tier': self.tier,
+            'reason': self.reason,
+            'load': self.load,
+            'timestamp': self.timestamp.isoformat()
+        }
+
+
+class AdaptiveScheduler:
+    """
+    Chooses a model rung from live load.
+
+    Steps down immediately when the machine is STRESSED or CPU EWMA is high,
+    and steps up one rung at a time only after CPU p95 has stayed low for
+    UPGRADE_WINDOW_S, so the choice doesn't flap.
+    """
+
+    def __init__(self, observer, ladder: List[ModelRung], history_size: int = 200,
+                 poll_s: float = DEFER_POLL_S):
+        self.observer = observer
+        self.ladder = ladder
+        self.tier = len(ladder) - 1
+        self.history = deque(maxlen=history_size)
+        self.poll_s = poll_s
+
+        self._lock = threading.Lock()
+        self._deferred = deque()
+        self._draining = False        # A drain thread owns the deferred queue
+        self._threads = set()         # Running job (and drain) threads
+        self._flushing = threading.Event()
+
+    def _load_snapshot(self) -> Dict:
+        status = self.observer.get_system_status()
+        load = self.observer.get_load_summary(UPGRADE_WINDOW_S)
+        return {
+            'status': status['status'],
+            'cpu': status['cpu']['usage'],
+            'cpu_ewma': load['cpu']['ewma'],
+            'cpu_p95': load['cpu']['p95'],
+            'memory_percent': status['memory']['used_percent'],
+            'available_gb': status['memory']['available_gb'],
+        }
+
+    def _fits_memory(self, tier: int, load: Dict) -> bool:
+        rung = self.ladder[tier]
+        if rung.model == self.ladder[self.tier].model:
+            return True  # Already loaded - no extra memory needed
+        return load['available_gb'] >= rung.min_available_gb
+
+    def choose(self) -> Decision:
+        """Pick the rung for the next request and record the decision"""
+        with self._lock:
+            load = self._load_snapshot()
+            tier = self.tier
+
+            if load['status'] == "STRESSED":
+                tier, reason = 0, "system stressed"
+            elif load['cpu_ewma'] > STEP_DOWN_CPU:
+                tier, reason = max(0, tier - 1), f"cpu ewma {load['cpu_ewma']:.0f}%"
+            elif load['cpu_p95'] < STEP_UP_CPU_P95 and tier < len(self.ladder) - 1 \
+                    and self._fits_memory(tier + 1, load):
+                tier, reason = tier + 1, f"cpu p95 {load['cpu_p95']:.0f}%"
+            else:
+                reason = "steady"
+
+            # Never pick a rung that doesn't fit in free memory
+            while tier > 0 and not self._fits_memory(tier, load):
+                tier, reason = tier - 1, f"only {load['available_gb']}GB free"
+
+            self.tier = tier
+            decision = Decision(self.ladder[tier], tier, reason, load)
+            self.history.append(decision)
+            return decision
+
+    def is_stressed(self) -> bool:
+        return self.observer.get_system_status()['status'] == "STRESSED"
+
+    def run_background(self, job: Callable, *args, **kwargs):
+        """
+        Run a background job now, or hold it until the machine is no longer stressed.
+        Jobs queue behind already-deferred ones so they keep their order.
+        Returns True if the job was deferred.
+        """
+        stressed = self.is_stressed()
+        with self._lock:
+            if not stressed and not self._deferred:
+                self._spawn(self._run_job, job, args, kwargs)
+                return False
+            self._deferred.append((job, args, kwargs))
+            # Checked and set under the same lock as the append, so a drain
+            # thread that is just exiting can never strand this job
+            if not self._draining:
+                self._draining = True
+                self._spawn(self._drain_deferred)
+        return True
+
+    def _spawn(self, target, *args):
+        """Start a tracked daemon thread (lock held)"""
+        def run():
+            try:
+                target(*args)
+            finally:
+                with self._lock:
+                    self._threads.discard(threading.current_thread())
+
+        thread = threading.Thread(target=run, name="BackgroundJob", daemon=True)
+        self._threads.add(thread)
+        thread.start()
+
+    @staticmethod
+    def _run_job(job, args, kwargs):
+        try:
+            job(*args, **kwargs)
+        except Exception as e:
+            print(f"⚠️ Background job failed: {e}")
+
+    def _drain_deferred(self):
+        while True:
+            while not self._flushing.is_set() and self.is_stressed():
+                self._flushing.wait(self.poll_s)
+            with self._lock:
+                if not self._deferred:
+                    self._draining = False
+                    return
+                job, args, kwargs = self._deferred.popleft()
+            self._run_job(job, args, kwargs)
+
+    def flush(self, timeout: float = 10.0):
+        """Run deferred jobs now, regardless of load, and wait for running ones (used at exit)"""
+        self._flushing.set()
+        try:
+            while True:
+                with self._lock:
+                    if not self._deferred:
+                        break
+                    job, args, kwargs = self._deferred.popleft()
+                self._run_job(job, args, kwargs)
+
+            deadline = time.monotonic() + timeout
+            with self._lock:
+                threads = list(self._threads)
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+        finally:
+            self._flushing.clear()
+
+    def deferred_count(self) -> int:
+        return len(self._deferred)
+
+    def recent_decisions(self, limit: int = 10) -> List[Dict]:
+        return [d.to_dict() for d in list(self.history)[-limit:]]
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler(default_model: str = None) -> AdaptiveScheduler:
+    """Process-wide scheduler (ladder from .env), flushed at interpreter exit"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            from agents.system_observer import SystemObserver
+            model = default_model or os.getenv("COMPANION_MODEL", "llama3.2:latest")
+            _shared = AdaptiveScheduler(SystemObserver(), ladder_from_env(model))
+            atexit.register(_shared.flush)
+        return _shared
+
+
+def run_background(job: Callable, *args, **kwargs) -> bool:
+    """
+    Run job off the caller's thread through the shared scheduler, deferred
+    while the machine is STRESSED. Falls back to a plain daemon thread if
+    telemetry is unavailable. Returns True if the job was deferred.
+    """
+    try:
+        scheduler = shared_scheduler()
+    except Exception as e:
+        print(f"⚠️ Background scheduling disabled: {e}")
+        threading.Thread(target=AdaptiveScheduler._run_job, args=(job, args, kwargs), daemon=True).start()
+        return False
+    return scheduler.run_background(job, *args, **kwargs)
@@ -1,11 +1,12 @@
 """
 Orchestrator Agent - Manages and delegates tasks to sub-agents
 """
-from typing import Dict, Any
-from agents.researcher import ResearchAgent
-from agents.coder import CoderAgent
-from agents.executor import ExecutorAgent
-from agents.vision import VisionAgent
+import os
+import time
+from typing import Dict, Any, Optional, Tuple
+from agents.agent_registry import default_agents
+from agents.task_router import TaskRouter, RouteDecision
+from agents.task_planner import TaskPlanner, DagExecutor
 
 class Orchestrator:
     """
@@ -14,16 +15,46 @@ class Orchestrator:
     
     def __init__(self, llm):
         self.llm = llm
-        self.sub_agents = {
-            'researcher': ResearchAgent(llm),
-            'coder': CoderAgent(llm),
-            'executor': ExecutorAgent(llm),
-            'vision': VisionAgent(llm),
-        }
+        # Built on first use (see AgentRegistry.init_report for their cost)
+        self.sub_agents = default_agents(llm)
+        
+        # Keyword and centroid tiers answer most tasks locally; the LLM only breaks ties
+        self.router = TaskRouter(llm_fallback=self.llm_route)
+        
+        # AgentPlugins whose capabilities match whole words in a task take it before the router runs
+        self.plugins = None
         
     def analyze_task(self, task: str) -> str:
         """
-        Analyze the task and determine which sub-agent(s) should handle it
+        Determine which sub-agent should handle the task (see TaskRouter)
+        """
+        return self._route(task).agent
+    
+    def register_plugin(self, plugin):
+        """Add an AgentPlugin; tasks matching its capabilities are sent to it"""
+        if self.plugins is None:
+            from plugins.plugin_registry import PluginRegistry
+            self.plugins = PluginRegistry()
+        self.plugins.register(plugin)
+        self.sub_agents.add(plugin.name, plugin)
+    
+    def _route(self, task: str):
+        if self.plugins:
+            # Only a whole-word capability hit beats the router ("post" inside "postgres" doesn't)
+            start = time.perf_counter()
+            match = next((m for m in self.plugins.match(task) if m.whole_word), None)
+            if match:
+                return RouteDecision(match.name, 'plugin', match.score, (time.perf_counter() - start) * 1000)
+        
+        decision = self.router.route(task)
+        if decision.agent not in self.sub_agents:
+            decision.agent = 'executor'
+        return decision
+    
+    def llm_route(self, task: str) -> Optional[str]:
+        """
+        Ask the LLM which sub-agent should handle the task (slow fallback).
+        Returns the word it answered with, or None; TaskRouter checks it.
         """
         analysis_prompt = f"""You are an intelligent task orchestrator. Analyze the following task and determine which agent should handle it:
 
@@ -36,35 +67,51 @@ Task: {task}
 
 Respond with ONLY ONE WORD - either 'researcher', 'coder', or 'executor'."""
 
-        try:
-            response = self.llm.invoke(analysis_prompt)
-            agent_type = response.content.strip().lower()
-            
-            # Validate response
-            if agent_type in self.sub_agents:
-                return agent_type
-            else:
-                # Default to executor for general tasks
-                return 'executor'
-        except Exception as e:
-            print(f"⚠️  Error analyzing task: {e}")
-            return 'executor'  # Default fallback
+        response = self.llm.invoke(analysis_prompt)
+        return response.content.strip().lower().strip(".'\"") or None
     
-    def process_task(self, task: str) -> str:
+    def run_task(self, task: str, verbose: bool = False) -> Tuple[str, RouteDecision]:
         """
-        Process a task by delegating to the appropriate sub-agent
+        Route a task (plugins first, then the router, falling back to the
+        executor) and run it on the chosen sub-agent. Returns (result, route).
         """
-        # Analyze which agent should handle this
-        agent_type = self.analyze_task(task)
+        route = self._route(task)
+        agent_type = route.agent
         agent = self.sub_agents[agent_type]
         
-        print(f"🎯 Delegating to: {agent_type.capitalize()} Agent")
-        
-        # Execute with the selected agent
-        result = agent.execute(task)
+        if verbose:
+            print(f"🎯 Delegating to: {agent_type[:1].upper() + agent_type[1:]} Agent "
+                  f"(routed by {route.tier} in {route.latency_ms:.1f} ms)")
         
+        return agent.execute(task), route
+    
+    def process_task(self, task: str) -> str:
+        """
+        Process a task by delegating to the appropriate sub-agent
+        """
+        result, _ = self.run_task(task, verbose=True)
         return result
     
+    def process_plan(self, task: str, parallel: bool = True, max_workers: int = 4, on_node=None) -> str:
+        """
+        Split a compound task into a DAG of sub-tasks and run it.
+        With parallel=True independent sub-tasks run concurrently; on_node is
+        called with each SubTask as it finishes.
+        """
+        planner = TaskPlanner(self.router, self.llm, use_llm=os.getenv("PLANNER_USE_LLM") == "true")
+        nodes = planner.plan(task)
+        
+        print("🗺️  Plan:")
+        for node in nodes:
+            print(f"   {node}")
+        
+        executor = DagExecutor(self.sub_agents, max_workers=max_workers if parallel else 1)
+        return executor.run(nodes, on_node=on_node)
+    
+    def agent_init_report(self) -> Dict[str, Dict]:
+        """Which sub-agents have been built so far, and how long each took"""
+        return self.sub_agents.init_report()
+    
     def create_custom_agent(self, name: str, role: str, goal: str):
         """
         Create a custom sub-agent with specific role and goal
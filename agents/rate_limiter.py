@@ -0,0 +1,165 @@
+"""
+Rate Limiter - Client-side token buckets per provider and model
+
+Each (provider, model) gets two buckets, requests/minute and tokens/minute,
+with limits from the provider's `rate_limits` entry in AVAILABLE_AGENTS.
+Callers reserve capacity before sending and wait (time.sleep, or
+asyncio.sleep in acquire_async) until their reservation comes due.
+Reservations are taken in arrival order, so concurrent callers queue
+instead of all bursting at once and then stalling on 429s.
+
+Token counts are estimates (prompt characters / 4 plus the expected
+output) since the real usage is only known after the response.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKEN_ESTIMATE = int(os.getenv("RATE_LIMIT_OUTPUT_TOKENS", "512"))
+MAX_WAIT_S = float(os.getenv("RATE_LIMIT_MAX_WAIT_S", "60"))
+
+
+class RateLimitTimeout(RuntimeError):
+    """Waiting for capacity would take longer than the caller allows"""
+
+
+def estimate_tokens(payload, max_tokens: int = None) -> int:
+    """Rough token count for a request body (str or JSON-able) plus its expected output"""
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+    output = OUTPUT_TOKEN_ESTIMATE if max_tokens is None else min(max_tokens, OUTPUT_TOKEN_ESTIMATE)
+    return len(text) // CHARS_PER_TOKEN + output
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously at `rate_per_s` up to `capacity`. Reserving
+    may drive the level negative; the deficit is the reserver's wait time.
+    """
+
+    def __init__(self, rate_per_s: float, capacity: float, clock=time.monotonic):
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate_per_s)
+        self.updated = now
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` would be available (0 if it is now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)     # Oversized requests wait for a full bucket, not forever
+        return max(0.0, (amount - self.level) / self.rate_per_s)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Requests/min + tokens/min limits for one provider/model (thread-safe)"""
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 clock=time.monotonic):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.clock = clock
+        self.requests = TokenBucket(rpm / 60.0, rpm, clock) if rpm else None
+        self.tokens = TokenBucket(tpm / 60.0, tpm, clock) if tpm else None
+        self._lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waited': 0, 'wait_s': 0.0, 'rejected': 0}
+
+    def reserve(self, tokens: int = 0, max_wait_s: float = None) -> float:
+        """
+        Reserve one request + `tokens`, returning how long the caller must wait
+        before sending. Raises RateLimitTimeout (reserving nothing) if that
+        would exceed max_wait_s.
+        """
+        max_wait_s = MAX_WAIT_S if max_wait_s is None else max_wait_s
+        with self._lock:
+            now = self.clock()
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.wait_for(1, now))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.wait_for(tokens, now))
+            if wait > max_wait_s:
+                self.stats['rejected'] += 1
+                raise RateLimitTimeout(f"{self.name} rate limit: next slot in {wait:.0f}s "
+                                       f"(limit {self.rpm or '-'} req/min, {self.tpm or '-'} tokens/min)")
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens and tokens:
+                self.tokens.take(tokens)
+            self.stats['acquired'] += 1
+            if wait > 0:
+                self.stats['waited'] += 1
+                self.stats['wait_s'] += wait
+            return wait
+
+    def acquire(self, tokens: int = 0, max_wait_s: float = None) -> float:
+        """Block until the request may be sent; returns the time waited"""
+        wait = self.reserve(tokens, max_wait_s)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0, max_wait_s: float = None) -> float:
+        """acquire() for coroutines: waits without blocking the event loop"""
+        wait = self.reserve(tokens, max_wait_s)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            now = self.clock()
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket._refill(now)
+            return {
+                'rpm': self.rpm,
+                'tpm': self.tpm,
+                'requests_available': round(self.requests.level, 1) if self.requests else None,
+                'tokens_available': round(self.tokens.level) if self.tokens else None,
+                **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.stats.items()},
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limits_for(rate_limits: Optional[Dict], model: str) -> Dict:
+    """
+    Resolve {'rpm', 'tpm'} for a model from a provider's rate_limits entry:
+    {'rpm': 50, 'tpm': 40000, 'models': {'some-model': {'rpm': 5}}}
+    """
+    if not rate_limits:
+        return {}
+    limits = {k: v for k, v in rate_limits.items() if k in ('rpm', 'tpm')}
+    limits.update(rate_limits.get('models', {}).get(model, {}))
+    return limits
+
+
+def limiter_for(provider: str, model: str = "", rate_limits: Optional[Dict] = None) -> RateLimiter:
+    """The process-wide limiter for (provider, model), created from its limits on first use"""
+    key = (provider, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            limits = limits_for(rate_limits, model)
+            _limiters[key] = RateLimiter(f"{provider}/{model}" if model else provider,
+                                         limits.get('rpm'), limits.get('tpm'))
+        return _limiters[key]
+
+
+def limiter_states() -> Dict[str, Dict]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {limiter.name: limiter.snapshot() for limiter in limiters.values()}
@@ -1,7 +1,10 @@
 """
 Research Agent - Handles web searches and information gathering
 """
-from tools.web_search import DuckDuckGoSearch
+import threading
+
+from agents.llm_cache import cached_llm, default_cache
+
 
 class ResearchAgent:
     """
@@ -9,21 +12,25 @@ class ResearchAgent:
     """
     
     def __init__(self, llm):
-        self.llm = llm
-        self.search_tool = DuckDuckGoSearch()
+        self.llm = cached_llm(llm)  # Repeated prompts are served from the LLM cache (LLM_CACHE=true)
+        self._local = threading.local()  # Whether each thread's last stream failed
+        self._search_tool = None  # DDGS client, created on the first search
         self.role = "Research Specialist"
         self.goal = "Gather accurate information from the web and provide comprehensive summaries"
     
-    def execute(self, task: str) -> str:
-        """
-        Execute a research task
-        """
-        # First, perform web search
+    @property
+    def search_tool(self):
+        if self._search_tool is None:
+            from tools.web_search import DuckDuckGoSearch
+            self._search_tool = DuckDuckGoSearch()
+        return self._search_tool
+    
+    def _search(self, task: str) -> str:
         print("🔍 Searching the web...")
-        search_results = self.search_tool.search(task, max_results=5)
-        
-        # Then, use LLM to synthesize the information
-        synthesis_prompt = f"""You are a research specialist. Based on the following web search results, provide a comprehensive answer to the task.
+        return self.search_tool.search(task, max_results=5)
+    
+    def _build_prompt(self, task: str, search_results: str) -> str:
+        return f"""You are a research specialist. Based on the following web search results, provide a comprehensive answer to the task.
 
 Task: {task}
 
@@ -31,9 +38,71 @@ Search Results:
 {search_results}
 
 Provide a clear, well-organized answer based on the search results."""
-
+    
+    def _answer_cache(self, cache: bool):
+        """
+        (store, model, temperature) for whole research answers, or None. They
+        are keyed on the task alone, so a repeat is answered before searching
+        (search results differ from one search to the next).
+        """
+        if not cache or self.llm is None:
+            return None
+        store = getattr(self.llm, 'cache', None) or default_cache()
+        if store is None:
+            return None
+        model = getattr(self.llm, 'model', type(self.llm).__name__)
+        return store, f"research/{model}", getattr(self.llm, 'temperature', None)
+    
+    def execute(self, task: str, cache: bool = True) -> str:
+        """
+        Execute a research task
+        """
+        answers = self._answer_cache(cache)
+        if answers:
+            store, model, temperature = answers
+            hit = store.get(model, temperature, task)
+            if hit is not None:
+                return hit
+        
+        # First, perform web search
+        search_results = self._search(task)
+        
+        # Then, use LLM to synthesize the information
         try:
-            response = self.llm.invoke(synthesis_prompt)
-            return response.content
+            response = self.llm.invoke(self._build_prompt(task, search_results), cache=False)
         except Exception as e:
             return f"❌ Error during research: {str(e)}\n\nRaw search results:\n{search_results}"
+        if answers:
+            store.put(model, temperature, task, response.content)
+        return response.content
+    
+    def stream_execute(self, task: str, cache: bool = True):
+        """
+        Execute a research task, yielding the synthesis as it is generated
+        """
+        self._local.failed = False
+        answers = self._answer_cache(cache)
+        if answers:
+            store, model, temperature = answers
+            hit = store.get(model, temperature, task)
+            if hit is not None:
+                yield hit
+                return
+        
+        search_results = self._search(task)
+        parts = []
+        try:
+            for chunk in self.llm.stream(self._build_prompt(task, search_results), cache=False):
+                parts.append(chunk.content if isinstance(chunk.content, str) else "")
+                yield chunk.content
+        except Exception as e:
+            self._local.failed = True
+            yield f"❌ Error during research: {str(e)}\n\nRaw search results:\n{search_results}"
+            return
+        if answers:
+            store.put(model, temperature, task, "".join(parts))
+    
+    @property
+    def last_call_failed(self) -> bool:
+        """Whether this thread's last stream_execute() ended in an error"""
+        return getattr(self._local, 'failed', False)
@@ -0,0 +1,235 @@
+"""
+Resilience - Retries with backoff and per-provider circuit breakers
+
+RetryPolicy retries connection errors, timeouts and 429/5xx responses with
+full-jitter exponential backoff, waiting exactly as long as a Retry-After
+header asks (and giving up at once if that is longer than max_delay_s).
+
+CircuitBreaker counts consecutive failed calls per provider. After
+`failure_threshold` of them it opens and calls fail immediately, so callers
+(SmartOrchestrator) move on to the next-best agent instead of waiting out a
+timeout. After `reset_timeout_s` one probe call is let through (half-open);
+its result closes or re-opens the breaker.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+MAX_RETRIES = int(os.getenv("EXTERNAL_MAX_RETRIES", "2"))
+BACKOFF_BASE_S = float(os.getenv("EXTERNAL_BACKOFF_BASE_S", "0.5"))
+BACKOFF_MAX_S = float(os.getenv("EXTERNAL_BACKOFF_MAX_S", "20"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_S = float(os.getenv("BREAKER_RESET_S", "30"))
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504, 529}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider's breaker is open; the call was not attempted"""
+
+
+class RetryableStatus(RuntimeError):
+    """A 429/5xx response, raised so the retry loop sees it"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP-date), None if absent/invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """How many times to retry, and how long to wait between attempts"""
+
+    def __init__(self, max_retries: int = None, base_delay_s: float = None, max_delay_s: float = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay_s = base_delay_s or BACKOFF_BASE_S
+        self.max_delay_s = max_delay_s or BACKOFF_MAX_S
+        self.sleep = sleep
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retry number `attempt` (0-based); None = don't retry"""
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay_s else None
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * (2 ** attempt)))
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        if isinstance(error, RetryableStatus):
+            return True
+        # Connection / timeout errors from requests or httpx
+        return type(error).__name__ in {
+            'ConnectionError', 'Timeout', 'ConnectTimeout', 'ReadTimeout',
+            'ConnectError', 'ReadError', 'RemoteProtocolError', 'ChunkedEncodingError',
+        }
+
+    def run(self, call: Callable, breaker: "CircuitBreaker" = None, before_attempt: Callable = None):
+        """
+        Run call() with retries, reporting the final outcome to the breaker.
+        call() should raise RetryableStatus for 429/5xx responses.
+        before_attempt() runs ahead of every attempt (e.g. rate limiting), once
+        the breaker has let the call through, so a rejected call costs nothing.
+        """
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"{breaker.name} is unavailable (circuit open, "
+                                   f"retrying in {breaker.retry_in_s():.0f}s)")
+        if before_attempt is not None:
+            try:
+                before_attempt()
+            except Exception:
+                if breaker is not None:
+                    breaker.release()       # Nothing was sent, so nothing to report
+                raise
+        attempt = 0
+        while True:
+            try:
+                result = call()
+            except Exception as e:
+                retry_after = None
+                if isinstance(e, RetryableStatus):
+                    retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                wait = self.delay(attempt, retry_after) if self.is_retryable(e) else None
+                if wait is None:
+                    if breaker is not None:
+                        if self.is_retryable(e):
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()    # 4xx etc: the provider itself is up
+                    raise
+                attempt += 1
+                print(f"🔁 Retry {attempt}/{self.max_retries} in {wait:.1f}s after: {e}")
+                self.sleep(wait)
+                if before_attempt is not None:
+                    try:
+                        before_attempt()
+                    except Exception:
+                        if breaker is not None:
+                            breaker.record_failure()    # Still failing when we had to give up
+                        raise
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (thread-safe)"""
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout_s: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold or BREAKER_FAILURES
+        self.reset_timeout_s = reset_timeout_s or BREAKER_RESET_S
+        self.clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout_s:
+            return HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not use up the half-open probe)"""
+        with self._lock:
+            state = self._current_state()
+            return state == OPEN or (state == HALF_OPEN and self._probing)
+
+    def retry_in_s(self) -> float:
+        with self._lock:
+            return max(0.0, self.reset_timeout_s - (self.clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True    # Let exactly one probe through
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def release(self):
+        """Give back a half-open probe that allow() granted but was never sent"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.stats['successes'] += 1
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.stats['failures'] += 1
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._state != OPEN or self._probing:
+                    self.stats['opened'] += 1
+                    print(f"⛔ Circuit open for {self.name} after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probing = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_in_s': round(max(0.0, self.reset_timeout_s - (self.clock() - self._opened_at)), 1)
+                if state == OPEN else 0.0,
+                **self.stats,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(name: str) -> CircuitBreaker:
+    """The process-wide breaker for a provider"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
@@ -0,0 +1,82 @@
+"""
+Routing Policy - Pick agents from live latency/cost stats
+
+ROUTING_POLICY=rules (default) keeps SmartOrchestrator's keyword routing.
+ROUTING_POLICY=adaptive picks, per task category, the agent that best meets
+ROUTING_OBJECTIVE among those whose recent cost per task (EWMA) fits the
+category's budget and whose success rate is acceptable:
+
+- fastest: lowest latency EWMA under the budget
+- cheapest: lowest cost EWMA, latency breaking ties
+
+Agents without MIN_SAMPLES calls in a category are unknown. The keyword
+pick is kept while it is unknown (so it collects samples), and with
+probability ROUTING_EXPLORE another unknown agent is tried instead.
+"""
+import os
+import random
+from typing import Dict, List, Optional
+
+from agents.agent_stats import StatsStore
+
+RULES = "rules"
+ADAPTIVE = "adaptive"
+FASTEST = "fastest"
+CHEAPEST = "cheapest"
+
+ROUTING_POLICY = os.getenv("ROUTING_POLICY", RULES)
+ROUTING_OBJECTIVE = os.getenv("ROUTING_OBJECTIVE", FASTEST)
+EXPLORE_RATE = float(os.getenv("ROUTING_EXPLORE", "0.05"))
+MIN_SAMPLES = 5
+MIN_SUCCESS_RATE = 0.8
+
+# Dollars per task; override with ROUTING_BUDGET_USD (all) or ROUTING_BUDGET_<CATEGORY>_USD
+DEFAULT_BUDGETS_USD = {'reasoning': 0.05, 'research': 0.02, 'code': 0.02, 'general': 0.01}
+
+
+def budget_for(category: str) -> float:
+    value = os.getenv(f"ROUTING_BUDGET_{category.upper()}_USD") or os.getenv("ROUTING_BUDGET_USD")
+    if value:
+        return float(value)
+    return DEFAULT_BUDGETS_USD.get(category, DEFAULT_BUDGETS_USD['general'])
+
+
+class CostAwareRouter:
+    """Chooses among candidate agents by their recorded stats"""
+
+    def __init__(self, stats: StatsStore, objective: str = None, budgets: Dict[str, float] = None,
+                 explore_rate: float = None, rng: random.Random = None):
+        self.stats = stats
+        self.objective = objective or ROUTING_OBJECTIVE
+        self.budgets = budgets or {}
+        self.explore_rate = EXPLORE_RATE if explore_rate is None else explore_rate
+        self.rng = rng or random.Random()
+
+    def budget(self, category: str) -> float:
+        return self.budgets.get(category, budget_for(category))
+
+    def _stats(self, name: str, category: str):
+        """Category stats once there are enough of them, else the agent's overall stats"""
+        stats = self.stats.agent(name, category)
+        return stats if stats.calls >= MIN_SAMPLES else self.stats.agent(name)
+
+    def _score(self, stats):
+        latency, cost = stats.latency_ewma.value, stats.cost_ewma.value or 0.0
+        return (cost, latency) if self.objective == CHEAPEST else (latency, cost)
+
+    def choose(self, category: str, names: List[str], default: str) -> Optional[str]:
+        """Best of `names` for a task in `category`; `default` is the keyword-routing pick"""
+        budget = self.budget(category)
+        known, unknown = [], []
+        for name in names:
+            stats = self._stats(name, category)
+            if stats.calls < MIN_SAMPLES:
+                unknown.append(name)
+            elif stats.success_rate >= MIN_SUCCESS_RATE and (stats.cost_ewma.value or 0.0) <= budget:
+                known.append((self._score(stats), name))
+
+        if unknown and self.rng.random() < self.explore_rate:
+            return self.rng.choice(unknown)
+        if default in unknown or not known:
+            return default
+        return min(known)[1]
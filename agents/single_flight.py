@@ -0,0 +1,172 @@
+"""
+Single Flight - Coalesce identical in-flight LLM calls
+
+When several callers (UI panels, batch workers, the orchestrator's routing
+prompt) send the same prompt to the same client at the same time, only the
+first one reaches the model. The rest wait for that generation and get the
+same result - or the same exception.
+
+Streams are shared too: the first consumer pulls chunks from the model and
+every consumer, including ones that join mid-stream, reads them from a
+shared buffer starting at the first chunk. Whichever consumer is furthest
+ahead does the pulling, so nobody waits on a slow or abandoned reader.
+
+Calls are only coalesced while in flight; a call that starts after the
+previous one finished generates again (see llm_cache for reuse over time).
+"""
+import threading
+from typing import Callable, Dict, Hashable, Iterator
+
+
+class _Flight:
+    """One in-flight call and its eventual outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SharedStream:
+    """A source iterator read once and replayed to every subscriber"""
+
+    def __init__(self, source: Iterator):
+        self.source = source
+        self.items = []
+        self.finished = False
+        self.error = None
+        self.pulling = False
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+    def subscribe(self) -> Iterator:
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.items) and not self.finished and self.pulling:
+                    self.cond.wait()
+                if i < len(self.items):
+                    item = self.items[i]
+                    i += 1
+                    pull = False
+                elif self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    self.pulling = True     # Nobody is reading from the model - our turn
+                    pull = True
+            if pull:
+                self._pull()
+            else:
+                yield item
+
+    def _pull(self):
+        try:
+            item = next(self.source)
+            with self.cond:
+                self.items.append(item)
+        except StopIteration:
+            with self.cond:
+                self.finished = True
+        except Exception as e:
+            with self.cond:
+                self.finished = True
+                self.error = e
+        finally:
+            with self.cond:
+                self.pulling = False
+                self.cond.notify_all()
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share it"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Flight] = {}
+        self._streams: Dict[Hashable, _SharedStream] = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'coalesced': 0, 'streams': 0, 'stream_subscribers': 0}
+
+    def do(self, key: Hashable, fn: Callable):
+        """fn() once for all concurrent callers with this key"""
+        with self._lock:
+            flight = self._calls.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._calls[key] = _Flight()
+                self.stats['calls'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    def stream(self, key: Hashable, fn: Callable[[], Iterator]) -> Iterator:
+        """Iterate fn()'s stream, shared with concurrent streams of the same key"""
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is None:
+                shared = self._streams[key] = _SharedStream(iter(fn()))
+                self.stats['streams'] += 1
+            else:
+                self.stats['stream_subscribers'] += 1
+            shared.subscribers += 1
+        try:
+            yield from shared.subscribe()
+        finally:
+            with self._lock:
+                shared.subscribers -= 1
+                # Done, or abandoned by everyone: the next call starts a fresh generation
+                if (shared.finished or not shared.subscribers) and self._streams.get(key) is shared:
+                    del self._streams[key]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'in_flight': len(self._calls) + len(self._streams)}
+
+
+class CoalescingLLM:
+    """
+    Wraps a LangChain chat model so identical concurrent invoke()/stream()
+    calls share one generation. Other attributes pass through to the model.
+    """
+
+    def __init__(self, llm, flights: SingleFlight = None):
+        self.llm = llm
+        self.flights = flights or SingleFlight()
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    @staticmethod
+    def _key(prompt, kwargs):
+        from agents.llm_cache import prompt_text
+        text = prompt_text(prompt)
+        return None if text is None or kwargs else text
+
+    def invoke(self, prompt, **kwargs):
+        key = self._key(prompt, kwargs)
+        if key is None:
+            return self.llm.invoke(prompt, **kwargs)
+        return self.flights.do(('invoke', key), lambda: self.llm.invoke(prompt))
+
+    def stream(self, prompt, **kwargs):
+        key = self._key(prompt, kwargs)
+        if key is None:
+            return self.llm.stream(prompt, **kwargs)
+        return self.flights.stream(('stream', key), lambda: self.llm.stream(prompt))
@@ -1,12 +1,28 @@
 """
 Smart Orchestrator - Routes tasks to best available agent (local or external)
+Execution modes (ORCHESTRATOR_MODE or process_task(mode=...)):
+- single: one agent
+- hedged: start a backup agent if the primary runs past its p90 latency
+- fanout: ask several agents at once and merge their answers
+Routing (ROUTING_POLICY): keyword rules, or adaptive - the fastest (or
+cheapest) agent within the task category's budget, from live stats.
 """
-from typing import Dict, Any, Optional
-from agents.researcher import ResearchAgent
-from agents.coder import CoderAgent
-from agents.executor import ExecutorAgent
-from agents.vision import VisionAgent
+import os
+import time
+from typing import Dict, Any, Optional, List, Tuple
+from agents.agent_registry import default_agents
 from agents.memory import MemorySystem
+from agents.execution_policy import ExecutionEngine, MODES, SINGLE, HEDGED, FANOUT, llm_merge
+from agents.agent_stats import StatsStore, STATS_FILE, call_usage
+from agents.routing_policy import CostAwareRouter, ROUTING_POLICY, ADAPTIVE
+
+# Preference order when picking backups / fan-out members
+EXTERNAL_PREFERENCE = ['claude', 'chatgpt', 'perplexity', 'gemini']
+FANOUT_MAX_AGENTS = int(os.getenv("FANOUT_MAX_AGENTS", "3"))
+
+REASONING_WORDS = ['analyze', 'explain', 'reas on', 'complex', 'detail']
+RESEARCH_WORDS = ['research', 'find', 'search', 'source', 'latest']
+CODE_WORDS = ['code', 'function', 'script', 'program', 'debug', 'fix']
 
 
 class SmartOrchestrator:
@@ -15,17 +31,19 @@ class SmartOrchestrator:
     Supports both local and external agents
     """
     
-    def __init__(self, llm):
+    def __init__(self, llm, mode: str = None, routing: str = None, stats_file: str = STATS_FILE):
         self.llm = llm
         self.memory = MemorySystem()
         
-        # Local agents (always available)
-        self.local_agents = {
-            'researcher': ResearchAgent(llm),
-            'coder': CoderAgent(llm),
-            'executor': ExecutorAgent(llm),
-            'vision': VisionAgent(llm),
-        }
+        # Thread pool + per-agent latency/cost stats (saved across restarts)
+        self.mode = mode or os.getenv("ORCHESTRATOR_MODE", SINGLE)
+        self.stats = StatsStore(stats_file)
+        self.engine = ExecutionEngine(stats=self.stats)
+        self.routing = routing or ROUTING_POLICY
+        self.router = CostAwareRouter(self.stats)
+        
+        # Local agents (always available, built on first use)
+        self.local_agents = default_agents(llm)
         
         # External agents (loaded from memory)
         self.external_agents = {}
@@ -77,18 +95,18 @@ class SmartOrchestrator:
         # Intelligent routing based on task characteristics
         
         # Complex reasoning → Claude (if available)
-        if any(word in task_lower for word in ['analyze', 'explain', 'reas on', 'complex', 'detail']):
+        if any(word in task_lower for word in REASONING_WORDS):
             if 'claude' in self.external_agents:
                 return ('claude', True)
         
         # Research with sources → Perplexity (if available)
-        if any(word in task_lower for word in ['research', 'find', 'search', 'source', 'latest']):
+        if any(word in task_lower for word in RESEARCH_WORDS):
             if 'perplexity' in self.external_agents:
                 return ('perplexity', True)
             return ('researcher', False)
         
         # Coding tasks → local (fast) or ChatGPT
-        if any(word in task_lower for word in ['code', 'function', 'script', 'program', 'debug', 'fix']):
+        if any(word in task_lower for word in CODE_WORDS):
             # Use local for privacy and speed
             return ('coder', False)
         
@@ -98,6 +116,69 @@ class SmartOrchestrator:
         
         return ('executor', False)
     
+    def local_agent_type(self, task: str) -> str:
+        """Best local agent for a task (used as the local backup for external picks)"""
+        task_lower = task.lower()
+        if any(word in task_lower for word in RESEARCH_WORDS):
+            return 'researcher'
+        if any(word in task_lower for word in CODE_WORDS):
+            return 'coder'
+        return 'executor'
+    
+    @staticmethod
+    def task_category(task: str) -> str:
+        """Category stats and budgets are kept per: reasoning / research / code / general"""
+        task_lower = task.lower()
+        for category, words in (('reasoning', REASONING_WORDS), ('research', RESEARCH_WORDS), ('code', CODE_WORDS)):
+            if any(word in task_lower for word in words):
+                return category
+        return 'general'
+    
+    def candidate_agents(self, task: str, agent_type: str, is_external: bool) -> List[Tuple[str, Any]]:
+        """
+        Primary agent first, then backups: the other external agents in
+        preference order, then the matching local agent.
+        """
+        candidates = []
+        primary = self.get_agent(agent_type, is_external)
+        if primary:
+            candidates.append((self._display_name(primary, agent_type), primary))
+        
+        externals = sorted(self.external_agents.items(),
+                           key=lambda item: (EXTERNAL_PREFERENCE.index(item[0])
+                                             if item[0] in EXTERNAL_PREFERENCE else len(EXTERNAL_PREFERENCE)))
+        for name, agent in externals:
+            if agent is not primary:
+                candidates.append((self._display_name(agent, name), agent))
+        
+        local_type = agent_type if not is_external else self.local_agent_type(task)
+        local = self.local_agents[local_type]
+        if local is not primary:
+            candidates.append((self._display_name(local, local_type), local))
+        
+        if not candidates:
+            candidates.append(('Executor', self.local_agents['executor']))
+        return candidates
+    
+    @staticmethod
+    def is_available(agent) -> bool:
+        """False while an external agent's circuit breaker is open"""
+        breaker = getattr(agent, 'breaker', None)
+        return breaker is None or not breaker.is_open()
+    
+    def _shed(self, task, agent_type, is_external, agent, agent_name):
+        """Swap a tripped agent for the next-best available candidate"""
+        if self.is_available(agent):
+            return agent_name, agent
+        for name, candidate in self.candidate_agents(task, agent_type, is_external):
+            if self.is_available(candidate):
+                print(f"⛔ {agent_name} circuit open - using {name}")
+                return name, candidate
+        return agent_name, agent
+    
+    def _display_name(self, agent, agent_type):
+        return agent.name if hasattr(agent, 'name') else agent_type.capitalize()
+    
     def get_agent(self, agent_type: str, is_external: bool):
         """Get the actual agent instance"""
         if is_external:
@@ -105,13 +186,17 @@ class SmartOrchestrator:
         else:
             return self.local_agents.get(agent_type)
     
-    def process_task(self, task: str, **kwargs) -> tuple[str, str]:
+    def process_task(self, task: str, mode: str = None, **kwargs) -> tuple[str, str]:
         """
-        Process task with best agent
+        Process task with best agent (or agents, in hedged / fanout mode)
         
         Returns:
             (result, agent_name)
         """
+        mode = mode or self.mode
+        if mode not in MODES:
+            mode = SINGLE
+        
         agent_type, is_external = self.analyze_task(task)
         agent = self.get_agent(agent_type, is_external)
         
@@ -121,15 +206,103 @@ class SmartOrchestrator:
             agent_type = 'executor'
             is_external = False
         
-        agent_name = agent.name if hasattr(agent, 'name') else agent_type.capitalize()
+        agent_name = self._display_name(agent, agent_type)
+        agent_name, agent = self._shed(task, agent_type, is_external, agent, agent_name)
+        category = self.task_category(task)
+        if self.routing == ADAPTIVE:
+            agent_name, agent = self._route_by_stats(task, category, agent_type, is_external, agent_name, agent)
+        is_external = any(agent is a for a in self.external_agents.values())
+        
+        if mode == SINGLE:
+            print(f"🎯 Using: {agent_name} ({'☁️ External' if is_external else '💻 Local'})")
+            result = self.engine.run_single(agent_name, agent, task, category=category, **kwargs)
+        else:
+            candidates = self.candidate_agents(task, agent_type, is_external)
+            candidates = [c for c in candidates if self.is_available(c[1])] or candidates
+            candidates.sort(key=lambda c: c[1] is not agent)    # Picked agent first
+            if mode == HEDGED:
+                print(f"🎯 Using: {agent_name}, hedging with "
+                      f"{', '.join(name for name, _ in candidates[1:]) or 'nothing'}")
+                result = self.engine.run_hedged(candidates, task, category=category, **kwargs)
+            else:
+                members = candidates[:FANOUT_MAX_AGENTS]
+                print(f"🎯 Fan-out to: {', '.join(name for name, _ in members)}")
+                merge = llm_merge(self.llm) if os.getenv("FANOUT_MERGE", "llm") == "llm" else None
+                result = self.engine.run_fanout(members, task, merge=merge, category=category, **kwargs)
+        
+        if result.error:
+            return (f"❌ Error with {result.name}: {result.error}", result.name)
+        if result.hedged:
+            print(f"⚡ Hedge won: {result.name} ({result.latency_s:.1f}s)")
+        return (result.text, result.name)
+    
+    def stream_execute(self, task: str, **kwargs):
+        """
+        Stream the picked agent's answer as text deltas (single mode), so the
+        orchestrator can be handed to StreamWorker like any agent
+        """
+        agent_type, is_external = self.analyze_task(task)
+        agent = self.get_agent(agent_type, is_external) or self.local_agents['executor']
+        agent_name = self._display_name(agent, agent_type)
+        agent_name, agent = self._shed(task, agent_type, is_external, agent, agent_name)
+        category = self.task_category(task)
+        if self.routing == ADAPTIVE:
+            agent_name, agent = self._route_by_stats(task, category, agent_type, is_external, agent_name, agent)
+        is_external = any(agent is a for a in self.external_agents.values())
+        print(f"🎯 Streaming from: {agent_name} ({'☁️ External' if is_external else '💻 Local'})")
         
-        print(f"🎯 Using: {agent_name} ({'☁️ External' if is_external else '💻 Local'})")
+        if not hasattr(agent, 'stream_execute'):
+            yield self.engine.run_single(agent_name, agent, task, category=category, **kwargs).text
+            return
         
-        try:
-            result = agent.execute(task, **kwargs)
-            return (result, agent_name)
-        except Exception as e:
-            return (f"❌ Error with {agent_name}: {str(e)}", agent_name)
+        start = time.monotonic()
+        ttft = None
+        deltas = []
+        for delta in agent.stream_execute(task, **kwargs):
+            if ttft is None:
+                ttft = time.monotonic() - start
+            deltas.append(delta)
+            yield delta
+        # Agents report errors as a "❌" delta, possibly after some text; the ones
+        # that stream set last_call_failed, others can only be judged by the tail
+        failed = getattr(agent, 'last_call_failed', None)
+        if failed is None:
+            failed = bool(deltas) and deltas[-1].lstrip().startswith("❌")
+        if not deltas or failed:
+            self.stats.record_failure(agent_name, category)
+        else:
+            tokens, cost = call_usage(agent, task, "".join(deltas))
+            self.stats.record(agent_name, time.monotonic() - start, ttft, tokens, cost, category)
+    
+    def _route_by_stats(self, task, category, agent_type, is_external, agent_name, agent):
+        """ROUTING_POLICY=adaptive: swap the keyword pick for the best agent by live stats"""
+        candidates = dict(c for c in self.candidate_agents(task, agent_type, is_external) if self.is_available(c[1]))
+        choice = self.router.choose(category, list(candidates), agent_name)
+        if choice in candidates and choice != agent_name:
+            print(f"📈 {choice} is {self.router.objective} for {category} tasks within "
+                  f"${self.router.budget(category):.3f} (instead of {agent_name})")
+            return choice, candidates[choice]
+        return agent_name, agent
+    
+    def latency_report(self) -> Dict[str, Dict]:
+        """Per-agent latency histogram summary (count, p50/p90/p99)"""
+        return self.engine.latency_report()
+    
+    def stats_report(self) -> Dict[str, Dict]:
+        """Per-agent EWMA latency / TTFT / tokens / cost, success rate and totals"""
+        return self.stats.report()
+    
+    def breaker_report(self) -> Dict[str, Dict]:
+        """Circuit breaker state per external agent (closed / open / half_open)"""
+        return {name: agent.breaker.snapshot() for name, agent in self.external_agents.items()}
+    
+    def rate_limit_report(self) -> Dict[str, Dict]:
+        """Client-side rate limiter state per external agent (capacity left, time spent waiting)"""
+        return {name: agent.rate_limiter.snapshot() for name, agent in self.external_agents.items()}
+    
+    def agent_init_report(self) -> Dict[str, Dict]:
+        """Which local agents have been built so far, and how long each took"""
+        return self.local_agents.init_report()
     
     def list_available_agents(self) -> Dict[str, str]:
         """List all available agents"""
@@ -137,10 +310,13 @@ class SmartOrchestrator:
         
         # Local agents
         for name in self.local_agents.keys():
-            agents[f"{name} (local)"] = "💻 Always available"
+            stats = self.stats.summary(name.capitalize())
+            agents[f"{name} (local)"] = "💻 Always available" + (f" · {stats}" if stats else "")
         
         # External agents
         for name, agent in self.external_agents.items():
-            agents[f"{name} (external)"] = f"☁️ {agent.name}"
+            status = "" if self.is_available(agent) else " (⛔ unavailable, circuit open)"
+            stats = self.stats.summary(agent.name)
+            agents[f"{name} (external)"] = f"☁️ {agent.name}{status}" + (f" · {stats}" if stats else "")
         
         return agents
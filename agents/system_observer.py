@@ -2,66 +2,85 @@
 System Observer Agent (Riley's Senses)
 Monitors hardware stats (CPU, RAM, Disk, Network) to give the Companion "physical awareness"
 """
-import psutil
 import datetime
 import platform
+from utils.telemetry import get_sampler
 
 class SystemObserver:
     """
     Provides real-time system health data.
     Acts as the 'nervous system' for the Companion.
+    Reads from the shared background TelemetrySampler, so no call here
+    ever blocks on psutil.
     """
     
-    def __init__(self):
+    def __init__(self, sampler=None):
         self.os_info = f"{platform.system()} {platform.release()}"
         self.processor = platform.processor()
+        self.sampler = sampler or get_sampler()
     
     def get_system_status(self):
-        """Get comprehensive system health snapshot"""
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        battery = psutil.sensors_battery()
+        """Get comprehensive system health snapshot (latest sample, no blocking)"""
+        sample = self.sampler.latest()
+        cpu_percent = round(sample['cpu'], 1)
+        memory_percent = round(sample['memory'], 1)
         
-        # Determine status level
+        # Determine status level (smoothed CPU so one spike doesn't flip it)
         status = "HEALTHY"
-        if cpu_percent > 85 or memory.percent > 90:
+        if sample['placeholder']:
+            status = "STARTING"   # No sample taken yet
+        elif sample['ewma']['cpu'] > 85 or memory_percent > 90:
             status = "STRESSED"
         
         # Battery context
         power_status = "Plugged In"
-        if battery:
-            power_status = f"{battery.percent}% ({'Plugged In' if battery.power_plugged else 'Battery'})"
+        if sample['battery_percent'] is not None:
+            power_status = f"{sample['battery_percent']}% ({'Plugged In' if sample['power_plugged'] else 'Battery'})"
         
         return {
             "status": status,
             "cpu": {
                 "usage": cpu_percent,
-                "count": psutil.cpu_count()
+                "count": sample['cpu_count']
             },
             "memory": {
-                "total_gb": round(memory.total / (1024**3), 1),
-                "used_percent": memory.percent,
-                "available_gb": round(memory.available / (1024**3), 1)
+                "total_gb": sample['memory_total_gb'],
+                "used_percent": memory_percent,
+                "available_gb": sample['memory_available_gb']
             },
             "disk": {
-                "total_gb": round(disk.total / (1024**3), 1),
-                "free_gb": round(disk.free / (1024**3), 1),
-                "percent": disk.percent
+                "total_gb": sample['disk_total_gb'],
+                "free_gb": sample['disk_free_gb'],
+                "percent": round(sample['disk'], 1)
             },
+            "network": {
+                "sent_kbps": round(sample['net_sent_kbps'], 1),
+                "recv_kbps": round(sample['net_recv_kbps'], 1)
+            },
+            "ollama_rss_mb": round(sample['ollama_rss_mb'], 1),
             "power": power_status,
             "os": self.os_info,
-            "timestamp": datetime.datetime.now().isoformat()
+            "timestamp": datetime.datetime.fromtimestamp(sample['timestamp']).isoformat()
+        }
+    
+    def get_load_summary(self, seconds=60):
+        """Windowed CPU/RAM aggregates (p50/p95/EWMA) from the ring buffer"""
+        return {
+            'cpu': self.sampler.aggregate('cpu', seconds),
+            'memory': self.sampler.aggregate('memory', seconds),
+            'ollama_rss_mb': self.sampler.aggregate('ollama_rss_mb', seconds),
         }
     
     def get_formatted_report(self):
         """Return a natural language report for the LLM"""
         stats = self.get_system_status()
+        load = self.get_load_summary()
         
         report = f"""SYSTEM SENSES REPORT:
-- Heartbeat (CPU): {stats['cpu']['usage']}% usage
+- Heartbeat (CPU): {stats['cpu']['usage']}% usage (1 min p50 {load['cpu']['p50']:.0f}%, p95 {load['cpu']['p95']:.0f}%)
 - Brain Space (RAM): {stats['memory']['used_percent']}% used ({stats['memory']['available_gb']}GB free)
 - Storage (Disk): {stats['disk']['percent']}% full ({stats['disk']['free_gb']}GB free)
+- Local Model (Ollama): {stats['ollama_rss_mb']:.0f}MB resident
 - Energy: {stats['power']}
 - Status: {stats['status']}"""
 
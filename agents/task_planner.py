@@ -0,0 +1,277 @@
+"""
+Task Planner - Splits compound requests into a DAG of sub-tasks
+"research X, then write code for Y and summarize" becomes:
+
+    s1 researcher  research X
+    s2 coder       write code for Y          (after s1 - "then")
+    s3 executor    summarize                 (after s1, s2)
+
+Requests are only split at clause boundaries: sequencing words ("then",
+"after that", ", finally"), semicolons, sentences, numbered steps, and an
+"and" that starts a new imperative ("... and write ..."). An "and" inside a
+noun phrase ("pros and cons of Rust and Go") or a relative clause ("reads a
+file and parses it") never splits.
+
+Clauses joined by "and" / ";" are independent and run concurrently;
+"then", "after that", numbered steps, "using ..." and back-references
+("it", "its", "the results" - not a relative "that") depend on the
+previous step; summarize/combine steps
+depend on all earlier steps. An LLM planner can be enabled for requests
+the rules can't split.
+"""
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, List, Optional
+
+from agents.task_router import TaskRouter
+
+# Imperatives that can start a new clause after "and"
+CLAUSE_VERBS = (
+    'research', 'search', 'find', 'look up', 'write', 'create', 'build', 'generate', 'implement',
+    'fix', 'debug', 'refactor', 'run', 'execute', 'explain', 'describe', 'summarize', 'summarise',
+    'compare', 'analyze', 'analyse', 'translate', 'plot', 'calculate', 'compute', 'convert',
+    'install', 'deploy', 'tell', 'give', 'send', 'save', 'read', 'optimize', 'rewrite', 'edit',
+    'scrape', 'fetch', 'download', 'upload', 'combine', 'merge', 'suggest', 'recommend',
+    'evaluate', 'add', 'remove', 'delete', 'make', 'show',
+)
+_VERB_ALTERNATION = '|'.join(re.escape(v) for v in sorted(CLAUSE_VERBS, key=len, reverse=True))
+
+# Clause boundaries; the named group that matched is the connector
+SPLIT_RE = re.compile(
+    r'\s*[,;.]?\s*\b(?P<seq>and then|after that|then)\s+'
+    r'|\s*[,;.]\s*(?P<marker>afterwards|next|finally|and also|also)\s+'
+    rf'|\s*,?\s+(?P<conj>and(?: also)?)\s+(?=(?:{_VERB_ALTERNATION})\b)'
+    r'|\s*;\s*'
+    r'|\s*[.!?]\s+(?=(?-i:[A-Z]))'
+    r'|(?:^|\s+)(?P<step>\d{1,2})[.)]\s+',
+    re.IGNORECASE
+)
+STEP = 'step'   # Connector recorded for numbered steps
+SEQUENTIAL_CONNECTORS = {'then', 'and then', 'after that', 'afterwards', 'next', 'finally', STEP}
+BACK_REFERENCE_RE = re.compile(
+    r'\b(?:it|its|them|their|those|this|these|the (?:results?|findings|output|answer|code|script|above))\b'
+    r'|\b(?:using|based on|from (?:the|that))\b',
+    re.IGNORECASE
+)
+AGGREGATE_RE = re.compile(r'^\s*(?:summari[sz]e|combine|merge|compare|wrap up|write (?:a|the) (?:summary|report))\b',
+                          re.IGNORECASE)
+VISION_RE = re.compile(r'\b(?:image|picture|photo|screenshot)s?\b', re.IGNORECASE)
+MIN_CLAUSE_WORDS = 2
+MAX_SUBTASKS = 8
+CONTEXT_CHARS_PER_DEP = 4000    # Dependency output passed to a dependent step
+
+
+class SubTask:
+    """One node of the plan"""
+
+    def __init__(self, node_id: str, agent: str, task: str, depends_on: List[str] = None):
+        self.id = node_id
+        self.agent = agent
+        self.task = task
+        self.depends_on = list(depends_on or [])
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def duration_s(self):
+        if not self.started_at or not self.finished_at:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self):
+        return {'id': self.id, 'agent': self.agent, 'task': self.task, 'depends_on': self.depends_on}
+
+    def __repr__(self):
+        deps = f" after {','.join(self.depends_on)}" if self.depends_on else ""
+        return f"{self.id} [{self.agent}] {self.task}{deps}"
+
+
+class TaskPlanner:
+    """Builds a SubTask DAG from a request (rules first, optional LLM planner)"""
+
+    def __init__(self, router: TaskRouter = None, llm=None, use_llm: bool = False):
+        self.router = router or TaskRouter()
+        self.llm = llm
+        self.use_llm = use_llm
+
+    def plan(self, task: str) -> List[SubTask]:
+        nodes = self._rule_plan(task)
+        if len(nodes) == 1 and self.use_llm and self.llm:
+            nodes = self._llm_plan(task) or nodes
+        return nodes
+
+    def _agent_for(self, clause: str) -> str:
+        if VISION_RE.search(clause):
+            return 'vision'
+        return self.router.route(clause).agent
+
+    def _split(self, task: str):
+        """[(connector, clause)] with connector None for the first clause"""
+        clauses = []
+        connector = None
+        pos = 0
+        for match in SPLIT_RE.finditer(task):
+            if match.group('conj'):
+                previous = task[pos:match.start()].split()
+                if previous and previous[-1].lower() in CLAUSE_VERBS:
+                    continue  # Coordinated verbs ("read and write files"), one clause
+            clauses.append((connector, task[pos:match.start()]))
+            if match.group('step'):
+                connector = STEP
+            else:
+                connector = (match.group('seq') or match.group('marker') or match.group('conj') or '').lower() or None
+            pos = match.end()
+        clauses.append((connector, task[pos:]))
+
+        # Re-attach fragments too short to be a task ("A and B" inside a clause)
+        merged = []
+        for connector, clause in clauses:
+            clause = clause.strip(" ,;.")
+            if not clause:
+                continue
+            if merged and len(clause.split()) < MIN_CLAUSE_WORDS and not AGGREGATE_RE.match(clause):
+                prev_connector, prev = merged[-1]
+                merged[-1] = (prev_connector, f"{prev} {connector or ''} {clause}".replace("  ", " "))
+            else:
+                merged.append((connector, clause))
+        return merged[:MAX_SUBTASKS]
+
+    def _rule_plan(self, task: str) -> List[SubTask]:
+        clauses = self._split(task)
+        if len(clauses) <= 1:
+            return [SubTask("s1", self._agent_for(task), task.strip())]
+
+        nodes = []
+        for i, (connector, clause) in enumerate(clauses):
+            node_id = f"s{i + 1}"
+            if i == 0:
+                deps = []
+            elif AGGREGATE_RE.match(clause):
+                deps = [n.id for n in nodes]
+            elif connector in SEQUENTIAL_CONNECTORS or BACK_REFERENCE_RE.search(clause):
+                deps = [nodes[-1].id]
+            else:
+                deps = []
+            nodes.append(SubTask(node_id, self._agent_for(clause), clause, deps))
+        return nodes
+
+    def _llm_plan(self, task: str) -> Optional[List[SubTask]]:
+        prompt = f"""Split this request into at most {MAX_SUBTASKS} sub-tasks for these agents:
+- researcher: web research and information gathering
+- coder: writing or fixing code
+- executor: reasoning, planning, writing, summarizing
+- vision: image analysis
+
+Return ONLY a JSON list like:
+[{{"id": "s1", "agent": "researcher", "task": "...", "depends_on": []}},
+ {{"id": "s2", "agent": "executor", "task": "...", "depends_on": ["s1"]}}]
+Only add a dependency when a step needs another step's output.
+
+Request: {task}"""
+        try:
+            text = self.llm.invoke(prompt).content
+            data = json.loads(text[text.index('['):text.rindex(']') + 1])
+            nodes = [SubTask(str(d['id']), d['agent'], d['task'], [str(x) for x in d.get('depends_on', [])])
+                     for d in data[:MAX_SUBTASKS]]
+            validate_dag(nodes)
+            for node in nodes:
+                if node.agent not in ('researcher', 'coder', 'executor', 'vision'):
+                    node.agent = 'executor'
+            return nodes
+        except Exception as e:
+            print(f"⚠️  LLM planner failed, using rule plan: {e}")
+            return None
+
+
+def validate_dag(nodes: List[SubTask]):
+    """Raise ValueError on unknown dependencies or cycles"""
+    ids = {n.id for n in nodes}
+    for node in nodes:
+        missing = set(node.depends_on) - ids
+        if missing:
+            raise ValueError(f"{node.id} depends on unknown step(s) {sorted(missing)}")
+    remaining = {n.id: set(n.depends_on) for n in nodes}
+    while remaining:
+        ready = [i for i, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle between steps {sorted(remaining)}")
+        for node_id in ready:
+            del remaining[node_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+class DagExecutor:
+    """
+    Runs a plan on a worker pool: a node starts as soon as all of its
+    dependencies have finished, so independent nodes run concurrently.
+    """
+
+    def __init__(self, agents: Dict[str, object], max_workers: int = 4):
+        self.agents = agents
+        self.max_workers = max(1, max_workers)
+
+    def _build_input(self, node: SubTask, by_id: Dict[str, SubTask]) -> str:
+        if not node.depends_on:
+            return node.task
+        context = "\n\n".join(
+            f"[{dep} - {by_id[dep].agent}] {by_id[dep].task}\n{(by_id[dep].result or by_id[dep].error or '')[:CONTEXT_CHARS_PER_DEP]}"
+            for dep in node.depends_on
+        )
+        return f"Results from earlier steps:\n{context}\n\nYour step: {node.task}"
+
+    def _run_node(self, node: SubTask, by_id: Dict[str, SubTask]) -> SubTask:
+        node.started_at = time.monotonic()
+        agent = self.agents.get(node.agent) or self.agents.get('executor')
+        try:
+            node.result = agent.execute(self._build_input(node, by_id))
+        except Exception as e:
+            node.error = str(e)
+        node.finished_at = time.monotonic()
+        return node
+
+    def run_iter(self, nodes: List[SubTask]) -> Iterator[SubTask]:
+        """Execute the DAG, yielding each node as it finishes"""
+        validate_dag(nodes)
+        by_id = {n.id: n for n in nodes}
+        pending = {n.id: set(n.depends_on) for n in nodes}
+        finished = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag") as pool:
+            running = {}
+
+            def launch_ready():
+                for node_id in [i for i, deps in pending.items() if deps <= finished]:
+                    del pending[node_id]
+                    running[pool.submit(self._run_node, by_id[node_id], by_id)] = node_id
+
+            launch_ready()
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished.add(running.pop(future))
+                    yield future.result()
+                launch_ready()
+
+    def run(self, nodes: List[SubTask], on_node: Callable[[SubTask], None] = None) -> str:
+        for node in self.run_iter(nodes):
+            if on_node:
+                on_node(node)
+        return merge_results(nodes)
+
+
+def merge_results(nodes: List[SubTask]) -> str:
+    """A final aggregate step already merged everything; otherwise list each step"""
+    last = nodes[-1]
+    if len(nodes) > 1 and set(last.depends_on) == {n.id for n in nodes[:-1]} and last.result:
+        return last.result
+    if len(nodes) == 1:
+        return nodes[0].result or f"❌ {nodes[0].error}"
+    return "\n\n".join(
+        f"### {n.id} · {n.agent.capitalize()}: {n.task}\n{n.result if n.result is not None else '❌ ' + str(n.error)}"
+        for n in nodes
+    )
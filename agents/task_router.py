@@ -0,0 +1,350 @@
+"""
+Task Router - Picks the sub-agent for a task without an LLM round-trip
+Three tiers, cheapest first:
+1. Compiled keyword/regex rules (microseconds)
+2. Nearest-centroid classifier over hashed n-gram embeddings, trained from
+   labeled examples (well under a millisecond, no network)
+3. The LLM, only when both tiers above are unsure
+Decisions are cached by normalized task; every decision records its tier
+and latency, and LLM decisions are learned back into the centroids.
+"""
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+AGENTS = ('researcher', 'coder', 'executor')
+DEFAULT_AGENT = 'executor'
+
+EMBED_DIM = 1024
+CENTROID_MIN_SIMILARITY = 0.12   # Best centroid must be at least this close
+CENTROID_MIN_MARGIN = 0.04       # ...and this much closer than the runner-up
+CACHE_SIZE = 1024
+
+KEYWORD_RULES = {
+    'coder': [
+        r'\b(?:write|create|implement|generate)\b.{0,40}\b(?:function|script|class|program|code|module|api|regex|query|test)s?\b',
+        r'\b(?:debug|refactor|compile|traceback|stack ?trace|exception|segfault|syntax error)\b',
+        r'\bfix\b.{0,30}\b(?:bug|error|code|test|crash)\b',
+        r'\b(?:python|javascript|typescript|java|rust|golang|c\+\+|bash|sql|html|css|react|django|flask)\b',
+        r'```|\bdef \w+\(|\bimport \w+',
+    ],
+    'researcher': [
+        r'\b(?:research|look up|search (?:for|the web)|find (?:out|information|sources))\b',
+        r'\b(?:latest|current|recent|today\'?s?|this (?:week|month|year))\b.{0,40}\b(?:news|version|release|price|developments?|updates?)\b',
+        r'\bwho (?:is|was|founded|invented)\b',
+        r'\b(?:sources?|citations?|references?)\b',
+        r'\bcompare\b.{0,40}\b(?:frameworks?|libraries|tools|products|services|providers)\b',
+    ],
+    'executor': [
+        r'\b(?:plan|brainstorm|outline|draft|summari[sz]e|rewrite|proofread|translate)\b',
+        r'\b(?:pros and cons|trade-?offs?|should i|help me decide|advice)\b',
+        r'\bexplain\b(?!.{0,40}\b(?:code|function|error|traceback)\b)',
+    ],
+}
+
+# Seed examples for the centroid tier (more are learned from LLM decisions)
+LABELED_EXAMPLES = {
+    'coder': [
+        "Write a Python function to reverse a linked list",
+        "Create a bash script that backs up my home folder",
+        "Fix the bug in this sorting code",
+        "Why does my code throw a KeyError",
+        "Implement binary search in JavaScript",
+        "Generate unit tests for the user service",
+        "Refactor this class to use dependency injection",
+        "Write a SQL query to find duplicate emails",
+        "Build a REST API endpoint for uploading files",
+        "Convert this loop to a list comprehension",
+        "How do I parse JSON in Rust",
+        "Add type hints to this module",
+        "Make a regex that matches phone numbers",
+        "My React component re-renders too often, how do I fix it",
+    ],
+    'researcher': [
+        "Research the top 3 Python web frameworks",
+        "Find the latest news on quantum computing",
+        "What is the current price of bitcoin",
+        "Look up who founded Anthropic",
+        "Search for recent papers on retrieval augmented generation",
+        "What are the newest features in macOS",
+        "Find sources about the history of the internet",
+        "Compare cloud providers pricing for GPUs",
+        "What happened in tech news this week",
+        "Gather information about electric car battery technology",
+        "Who won the last world cup",
+        "What is the release date of the next iPhone",
+    ],
+    'executor': [
+        "Tell me about quantum computing",
+        "Summarize this paragraph in two sentences",
+        "Help me plan a weekly workout schedule",
+        "Explain the difference between stocks and bonds",
+        "Draft an email asking for a deadline extension",
+        "What are the pros and cons of remote work",
+        "Brainstorm names for a coffee shop",
+        "Translate this sentence into Spanish",
+        "Give me advice on preparing for an interview",
+        "Outline a presentation about climate change",
+        "Rewrite this paragraph to sound more formal",
+        "Should I learn guitar or piano first",
+    ],
+}
+
+_WORD_RE = re.compile(r"[a-z0-9+#']+")
+
+
+def normalize_task(task: str) -> str:
+    """Cache key: lowercase, punctuation-insensitive, collapsed whitespace"""
+    return " ".join(_WORD_RE.findall(task.lower()))
+
+
+def hashed_embedding(text: str, dim: int = EMBED_DIM) -> np.ndarray:
+    """
+    L2-normalized hashed bag of word unigrams, word bigrams and character
+    trigrams. Cheap, deterministic and dependency-free.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = _WORD_RE.findall(text.lower())
+    features = list(words)
+    features += [f"{a}_{b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    for feature in features:
+        h = zlib.crc32(feature.encode())
+        vector[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RouteDecision:
+    """Which agent handles a task, and how the router got there"""
+
+    def __init__(self, agent: str, tier: str, confidence: float, latency_ms: float, cached: bool = False):
+        self.agent = agent
+        self.tier = tier              # 'keyword' | 'centroid' | 'llm' | 'default' ('plugin' from Orchestrator)
+        self.confidence = confidence
+        self.latency_ms = latency_ms
+        self.cached = cached
+
+    def to_dict(self):
+        return {
+            'agent': self.agent,
+            'tier': self.tier,
+            'confidence': round(self.confidence, 3),
+            'latency_ms': round(self.latency_ms, 3),
+            'cached': self.cached,
+        }
+
+
+class TaskRouter:
+    """
+    Tiered task router.
+
+    llm_fallback(task) -> agent name is only called for low-confidence tasks;
+    only answers naming a known agent are learned and cached (an unusable
+    answer or a failed call routes to the best guess for this call only).
+    embed_fn can swap in a real embedding model (must return a unit vector).
+    """
+
+    def __init__(self, llm_fallback: Optional[Callable[[str], Optional[str]]] = None,
+                 examples: Optional[Dict[str, List[str]]] = None,
+                 embed_fn: Callable[[str], np.ndarray] = hashed_embedding,
+                 cache_size: int = CACHE_SIZE):
+        self.llm_fallback = llm_fallback
+        self.embed_fn = embed_fn
+        self.cache_size = cache_size
+
+        self._rules = {agent: [re.compile(p, re.IGNORECASE) for p in patterns]
+                       for agent, patterns in KEYWORD_RULES.items()}
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()   # normalized task -> agent
+        self._sums = {}               # agent -> sum of example embeddings
+        self._counts = {}
+        self._centroids = {}
+
+        for agent, texts in (examples or LABELED_EXAMPLES).items():
+            for text in texts:
+                self._add_example(agent, text)
+        self._rebuild_centroids()
+
+        self.stats = {
+            'routed': 0,
+            'cache_hits': 0,
+            'by_tier': {tier: {'count': 0, 'total_ms': 0.0} for tier in ('keyword', 'centroid', 'llm', 'default')},
+            'llm_agreement': {'checked': 0, 'agreed': 0},  # Centroid guess vs LLM answer
+            'feedback': {'correct': 0, 'total': 0},
+        }
+
+    # === TRAINING ===
+
+    def _add_example(self, agent, text):
+        vector = self.embed_fn(text)
+        if agent not in self._sums:
+            self._sums[agent] = np.zeros_like(vector)
+            self._counts[agent] = 0
+        self._sums[agent] += vector
+        self._counts[agent] += 1
+
+    def _rebuild_centroids(self):
+        centroids = {}
+        for agent, total in self._sums.items():
+            norm = np.linalg.norm(total)
+            centroids[agent] = total / norm if norm else total
+        self._centroids = centroids
+
+    def learn(self, task: str, agent: str):
+        """Add a labeled task (e.g. an LLM decision or a user correction)"""
+        with self._lock:
+            self._add_example(agent, task)
+            self._rebuild_centroids()
+            self._cache_put(normalize_task(task), agent)
+
+    # === TIERS ===
+
+    def keyword_tier(self, task: str) -> Tuple[Optional[str], float]:
+        """Agent whose rules match most, if it clearly beats the others"""
+        scores = {agent: sum(1 for rule in rules if rule.search(task))
+                  for agent, rules in self._rules.items()}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, top), (_, second) = ranked[0], ranked[1]
+        if top == 0 or top == second:
+            return None, 0.0
+        return best, (top - second) / top
+
+    def centroid_tier(self, task: str) -> Tuple[Optional[str], float, str]:
+        """(agent or None if unsure, margin, best guess)"""
+        vector = self.embed_fn(task)
+        ranked = sorted(((float(vector @ c), agent) for agent, c in self._centroids.items()), reverse=True)
+        if not ranked:
+            return None, 0.0, DEFAULT_AGENT
+        best_sim, best = ranked[0]
+        margin = best_sim - (ranked[1][0] if len(ranked) > 1 else 0.0)
+        if best_sim >= CENTROID_MIN_SIMILARITY and margin >= CENTROID_MIN_MARGIN:
+            return best, margin, best
+        return None, margin, best
+
+    # === ROUTING ===
+
+    def route(self, task: str) -> RouteDecision:
+        start = time.perf_counter()
+        key = normalize_task(task)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached:
+                self._cache.move_to_end(key)
+                self.stats['routed'] += 1
+                self.stats['cache_hits'] += 1
+                return RouteDecision(cached, 'cache', 1.0, (time.perf_counter() - start) * 1000, cached=True)
+
+        agent, confidence = self.keyword_tier(task)
+        tier = 'keyword'
+        if not agent:
+            agent, confidence, guess = self.centroid_tier(task)
+            tier = 'centroid'
+            if not agent:
+                agent, tier = self._ask_llm(task, guess)
+                confidence = 0.0
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.stats['routed'] += 1
+            self.stats['by_tier'][tier]['count'] += 1
+            self.stats['by_tier'][tier]['total_ms'] += latency_ms
+            if tier != 'default':       # Fallbacks are retried next time
+                self._cache_put(key, agent)
+        return RouteDecision(agent, tier, confidence, latency_ms)
+
+    def _ask_llm(self, task, guess):
+        if not self.llm_fallback:
+            return guess, 'centroid'
+        try:
+            agent = self.llm_fallback(task)
+        except Exception as e:
+            print(f"⚠️  Router LLM fallback failed: {e}")
+            return guess, 'default'
+        if agent not in AGENTS:
+            print(f"⚠️  Router LLM fallback named no agent: {agent!r}")
+            return guess, 'default'
+
+        with self._lock:
+            self.stats['llm_agreement']['checked'] += 1
+            self.stats['llm_agreement']['agreed'] += int(agent == guess)
+        self.learn(task, agent)
+        return agent, 'llm'
+
+    def _cache_put(self, key, agent):
+        self._cache[key] = agent
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # === ACCURACY ===
+
+    def record_feedback(self, task: str, correct_agent: str):
+        """Record whether the routed agent was the right one, and learn the correction"""
+        key = normalize_task(task)
+        with self._lock:
+            routed = self._cache.get(key)
+            self.stats['feedback']['total'] += 1
+            self.stats['feedback']['correct'] += int(routed == correct_agent)
+        if routed != correct_agent:
+            self.learn(task, correct_agent)
+
+    def evaluate(self, labeled: List[Tuple[str, str]]) -> Dict:
+        """Accuracy and latency of the local tiers on (task, agent) pairs (no LLM, no cache)"""
+        correct = 0
+        latencies = []
+        by_tier = {}
+        for task, expected in labeled:
+            start = time.perf_counter()
+            agent, _ = self.keyword_tier(task)
+            tier = 'keyword'
+            if not agent:
+                agent, _, guess = self.centroid_tier(task)
+                tier = 'centroid' if agent else 'unsure'
+                agent = agent or guess
+            latencies.append((time.perf_counter() - start) * 1000)
+            hit = agent == expected
+            correct += hit
+            tier_stats = by_tier.setdefault(tier, {'count': 0, 'correct': 0})
+            tier_stats['count'] += 1
+            tier_stats['correct'] += hit
+
+        total = len(labeled) or 1
+        return {
+            'accuracy': correct / total,
+            'mean_latency_ms': float(np.mean(latencies)) if latencies else 0.0,
+            'p95_latency_ms': float(np.percentile(latencies, 95)) if latencies else 0.0,
+            'by_tier': by_tier,
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            by_tier = {
+                tier: {
+                    'count': s['count'],
+                    'mean_ms': round(s['total_ms'] / s['count'], 3) if s['count'] else 0.0,
+                }
+                for tier, s in self.stats['by_tier'].items()
+            }
+            routed = self.stats['routed']
+            agreement = self.stats['llm_agreement']
+            feedback = self.stats['feedback']
+            return {
+                'routed': routed,
+                'cache_hit_rate': round(self.stats['cache_hits'] / routed, 3) if routed else 0.0,
+                'llm_rate': round(by_tier['llm']['count'] / routed, 3) if routed else 0.0,
+                'by_tier': by_tier,
+                'centroid_vs_llm_agreement': (round(agreement['agreed'] / agreement['checked'], 3)
+                                              if agreement['checked'] else None),
+                'feedback_accuracy': (round(feedback['correct'] / feedback['total'], 3)
+                                      if feedback['total'] else None),
+            }
@@ -4,6 +4,12 @@ AI Command Center - The Riley Interface
 """
 import sys
 import os
+import threading
+
+# --profile-startup: time every import from here on
+from utils.startup_profiler import StartupProfiler
+startup_profiler = StartupProfiler(enabled="--profile-startup" in sys.argv).install()
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -18,16 +24,9 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                               QSystemTrayIcon, QMenu, QFileDialog)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QUrl
 from PyQt6.QtGui import QIcon, QFont, QTextCursor, QPalette, QColor, QPixmap, QPainter, QTextOption, QDesktopServices, QAction, QCursor
-from langchain_ollama import ChatOllama
-from mcp.core import MCP
-from agents.researcher import ResearchAgent
-from agents.coder import CoderAgent
-from agents.executor import ExecutorAgent
-from agents.vision import VisionAgent
-from agents.gemini_architect import GeminiArchitectAgent
-from agents.companion import CompanionAgent
 from agents.memory import MemorySystem
 from ui.chat_thread import ChatThread
+# LangChain, MCP and the agents are imported by BackendWarmup after first paint
 
 load_dotenv()
 
@@ -82,54 +81,163 @@ class BrowserWorker(QThread):
             self.error.emit(f"Browser mission failed: {str(e)}")
 
 
+class BackendWarmup(QThread):
+    """
+    Imports and builds the LLM backends (LangChain, MCP, agents) off the GUI
+    thread, so the window paints before the heavy imports run.
+    """
+    ready = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, memory, profiler):
+        super().__init__()
+        self.memory = memory
+        self.profiler = profiler
+        self.backends = None
+        self.error = None
+    
+    def run(self):
+        threading.current_thread().name = "BackendWarmup"
+        try:
+            self.backends = build_backends(self.memory, self.profiler)
+            self.ready.emit(self.backends)
+        except Exception as e:
+            self.error = str(e)
+            self.failed.emit(self.error)
+
+
+def build_backends(memory, profiler):
+    """Create the local LLM, MCP with its agents, the Architect and Riley"""
+    with profiler.phase("import mcp + agents"):
+        from mcp.core import MCP
+        from agents.agent_registry import shared_llm, default_agents
+        from agents.gemini_architect import GeminiArchitectAgent
+        from agents.companion import CompanionAgent
+    
+    with profiler.phase("local LLM + MCP (agents built on first use)"):
+        llm = shared_llm()
+        mcp = MCP(llm)
+        default_agents(llm, registry=mcp.agents)
+    
+    with profiler.phase("architect"):
+        architect = GeminiArchitectAgent()
+    
+    with profiler.phase("companion"):
+        companion = CompanionAgent(mcp, architect, memory)
+    
+    return {'llm': llm, 'mcp': mcp, 'architect': architect, 'companion': companion}
+
+
 class CommandCenter(QMainWindow):
     """STABLE Foundation - Pure B&W"""
     
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
-        
-        # MCP
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.7,
-        )
-        
-        self.mcp = MCP(self.llm)
-        self.mcp.register_agent('researcher', ResearchAgent(self.llm))
-        self.mcp.register_agent('coder', CoderAgent(self.llm))
-        self.mcp.register_agent('executor', ExecutorAgent(self.llm))
-        self.mcp.register_agent('vision', VisionAgent(self.llm))
+        self.profiler = profiler or StartupProfiler()
+        
+        # LLM backends (MCP, Architect, Companion) are built by BackendWarmup
+        # after the first paint; actions that need them earlier are queued
+        # with when_backends_ready() and run once warm-up finishes
+        self.llm = None
+        self.mcp = None
+        self.architect = None
+        self.companion = None
+        self.backend_warmup = None
+        self.backend_waiters = []  # (on_ready, on_failed) callbacks
         
         # Initialize memory system
-        self.memory = MemorySystem()
-        
-        # Initialize Architect
-        self.architect = GeminiArchitectAgent()
-        
-        # Initialize Companion (personality layer)
-        self.companion = CompanionAgent(self.mcp, self.architect, self.memory)
+        with self.profiler.phase("memory"):
+            self.memory = MemorySystem()
         
         # Initialize Conversation Database
-        from agents.conversation_db import ConversationDB
-        self.conversation_db = ConversationDB()
-        self.current_conversation_id = self.conversation_db.create_conversation()
+        with self.profiler.phase("conversation db"):
+            from agents.conversation_db import ConversationDB
+            self.conversation_db = ConversationDB()
+            self.current_conversation_id = self.conversation_db.create_conversation()
         
         self.agent_thread = None
-        self.current_agent = self.companion.name
+        self.typing_animator = None
+        
+        # Shared executor for gem dispatch (Coder/Researcher/Executor)
+        from ui.task_pool import AgentTaskPool
+        self.task_pool = AgentTaskPool(
+            max_threads=4,
+            gem_limits={'coder': 1, 'researcher': 2, 'executor': 1}
+        )
+        self.pending_tasks = {}  # task id -> (signals, animator), kept alive until done
+        self.current_agent = "Riley"
         self.architect_mode = False
         self.browser_mode_enabled = False  # Browser Mode toggle
         self.first_launch = not self.memory.get("companion_name")
         self.current_gem = "Riley"  # Track active gem
         
-        self.setup_ui()
+        with self.profiler.phase("setup_ui"):
+            self.setup_ui()
         
-        # Give Riley access to terminal widget (so she can execute commands)
-        self.companion.terminal_widget = self.terminal_widget
+        # Build backends once the event loop is running (after first paint)
+        QTimer.singleShot(0, self.start_backend_warmup)
         
         # NON-BLOCKING health check after UI loads
         QTimer.singleShot(1000, self.start_health_check)
     
+    # === BACKEND WARM-UP ===
+    
+    def start_backend_warmup(self):
+        """Import and build the LLM backends on a background thread (again, after a failure)"""
+        if self.companion:
+            return
+        if self.backend_warmup:
+            if self.backend_warmup.error is None:
+                return  # Still running
+            self.backend_warmup.wait()  # Failed: already past its last emit
+        self.backend_warmup = BackendWarmup(self.memory, self.profiler)
+        self.backend_warmup.ready.connect(self.on_backends_ready)
+        self.backend_warmup.failed.connect(self.on_backends_failed)
+        self.backend_warmup.start()
+    
+    def when_backends_ready(self, on_ready, on_failed=None):
+        """
+        Run on_ready once the backends exist - now, or when warm-up finishes.
+        Never blocks the GUI thread; a failed warm-up is retried on the next call.
+        """
+        if self.companion:
+            on_ready()
+            return
+        if not self.backend_waiters:
+            self.add_message("System", "⏳ Agents are still loading - this will continue when they're ready")
+        self.backend_waiters.append((on_ready, on_failed))
+        self.start_backend_warmup()
+    
+    def on_backends_ready(self, backends):
+        if self.companion:
+            return
+        self.llm = backends['llm']
+        self.mcp = backends['mcp']
+        self.architect = backends['architect']
+        self.companion = backends['companion']
+        
+        # Give Riley access to terminal widget (so she can execute commands)
+        self.companion.terminal_widget = self.terminal_widget
+        
+        # Build the gem agents before their first use (held back while the Mac is stressed)
+        from agents.model_scheduler import run_background
+        run_background(self.mcp.agents.warm, 'coder', 'researcher', 'executor')
+        
+        self.profiler.mark("backends ready")
+        if self.profiler.enabled:
+            self.profiler.dump("startup_profile.txt")
+        
+        waiters, self.backend_waiters = self.backend_waiters, []
+        for on_ready, _ in waiters:
+            on_ready()
+    
+    def on_backends_failed(self, error):
+        self.add_message("System", f"❌ Failed to load agents: {error}")
+        waiters, self.backend_waiters = self.backend_waiters, []
+        for _, on_failed in waiters:
+            if on_failed:
+                on_failed()
+    
     # === GEMINI SIDEBAR METHODS ===
     
     def new_chat(self):
@@ -236,12 +344,9 @@ class CommandCenter(QMainWindow):
     def load_conversation(self, conversation_id):
         """Load a past conversation into the chat display"""
         self.current_conversation_id = conversation_id
-        self.chat_display.clear()
         
-        messages = self.conversation_db.get_conversation_messages(conversation_id)
-        for msg in messages:
-            is_user = msg['role'] == 'user'
-            self.chat_display.add_message(msg['content'], is_user=is_user)
+        # Only the newest page is laid out; older messages page in on scroll-up
+        self.chat_display.load_conversation(self.conversation_db, conversation_id)
         
         # Visually select it in the sidebar
         if hasattr(self, 'history_sidebar'):
@@ -684,6 +789,12 @@ class CommandCenter(QMainWindow):
         user_input = self.input_field.text().strip()
         if not user_input:
             return
+        if not self.companion:
+            # Keep the text in the (disabled) field and send it once the agents load
+            self.input_field.setEnabled(False)
+            self.when_backends_ready(self._send_pending_message,
+                                     on_failed=lambda: self.input_field.setEnabled(True))
+            return
         
         # Display user message
         self.chat_display.add_message(user_input, is_user=True)
@@ -754,6 +865,10 @@ class CommandCenter(QMainWindow):
             # Fallback to Riley
             self._send_to_riley(user_input)
     
+    def _send_pending_message(self):
+        self.input_field.setEnabled(True)
+        self.send_message()
+    
     def _send_to_riley(self, message):
         """Send message to Riley (Companion) - she orchestrates"""
         self.current_ai_bubble = self.chat_display.add_message("...", is_user=False)
@@ -765,7 +880,7 @@ class CommandCenter(QMainWindow):
             conversation_db=self.conversation_db,
             conversation_id=self.current_conversation_id
         )
-        self.stream_worker.token_received.connect(self.update_streaming_response)
+        self._attach_typing_animator(self.stream_worker)
         self.stream_worker.finished.connect(self.finish_response)
         self.stream_worker.start()
     
@@ -776,63 +891,86 @@ class CommandCenter(QMainWindow):
         # Use architect agent directly
         from ui.stream_worker import StreamWorker
         self.stream_worker = StreamWorker(self.architect, message)
-        self.stream_worker.token_received.connect(self.update_streaming_response)
+        self._attach_typing_animator(self.stream_worker)
         self.stream_worker.finished.connect(self.finish_response)
         self.stream_worker.start()
     
+    def _attach_typing_animator(self, stream_worker):
+        """Coalesce streamed tokens into at most one repaint per display frame"""
+        from ui.typing_animator import TypingWorker
+        self.typing_animator = TypingWorker(instant_mode=True)
+        self.typing_animator.char_typed.connect(self.update_streaming_response)
+        stream_worker.token_received.connect(self.typing_animator.update_buffer)
+    
     def _send_to_coder(self, message):
         """Send message directly to Coder agent"""
-        self.current_ai_bubble = self.chat_display.add_message("Coding...", is_user=False)
-        
-        try:
-            # Get coder agent from MCP
-            coder = self.mcp.agents.get('coder')
-            if coder:
-                response = coder.execute(message)
-                self.current_ai_bubble.update_typed_text(response)
-                self.finish_response()
-            else:
-                self.current_ai_bubble.update_typed_text("❌ Coder agent not available")
-                self.finish_response()
-        except Exception as e:
-            self.current_ai_bubble.update_typed_text(f"❌ Error: {str(e)}")
-            self.finish_response()
+        self._dispatch_to_gem('coder', "Coder", "Coding...", message)
     
     def _send_to_researcher(self, message):
         """Send message directly to Researcher agent"""
-        self.current_ai_bubble = self.chat_display.add_message("Researching...", is_user=False)
-        
-        try:
-            researcher = self.mcp.agents.get('researcher')
-            if researcher:
-                response = researcher.execute(message)
-                self.current_ai_bubble.update_typed_text(response)
-                self.finish_response()
-            else:
-                self.current_ai_bubble.update_typed_text("❌ Researcher agent not available")
-                self.finish_response()
-        except Exception as e:
-            self.current_ai_bubble.update_typed_text(f"❌ Error: {str(e)}")
-            self.finish_response()
+        self._dispatch_to_gem('researcher', "Researcher", "Researching...", message)
     
     def _send_to_executor(self, message):
         """Send message directly to Executor agent"""
-        self.current_ai_bubble = self.chat_display.add_message("Executing...", is_user=False)
+        self._dispatch_to_gem('executor', "Executor", "Executing...", message)
+    
+    def _dispatch_to_gem(self, agent_key, display_name, placeholder, message):
+        """
+        Run a local gem agent on the task pool so the GUI thread never blocks.
+        Each task keeps its own row, animator and conversation id, so it never
+        touches the companion stream's state or a chat opened meanwhile.
+        """
+        bubble = self.chat_display.add_message(placeholder, is_user=False)
+        conversation_id = self.current_conversation_id
+        
+        agent = self.mcp.agents.get(agent_key)
+        if not agent:
+            bubble.update_typed_text(f"❌ {display_name} agent not available")
+            self._release_input()
+            return
         
-        try:
-            executor = self.mcp.agents.get('executor')
-            if executor:
-                response = executor.execute(message)
-                self.current_ai_bubble.update_typed_text(response)
-                self.finish_response()
-            else:
-                self.current_ai_bubble.update_typed_text("❌ Executor agent not available")
-                self.finish_response()
-        except Exception as e:
-            self.current_ai_bubble.update_typed_text(f"❌ Error: {str(e)}")
-            self.finish_response()
-
+        # Same per-frame clamp as the main stream
+        from ui.typing_animator import TypingWorker
+        animator = TypingWorker(instant_mode=True)
+        animator.char_typed.connect(bubble.update_typed_text)
+        
+        def on_finished(task_id, result):
+            animator.flush()
+            bubble.update_typed_text(result)
+            if result and self.conversation_db:
+                self.conversation_db.add_message(conversation_id, "assistant", result)
+            self._finish_gem_task(task_id)
+        
+        def on_error(task_id, error):
+            animator.flush()
+            bubble.update_typed_text(f"❌ Error: {error}")
+            self._finish_gem_task(task_id)
+        
+        signals = self.task_pool.submit(
+            agent_key, agent, message,
+            on_chunk=lambda task_id, text: animator.update_buffer(text),
+            on_finished=on_finished,
+            on_error=on_error
+        )
+        # Keep the task's signals and animator alive until it finishes
+        self.pending_tasks[signals.task_id] = (signals, animator)
+        
+        queued = self.task_pool.queue_depth(agent_key)
+        if queued:
+            bubble.update_typed_text(f"{placeholder} (queued, {queued} waiting)")
+    
+    def _finish_gem_task(self, task_id):
+        self.pending_tasks.pop(task_id, None)
+        self._release_input()
     
+    def _release_input(self):
+        """Re-enable input unless the companion/architect stream is still running"""
+        if self.typing_animator:
+            return
+        self.input_field.setEnabled(True)
+        self.input_field.setPlaceholderText("Send a message...")
+        self.input_field.setFocus()
+
     def on_backend_stream_finished(self, final_text):
         """Backend is done, tell animator to wrap up"""
         if self.typing_animator:
@@ -840,7 +978,7 @@ class CommandCenter(QMainWindow):
     
     def update_streaming_response(self, text):
         """Update AI bubble as chars are 'typed' by animator"""
-        if self.current_ai_bubble and hasattr(self.current_ai_bubble, 'content'):
+        if self.current_ai_bubble:
             try:
                 self.current_ai_bubble.update_typed_text(text)
                 self.chat_display.scroll_to_bottom()
@@ -850,6 +988,10 @@ class CommandCenter(QMainWindow):
     
     def finish_response(self, final_text=None):
         """Called when agent response is complete"""
+        # Paint any tokens still waiting for the next frame
+        if self.typing_animator:
+            self.typing_animator.flush()
+        
         # Save to database if we have text
         if final_text and self.conversation_db:
             self.conversation_db.add_message(
@@ -858,13 +1000,9 @@ class CommandCenter(QMainWindow):
                 final_text
             )
         
-        # Re-enable input
-        self.input_field.setEnabled(True)
-        self.input_field.setPlaceholderText("Send a message...")
-        self.input_field.setFocus()
-
         self.current_ai_bubble = None
         self.typing_animator = None
+        self._release_input()
     
     def handle_error(self, error_msg):
         """Handle streaming errors"""
@@ -875,9 +1013,11 @@ class CommandCenter(QMainWindow):
     def update_heartbeat(self):
         """Fetch system stats and update sidebar"""
         try:
-            from agents.system_observer import SystemObserver
-            observer = SystemObserver()
-            stats = observer.get_system_status()
+            # One shared observer; reads the background sampler's latest snapshot
+            if not getattr(self, 'system_observer', None):
+                from agents.system_observer import SystemObserver
+                self.system_observer = SystemObserver()
+            stats = self.system_observer.get_system_status()
             
             # Update labels
             self.cpu_label.setText(f"CPU: {stats['cpu']['usage']}%")
@@ -912,6 +1052,9 @@ class CommandCenter(QMainWindow):
         """Open the Agent Builder Wizard"""
         from ui.agent_builder import AgentBuilderDialog
         
+        if not self.companion:
+            self.when_backends_ready(self.build_agent)
+            return
         dialog = AgentBuilderDialog(self.architect, self.llm, self)
         dialog.agent_created.connect(self.on_agent_created)
         dialog.exec()
@@ -963,7 +1106,14 @@ class CommandCenter(QMainWindow):
         
         if not file:
             return
-            
+        
+        # The vision agent lives in the backends; attach once they have loaded
+        self.when_backends_ready(
+            lambda: self._process_attachment(file),
+            on_failed=lambda: self.add_message(
+                "System", f"❌ Could not attach {os.path.basename(file)}: agents failed to load"))
+    
+    def _process_attachment(self, file):
         try:
             # Process the file
             from utils.file_handler import FileAttachmentHandler
@@ -1114,9 +1264,12 @@ class CommandCenter(QMainWindow):
 
 
 class MenuBarApp:
-    def __init__(self):
+    def __init__(self, profiler=None):
+        self.profiler = profiler or StartupProfiler()
         self.app = QApplication(sys.argv)
-        self.window = CommandCenter()
+        self.profiler.mark("QApplication created")
+        with self.profiler.phase("CommandCenter()"):
+            self.window = CommandCenter(self.profiler)
         
         self.tray_icon = QSystemTrayIcon(self.app)
         icon_path = os.path.join(os.path.dirname(__file__), 'assets', 'mcp_icon.png')
@@ -1155,9 +1308,11 @@ class MenuBarApp:
     
     def run(self):
         self.show_window()
+        # Fires on the first event-loop pass, after the window's first paint
+        QTimer.singleShot(0, lambda: self.profiler.mark("window visible"))
         return self.app.exec()
 
 
 if __name__ == "__main__":
-    app = MenuBarApp()
+    app = MenuBarApp(startup_profiler)
     sys.exit(app.run())
@@ -5,7 +5,7 @@ Main entry point for the Local LLM Agent System
 import os
 import sys
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
+from agents.agent_registry import shared_llm
 from agents.orchestrator import Orchestrator
 
 load_dotenv()
@@ -14,18 +14,19 @@ def main():
     """Main function to run the agent system"""
     
     # Initialize the LLM
-    llm = ChatOllama(
-        model=os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b"),
-        base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-        temperature=0.7,
-    )
+    llm = shared_llm()
     
     # Initialize the orchestrator
     orchestrator = Orchestrator(llm)
     
     # Check command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--interactive" or sys.argv[1] == "-i":
+    args = sys.argv[1:]
+    parallel = "--parallel" in args
+    if parallel:
+        args.remove("--parallel")
+    
+    if args:
+        if args[0] == "--interactive" or args[0] == "-i":
             # Interactive mode
             print("🤖 Local LLM Agent System - Interactive Mode")
             print("=" * 60)
@@ -63,23 +64,59 @@ def main():
                 except Exception as e:
                     print(f"\n❌ Error: {str(e)}")
         
-        elif sys.argv[1] == "--task" or sys.argv[1] == "-t":
+        elif args[0] == "--task" or args[0] == "-t":
             # Single task mode
-            if len(sys.argv) < 3:
+            if len(args) < 2:
                 print("❌ Error: Please provide a task")
-                print("Usage: python main.py --task 'your task here'")
+                print("Usage: python main.py --task 'your task here' [--parallel]")
                 sys.exit(1)
             
-            task = " ".join(sys.argv[2:])
+            task = " ".join(args[1:])
             print(f"🔄 Processing task: {task}")
-            result = orchestrator.process_task(task)
+            if parallel:
+                # Compound task: plan a DAG of sub-tasks and run independent ones concurrently
+                def show_step(node):
+                    status = "✅" if node.error is None else "❌"
+                    print(f"\n{status} {node.id} ({node.agent}, {node.duration_s:.1f}s): {node.task}")
+                    print(node.result if node.error is None else node.error)
+                
+                result = orchestrator.process_plan(task, parallel=True, on_node=show_step)
+            else:
+                result = orchestrator.process_task(task)
             print(f"\n✅ Result:\n{result}")
-        
+
+        elif args[0] == "--batch" or args[0] == "-b":
+            # Batch mode: JSONL tasks in, JSONL results out, resumable
+            from utils.batch_runner import BatchRunner, print_summary
+
+            def option(name, default=None):
+                if name in args:
+                    i = args.index(name)
+                    if i + 1 < len(args):
+                        return args[i + 1]
+                return default
+
+            if len(args) < 2 or args[1].startswith("-"):
+                print("❌ Error: Please provide an input file")
+                print("Usage: python main.py --batch tasks.jsonl [--out results.jsonl] [--workers N]")
+                sys.exit(1)
+
+            input_path = args[1]
+            output_path = option("--out", os.path.splitext(input_path)[0] + ".results.jsonl")
+            workers = int(option("--workers", os.getenv("BATCH_WORKERS", "4")))
+            print(f"🔄 Batch: {input_path} -> {output_path} ({workers} workers)")
+
+            summary = BatchRunner(orchestrator, workers=workers).run(input_path, output_path)
+            print_summary(summary)
+            if summary['error']:
+                sys.exit(2)
+
         else:
-            print("❌ Unknown option. Use --interactive or --task")
+            print("❌ Unknown option. Use --interactive, --task or --batch")
             print("Usage:")
             print("  python main.py --interactive")
-            print("  python main.py --task 'your task here'")
+            print("  python main.py --task 'your task here' [--parallel]")
+            print("  python main.py --batch tasks.jsonl [--out results.jsonl] [--workers N]")
             sys.exit(1)
     else:
         # Default: show usage
@@ -87,6 +124,8 @@ def main():
         print("\nUsage:")
         print("  Interactive mode: python main.py --interactive (or -i)")
         print("  Single task:      python main.py --task 'your task' (or -t)")
+        print("  Compound task:    python main.py --task 'research X, then code Y and summarize' --parallel")
+        print("  Batch:            python main.py --batch tasks.jsonl --out results.jsonl --workers 4 (or -b)")
         print("\nExamples:")
         print("  python main.py -i")
         print("  python main.py -t 'Research quantum computing and summarize'")
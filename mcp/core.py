@@ -8,6 +8,7 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 from agents.memory import MemorySystem
+from agents.agent_registry import AgentRegistry
 
 
 class SafetyLevel(Enum):
@@ -222,8 +223,9 @@ class MCP:
             if saved_number:
                 self.notifications.phone_number = saved_number
         
-        # Sub-agent registry (populated later)
-        self.agents = {}
+        # Sub-agent registry (populated later, agents may be built lazily)
+        self.agents = AgentRegistry()
+        self._planner = None     # TaskPlanner for compound requests (see process_task)
         
         # Configuration
         self.config = {
@@ -240,7 +242,7 @@ class MCP:
     
     def register_agent(self, name: str, agent):
         """Register a sub-agent"""
-        self.agents[name] = agent
+        self.agents.add(name, agent)
         print(f"✅ Registered agent: {name}")
     
     def execute_action(self, action_type: str, description: str, function, *args, **kwargs):
@@ -315,6 +317,12 @@ class MCP:
         Process a task by delegating to appropriate agent
         With safety checks and notifications
         """
+        # Compound requests ("research X, then write Y") run as a plan of sub-tasks
+        if not kwargs:
+            nodes = self.planner.plan(task)
+            if len(nodes) > 1:
+                return self._run_plan(task, nodes)
+        
         # Determine which agent to use
         task_lower = task.lower()
         
@@ -359,6 +367,25 @@ class MCP:
             self.memory.add_conversation(task, error_msg, "Error")
             return (error_msg, "Error")
     
+    @property
+    def planner(self):
+        """Rule-based TaskPlanner, built on the first task"""
+        if self._planner is None:
+            from agents.task_planner import TaskPlanner
+            self._planner = TaskPlanner()
+        return self._planner
+    
+    def _run_plan(self, task: str, nodes) -> Tuple[str, str]:
+        """Run a multi-step plan across the registered agents; independent steps run concurrently"""
+        from agents.task_planner import DagExecutor
+        
+        print("🗺️  Plan:")
+        for node in nodes:
+            print(f"   {node}")
+        result = DagExecutor(self.agents, max_workers=4).run(nodes)
+        self.memory.add_conversation(task, result, "Planner")
+        return (result, "Planner")
+    
     def configure(self, **kwargs):
         """Update MCP configuration"""
         self.config.update(kwargs)
@@ -383,6 +410,7 @@ class MCP:
         """Get MCP status"""
         return {
             'registered_agents': list(self.agents.keys()),
+            'agent_init': self.agents.init_report(),
             'pending_approvals': len(self.safety.pending_approvals),
             'recent_actions': self.safety.get_action_history(5),
             'config': self.config,
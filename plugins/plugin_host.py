@@ -0,0 +1,326 @@
+"""
+Plugin Host - Runs AgentPlugins in a pool of worker processes
+
+A plugin is addressed by a spec, "package.module:ClassName" or
+"/path/to/generated_agent.py:ClassName". Workers are persistent: each one
+imports and builds a plugin the first time it sees the spec and reuses the
+instance for later calls, so only the first call pays the import cost.
+
+IPC is a multiprocessing Pipe carrying small tuples:
+    parent -> worker   ("call", call_id, spec, task, kwargs, stream)
+                       ("describe", call_id, spec) | ("stop",)
+    worker -> parent   ("chunk", call_id, text)      (streaming)
+                       ("done" | "error", call_id, result | message, recycle)
+
+recycle=True means the worker exits after this reply and must not be reused.
+
+A call that runs past its timeout, or a worker that crashes, only costs that
+worker: it is killed and a fresh one is started on the next call. Each worker
+runs with an address-space limit (RLIMIT_AS) and is also recycled after a
+call once its peak RSS passes the limit (macOS does not enforce RLIMIT_AS).
+"""
+import importlib
+import importlib.util
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator
+
+from plugins.plugin_base import AgentPlugin
+
+DEFAULT_TIMEOUT_S = float(os.getenv("PLUGIN_TIMEOUT_S", "120"))
+DEFAULT_MEMORY_LIMIT_MB = int(os.getenv("PLUGIN_MEMORY_LIMIT_MB", "2048"))
+DEFAULT_WORKERS = int(os.getenv("PLUGIN_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+
+class PluginHostError(RuntimeError):
+    """A plugin call failed inside the host (not a plugin's own "❌" result)"""
+
+
+class PluginTimeout(PluginHostError):
+    pass
+
+
+class PluginCrashed(PluginHostError):
+    pass
+
+
+# === WORKER PROCESS ===
+
+def load_plugin_class(spec: str):
+    """Resolve "module:Class" or "path/to/file.py:Class" to the class"""
+    target, _, class_name = spec.rpartition(":")
+    if not target or not class_name:
+        raise ValueError(f"Plugin spec must be 'module:Class' or 'file.py:Class', got {spec!r}")
+    if target.endswith(".py"):
+        module_name = "plugin_" + os.path.splitext(os.path.basename(target))[0]
+        module_spec = importlib.util.spec_from_file_location(module_name, target)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    return getattr(module, class_name)
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KB on Linux
+
+
+def _worker_main(conn, use_llm: bool, memory_limit_mb: int):
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+    plugins = {}
+    llm = None
+
+    def get_plugin(spec):
+        nonlocal llm
+        if spec not in plugins:
+            if use_llm and llm is None:
+                from agents.agent_registry import shared_llm
+                llm = shared_llm()
+            plugins[spec] = load_plugin_class(spec)(llm)
+        return plugins[spec]
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        op = message[0]
+        if op == "stop":
+            break
+
+        call_id = message[1]
+        recycle = False
+        try:
+            if op == "describe":
+                plugin = get_plugin(message[2])
+                reply = ("done", {
+                    'name': plugin.name,
+                    'description': getattr(plugin, 'description', ''),
+                    'capabilities': list(getattr(plugin, 'capabilities', [])),
+                })
+            else:
+                _, _, spec, task, kwargs, stream = message
+                plugin = get_plugin(spec)
+                if stream and hasattr(plugin, "stream_execute"):
+                    result = plugin.stream_execute(task, **kwargs)
+                else:
+                    result = plugin.execute(task, **kwargs)
+
+                if hasattr(result, "__next__"):     # Generator: forward chunks as they come
+                    for chunk in result:
+                        conn.send(("chunk", call_id, chunk))
+                    result = None
+                reply = ("done", result)
+        except MemoryError:
+            reply, recycle = ("error", f"MemoryError: plugin exceeded {memory_limit_mb} MB"), True
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+
+        if memory_limit_mb and _peak_rss_mb() > memory_limit_mb:
+            recycle = True      # The parent starts a fresh worker next time
+        conn.send((reply[0], call_id, reply[1], recycle))
+        if recycle:
+            break
+
+
+# === PARENT SIDE ===
+
+class _Worker:
+    def __init__(self, ctx, index: int, use_llm: bool, memory_limit_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, use_llm, memory_limit_mb),
+            name=f"plugin-worker-{index}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.calls = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class PluginHost:
+    """Pool of persistent plugin worker processes (thread-safe)"""
+
+    def __init__(self, max_workers: int = None, timeout_s: float = None,
+                 memory_limit_mb: int = None, use_llm: bool = True):
+        self.max_workers = max(1, max_workers or DEFAULT_WORKERS)
+        self.timeout_s = timeout_s or DEFAULT_TIMEOUT_S
+        self.memory_limit_mb = DEFAULT_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.use_llm = use_llm
+
+        # spawn: workers must not inherit the GUI's Qt state or threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = []             # Most recently used last, so warm workers are reused first
+        self._count = 0
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._next_index = itertools.count(1)
+        self._closed = False
+        self.stats = {'calls': 0, 'timeouts': 0, 'crashes': 0, 'workers_started': 0}
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PluginHostError("Plugin host is shut down")
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    worker.kill()       # Recycled or died while idle
+                    self._count -= 1
+                if self._count < self.max_workers:
+                    self._count += 1
+                    break
+                self._cond.wait()
+
+        try:
+            worker = _Worker(self._ctx, next(self._next_index), self.use_llm, self.memory_limit_mb)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        self.stats['workers_started'] += 1
+        return worker
+
+    def _release(self, worker: _Worker, healthy: bool):
+        with self._cond:
+            if healthy and worker.alive and not self._closed:
+                self._idle.append(worker)
+            else:
+                worker.kill()
+                self._count -= 1
+            self._cond.notify()
+
+    def _request(self, message_for, timeout_s: float = None) -> Iterator[tuple]:
+        """Send one request to a worker and yield its replies until done/error"""
+        timeout_s = timeout_s or self.timeout_s
+        worker = self._acquire()
+        call_id = next(self._ids)
+        deadline = time.monotonic() + timeout_s
+        healthy = False
+        try:
+            worker.conn.send(message_for(call_id))
+            worker.calls += 1
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    self.stats['timeouts'] += 1
+                    raise PluginTimeout(f"Plugin call timed out after {timeout_s:.0f}s")
+                try:
+                    reply = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join(timeout=1)
+                    self.stats['crashes'] += 1
+                    raise PluginCrashed(f"Plugin worker exited (code {worker.process.exitcode})")
+                if reply[1] != call_id:
+                    continue
+                if reply[0] == "chunk":
+                    yield reply
+                    continue
+                healthy = not reply[3]      # done / error: ready for the next call unless recycling
+                yield reply[:3]
+                return
+        finally:
+            # Abandoned mid-call (timeout, crash, or the consumer stopped reading): kill it
+            self._release(worker, healthy)
+
+    def stream(self, spec: str, task: str, timeout_s: float = None, **kwargs) -> Iterator[str]:
+        """Run a plugin, yielding output as it is produced (stream_execute if it has one)"""
+        self.stats['calls'] += 1
+        for kind, _, payload in self._request(lambda i: ("call", i, spec, task, kwargs, True), timeout_s):
+            if kind == "error":
+                raise PluginHostError(payload)
+            if payload is not None:
+                yield payload if isinstance(payload, str) else str(payload)
+
+    def execute(self, spec: str, task: str, timeout_s: float = None, **kwargs) -> str:
+        """Run a plugin's execute() in a worker and return its result"""
+        self.stats['calls'] += 1
+        chunks = []
+        for kind, _, payload in self._request(lambda i: ("call", i, spec, task, kwargs, False), timeout_s):
+            if kind == "error":
+                raise PluginHostError(payload)
+            if payload is not None:
+                chunks.append(payload if isinstance(payload, str) else str(payload))
+        return "".join(chunks)
+
+    def describe(self, spec: str) -> Dict:
+        """name / description / capabilities, read from the plugin inside a worker"""
+        for kind, _, payload in self._request(lambda i: ("describe", i, spec)):
+            if kind == "error":
+                raise PluginHostError(payload)
+            return payload
+
+    def plugin(self, spec: str, timeout_s: float = None) -> "RemotePlugin":
+        return RemotePlugin(self, spec, self.describe(spec), timeout_s)
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {**self.stats, 'workers': self._count, 'idle': len(self._idle)}
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            try:
+                worker.conn.send(("stop",))
+                worker.process.join(timeout=2)
+            except (OSError, BrokenPipeError):
+                pass
+            worker.kill()
+
+
+class RemotePlugin(AgentPlugin):
+    """
+    Stand-in for a plugin running in a PluginHost. Has the plugin's name and
+    capabilities, so it can be registered with Orchestrator.register_plugin().
+    """
+
+    def __init__(self, host: PluginHost, spec: str, info: Dict, timeout_s: float = None):
+        # No AgentPlugin.__init__: the LLM and memory live in the worker
+        self.llm = None
+        self.host = host
+        self.spec = spec
+        self.timeout_s = timeout_s
+        self.name = info['name']
+        self.description = info.get('description', '')
+        self.capabilities = info.get('capabilities', [])
+
+    def execute(self, task: str, **kwargs) -> str:
+        try:
+            return self.host.execute(self.spec, task, self.timeout_s, **kwargs)
+        except PluginHostError as e:
+            return f"❌ Plugin {self.name} failed: {e}"
+
+    def stream_execute(self, task: str, **kwargs):
+        try:
+            yield from self.host.stream(self.spec, task, self.timeout_s, **kwargs)
+        except PluginHostError as e:
+            yield f"❌ Plugin {self.name} failed: {e}"
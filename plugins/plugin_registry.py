@@ -0,0 +1,157 @@
+"""
+Plugin Registry - Routes tasks to AgentPlugins in one pass
+
+Every registered plugin's `capabilities` are compiled into a single
+Aho-Corasick automaton, so matching a task against all plugins costs one
+scan of the (lowercased once) task instead of N x keywords substring
+searches. Matches keep AgentPlugin.can_handle's substring semantics;
+whole-word hits score higher than hits inside longer words.
+
+Plugins that override can_handle() with custom logic are still asked
+directly, after the automaton pass.
+"""
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+from plugins.plugin_base import AgentPlugin
+
+WHOLE_WORD_SCORE = 1.0
+SUBSTRING_SCORE = 0.5
+CUSTOM_MATCH_SCORE = 1.0    # can_handle() override said yes
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]        # state -> {char: state}
+        self.fail = [0]
+        self.output = [[]]      # state -> keywords ending here (incl. via fail links)
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append(keyword)
+
+        # Breadth-first: fail links point at the longest proper suffix in the trie
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find(self, text: str):
+        """Yield (end_index, keyword) for every (possibly overlapping) occurrence"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                yield i, keyword
+
+
+class PluginMatch:
+    """A plugin that can handle a task, and why"""
+
+    def __init__(self, plugin, score: float, keywords: List[str], whole_word: bool = True):
+        self.plugin = plugin
+        self.name = plugin.name
+        self.score = score
+        self.keywords = keywords
+        self.whole_word = whole_word    # False if every hit was inside a longer word ("wp" in "wpa")
+
+    def __repr__(self):
+        return f"PluginMatch({self.name}, score={self.score}, keywords={self.keywords})"
+
+
+class PluginRegistry:
+    """Registered plugins plus the automaton compiled from their capabilities"""
+
+    def __init__(self):
+        self.plugins = {}           # name -> plugin, in registration order
+        self._automaton = None
+        self._owners = {}           # keyword -> [plugin names]
+        self._custom = []           # names of plugins overriding can_handle
+        self._lock = threading.Lock()
+
+    def register(self, plugin):
+        with self._lock:
+            self.plugins[plugin.name] = plugin
+            self._automaton = None
+
+    def unregister(self, name: str):
+        with self._lock:
+            self.plugins.pop(name, None)
+            self._automaton = None
+
+    def __len__(self):
+        return len(self.plugins)
+
+    def __contains__(self, name):
+        return name in self.plugins
+
+    def _compile(self):
+        owners = {}
+        custom = []
+        for name, plugin in self.plugins.items():
+            if type(plugin).can_handle is not AgentPlugin.can_handle:
+                custom.append(name)
+                continue
+            for keyword in {k.lower() for k in plugin.capabilities if k}:
+                owners.setdefault(keyword, []).append(name)
+        self._owners = owners
+        self._custom = custom
+        self._automaton = KeywordAutomaton(owners)
+
+    def match(self, task: str, limit: int = None) -> List[PluginMatch]:
+        """Plugins that can handle the task, best first"""
+        with self._lock:
+            if self._automaton is None:
+                self._compile()
+            automaton, owners, custom = self._automaton, self._owners, self._custom
+            plugins = dict(self.plugins)
+
+        text = task.lower()
+        hits: Dict[str, Dict[str, float]] = {}      # plugin -> keyword -> best score
+        for end, keyword in automaton.find(text):
+            start = end - len(keyword) + 1
+            whole = (start == 0 or not text[start - 1].isalnum()) and \
+                    (end + 1 == len(text) or not text[end + 1].isalnum())
+            score = WHOLE_WORD_SCORE if whole else SUBSTRING_SCORE
+            for name in owners[keyword]:
+                seen = hits.setdefault(name, {})
+                seen[keyword] = max(seen.get(keyword, 0.0), score)
+
+        matches = [PluginMatch(plugins[name], round(sum(kw.values()), 3), sorted(kw),
+                               whole_word=WHOLE_WORD_SCORE in kw.values())
+                   for name, kw in hits.items()]
+        for name in custom:
+            try:
+                if plugins[name].can_handle(task):
+                    matches.append(PluginMatch(plugins[name], CUSTOM_MATCH_SCORE, []))
+            except Exception as e:
+                print(f"⚠️ Plugin {name}.can_handle failed: {e}")
+
+        order = {name: i for i, name in enumerate(plugins)}
+        matches.sort(key=lambda m: (-m.score, -max((len(k) for k in m.keywords), default=0), order[m.name]))
+        return matches[:limit] if limit else matches
+
+    def best(self, task: str) -> Optional[PluginMatch]:
+        matches = self.match(task, limit=1)
+        return matches[0] if matches else None
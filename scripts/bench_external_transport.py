@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Connection-reuse benchmark for external agents.
+Starts the fake LLM server (tools/fake_llm_server.py; HTTPS with a throwaway
+self-signed cert when openssl is available, plain HTTP otherwise) and sends N
+chat-completion requests with a fresh connection per call (module-level
+requests.post, the old behavior) and through ChatGPTAgent's pooled
+transport. Reports ms/request and how many TCP connections the server saw.
+
+Usage: python scripts/bench_external_transport.py [requests] [--http]
+"""
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import requests
+import urllib3
+
+from agents.external_agents import ChatGPTAgent
+from agents.http_transport import HttpTransport
+from tools.fake_llm_server import FakeLLMServer, FakeLLMConfig
+
+def start_server(use_tls):
+    context = None
+    if use_tls:
+        workdir = tempfile.mkdtemp()
+        cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+                       check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        shutil.rmtree(workdir)
+    server = FakeLLMServer(FakeLLMConfig(reply="ok " * 200), ssl_context=context).start()
+    return server, f"{server.url}/v1/chat/completions"
+
+
+def run(label, n, call, server):
+    call()  # Warm up (imports, first handshake)
+    server.reset_stats()
+    start = time.perf_counter()
+    for _ in range(n):
+        call()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed / n * 1000:7.2f} ms/request   "
+          f"{server.stats.get('connections', 0):4d} connections")
+    return elapsed
+
+
+def main():
+    n = int(next((a for a in sys.argv[1:] if a.isdigit()), 200))
+    use_tls = "--http" not in sys.argv and shutil.which("openssl") is not None
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    server, url = start_server(use_tls)
+
+    agent = ChatGPTAgent("test-key")
+    agent.endpoint = url
+    agent.transport = HttpTransport()
+    if use_tls:
+        agent.post = lambda u, **kw: agent.transport.post(u, verify=False, **kw)
+
+    headers = {"Authorization": "Bearer test-key", "Content-Type": "application/json"}
+    body = {"model": agent.model, "messages": [{"role": "user", "content": "hi"}], "max_tokens": 16}
+
+    print(f"{n} requests to a local {'HTTPS' if use_tls else 'HTTP'} stub")
+    old = run("requests.post per call", n,
+              lambda: requests.post(url, headers=headers, json=body, verify=False).json(), server)
+    new = run("ChatGPTAgent pooled session", n, lambda: agent.execute("hi", max_tokens=16), server)
+    print(f"  -> {old / new:.1f}x faster with connection reuse")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Framework-overhead benchmark, independent of model speed.
+Starts the fake LLM server (tools/fake_llm_server.py) as a local Ollama and
+times N calls at each layer: a bare ChatOllama, an ExecutorAgent on the
+shared (coalescing, optionally cached) client, and SmartOrchestrator in
+single mode. With the default instant model, each layer's ms/call minus
+the layer below is what this project adds. Pass --ttft/--tps to check the
+overhead stays the same when the model is slow.
+
+Usage: python scripts/bench_llm_overhead.py [calls] [--ttft S] [--tps N] [--stream]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tools.fake_llm_server import FakeLLMServer, FakeLLMConfig
+
+
+def option(name, default):
+    if name in sys.argv:
+        return float(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def run(label, n, call, baseline=None):
+    call("warm up")
+    start = time.perf_counter()
+    for i in range(n):
+        call(f"task number {i}")     # Distinct prompts: no cache hits or coalescing
+    ms = (time.perf_counter() - start) / n * 1000
+    extra = f"   ({ms - baseline:+.2f} ms)" if baseline is not None else ""
+    print(f"  {label:<34} {ms:7.2f} ms/call{extra}")
+    return ms
+
+
+def main():
+    n = int(next((a for a in sys.argv[1:] if a.isdigit()), 100))
+    stream = "--stream" in sys.argv
+    config = FakeLLMConfig(ttft_s=option("--ttft", 0.0), tokens_per_s=option("--tps", 0.0),
+                           reply="A short deterministic answer from the fake model.")
+
+    with FakeLLMServer(config) as server:
+        os.environ["OLLAMA_BASE_URL"] = server.url
+        from langchain_ollama import ChatOllama
+        from agents.agent_registry import shared_llm
+        from agents.executor import ExecutorAgent
+        from agents.smart_orchestrator import SmartOrchestrator
+
+        raw = ChatOllama(model="fake-model", base_url=server.url)
+        executor = ExecutorAgent(shared_llm("fake-model"))
+        orchestrator = SmartOrchestrator(shared_llm("fake-model"), stats_file=None)
+        orchestrator.external_agents = {}
+        orchestrator.local_agents.add('executor', executor)
+
+        if stream:
+            layers = [
+                ("ChatOllama.stream", lambda t: "".join(c.content for c in raw.stream(t))),
+                ("ExecutorAgent.stream_execute", lambda t: "".join(executor.stream_execute(t))),
+                ("SmartOrchestrator.stream_execute", lambda t: "".join(orchestrator.stream_execute(t))),
+            ]
+        else:
+            layers = [
+                ("ChatOllama.invoke", lambda t: raw.invoke(t).content),
+                ("ExecutorAgent.execute", executor.execute),
+                ("SmartOrchestrator.process_task", lambda t: orchestrator.process_task(t, mode="single")),
+            ]
+
+        print(f"{n} calls per layer against a fake Ollama at {server.url} "
+              f"(TTFT {config.ttft_s}s, {config.tokens_per_s or '∞'} tokens/s)")
+        baseline = None
+        for label, call in layers:
+            ms = run(label, n, call, baseline)
+            baseline = ms if baseline is None else baseline
+        print(f"  server saw {server.stats.get('ollama_chat', 0)} chats on "
+              f"{server.stats.get('connections', 0)} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for TerminalWidget output.
+Pushes a synthetic build log (with ANSI colors) through the old per-chunk
+QTextEdit insert and through the batched pipeline, in 4 KB chunks as
+QProcess delivers them, and reports MB/s and final scrollback size.
+
+Usage: python scripts/bench_terminal_throughput.py [megabytes]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtGui import QColor, QTextCursor
+from PyQt6.QtWidgets import QApplication, QTextEdit
+from ui.terminal_widget import TerminalWidget
+
+CHUNK_SIZE = 4096
+
+
+def synthetic_log(megabytes):
+    lines = [
+        "\x1b[32m✔\x1b[0m compiled src/module_{i}.c -> build/module_{i}.o\n",
+        "\x1b[33mwarning:\x1b[0m unused variable 'tmp_{i}' [-Wunused-variable]\n",
+        "[{i:08d}] /usr/lib/python3/site-packages/pkg_{i}/__init__.py\n",
+    ]
+    out = []
+    size = 0
+    i = 0
+    target = int(megabytes * 1024 * 1024)
+    while size < target:
+        line = lines[i % len(lines)].format(i=i)
+        out.append(line)
+        size += len(line)
+        i += 1
+    return "".join(out).encode("utf-8")
+
+
+def chunks(data):
+    return [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+
+def bench_legacy(data):
+    """The previous handle_output: decode + cursor insert per chunk, unbounded"""
+    output = QTextEdit()
+    output.setReadOnly(True)
+    output.show()
+
+    start = time.perf_counter()
+    for chunk in chunks(data):
+        text = chunk.decode("utf-8", errors="replace")
+        cursor = output.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        fmt = cursor.charFormat()
+        fmt.setForeground(QColor("#cccccc"))
+        cursor.setCharFormat(fmt)
+        cursor.insertText(text)
+        output.setTextCursor(cursor)
+        output.ensureCursorVisible()
+        QCoreApplication.processEvents()
+    elapsed = time.perf_counter() - start
+    return elapsed, output.document().blockCount()
+
+
+def bench_pipeline(data):
+    terminal = TerminalWidget()
+    terminal.show()
+    QCoreApplication.processEvents()
+    terminal.output.clear()
+
+    start = time.perf_counter()
+    for chunk in chunks(data):
+        terminal.pipeline.feed(chunk, source='bench')
+        QCoreApplication.processEvents()
+    terminal.pipeline.finish(source='bench')
+
+    # Wait for the parser thread and the last frame
+    while not terminal.pipeline.is_idle() or terminal.flush_timer.isActive():
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    terminal.flush_output()
+    elapsed = time.perf_counter() - start
+    return elapsed, terminal.output.document().blockCount()
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8.0
+    app = QApplication(sys.argv)
+    data = synthetic_log(megabytes)
+    mb = len(data) / (1024 * 1024)
+
+    print(f"Terminal output throughput ({mb:.1f} MB in {CHUNK_SIZE // 1024} KB chunks)")
+    elapsed, blocks = bench_legacy(data)
+    print(f"  before (insert per chunk):  {mb / elapsed:7.2f} MB/s  "
+          f"({elapsed:.2f}s, {blocks} lines kept)")
+
+    elapsed, blocks = bench_pipeline(data)
+    print(f"  after (batched pipeline):   {mb / elapsed:7.2f} MB/s  "
+          f"({elapsed:.2f}s, {blocks} lines kept)")
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,8 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QIcon, QFont, QTextCursor, QPalette, QColor, QPixmap, QPainter
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
 from mcp.core import MCP
-from agents.researcher import ResearchAgent
-from agents.coder import CoderAgent
-from agents.executor import ExecutorAgent
-from agents.vision import VisionAgent
+from agents.agent_registry import shared_llm, default_agents
 
 load_dotenv()
 
@@ -44,17 +40,10 @@ class SimpleChatWindow(QMainWindow):
         super().__init__()
         
         # Initialize MCP
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.7,
-        )
+        self.llm = shared_llm()
         
         self.mcp = MCP(self.llm)
-        self.mcp.register_agent('researcher', ResearchAgent(self.llm))
-        self.mcp.register_agent('coder', CoderAgent(self.llm))
-        self.mcp.register_agent('executor', ExecutorAgent(self.llm))
-        self.mcp.register_agent('vision', VisionAgent(self.llm))
+        default_agents(self.llm, registry=self.mcp.agents)
         
         self.agent_thread = None
         
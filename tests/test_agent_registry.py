@@ -0,0 +1,36 @@
+import threading
+import time
+
+from agents.agent_registry import AgentRegistry, shared_llm
+
+
+def test_agents_are_built_once_on_first_lookup():
+    builds = []
+
+    def factory():
+        builds.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return object()
+
+    registry = AgentRegistry()
+    registry.register('coder', factory)
+    assert 'coder' in registry and not registry.is_built('coder')
+    assert builds == []
+
+    threads = [threading.Thread(target=lambda: registry['coder']) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(builds) == 1
+    report = registry.init_report()['coder']
+    assert report['built'] and report['init_ms'] >= 40
+    assert registry.get('missing') is None
+
+
+def test_llm_client_is_shared_per_model_and_url():
+    a = shared_llm("m1", base_url="http://localhost:1/")
+    assert shared_llm("m1", base_url="http://localhost:1") is a
+    assert shared_llm("m2", base_url="http://localhost:1") is not a
+    assert shared_llm("m1", base_url="http://localhost:1", num_ctx=2048) is not a
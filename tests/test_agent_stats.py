@@ -0,0 +1,58 @@
+import random
+
+from agents.agent_stats import StatsStore
+from agents.external_agents import ClaudeAgent
+from agents.routing_policy import CostAwareRouter, CHEAPEST, MIN_SAMPLES
+
+
+def fill(store, name, latency_s, cost_usd, category="code", n=MIN_SAMPLES):
+    for _ in range(n):
+        store.record(name, latency_s, tokens=100, cost_usd=cost_usd, category=category)
+
+
+def test_router_picks_fastest_within_budget():
+    store = StatsStore()
+    fill(store, "Claude", 2.0, 0.030)      # Fast but over the code budget
+    fill(store, "ChatGPT", 4.0, 0.010)
+    fill(store, "Coder", 9.0, 0.0)
+    router = CostAwareRouter(store, budgets={'code': 0.02}, explore_rate=0)
+
+    assert router.choose("code", ["Claude", "ChatGPT", "Coder"], default="Coder") == "ChatGPT"
+    assert CostAwareRouter(store, objective=CHEAPEST, budgets={'code': 0.02}, explore_rate=0).choose(
+        "code", ["Claude", "ChatGPT", "Coder"], default="Coder") == "Coder"
+
+    # Failing agents drop out
+    for _ in range(MIN_SAMPLES):
+        store.record_failure("ChatGPT", "code")
+    assert router.choose("code", ["Claude", "ChatGPT", "Coder"], default="Coder") == "Coder"
+
+
+def test_router_keeps_unknown_default_and_explores():
+    store = StatsStore()
+    fill(store, "ChatGPT", 1.0, 0.001)
+    assert CostAwareRouter(store, explore_rate=0).choose("code", ["Coder", "ChatGPT"], "Coder") == "Coder"
+    assert CostAwareRouter(store, explore_rate=1, rng=random.Random(0)).choose(
+        "code", ["Coder", "ChatGPT", "Claude"], "ChatGPT") in ("Coder", "Claude")
+
+
+def test_stats_persist_across_restarts(tmp_path):
+    path = str(tmp_path / "agent_stats.json")
+    store = StatsStore(path)
+    fill(store, "Claude", 1.5, 0.004, category="reasoning")
+    store.record("Claude", 1.0, ttft_s=0.2, tokens=50, cost_usd=0.002)
+    store.save()
+
+    restored = StatsStore(path)
+    assert restored.report()["Claude"] == store.report()["Claude"]
+    assert restored.agent("Claude", "reasoning").calls == MIN_SAMPLES
+    assert restored.agent("Claude").latency.quantile(0.5) == store.agent("Claude").latency.quantile(0.5)
+    assert "TTFT 0.2s" in restored.summary("Claude")
+
+
+def test_usage_from_anthropic_stream_events():
+    agent = ClaudeAgent("key")
+    agent.track_usage()
+    agent.record_usage({"type": "message_start", "message": {"usage": {"input_tokens": 12, "output_tokens": 1}}})
+    agent.record_usage({"type": "content_block_delta", "delta": {"text": "hi"}})
+    agent.record_usage({"type": "message_delta", "usage": {"output_tokens": 9}})
+    assert agent.last_usage == {'input_tokens': 12, 'output_tokens': 9, 'total_tokens': 21}
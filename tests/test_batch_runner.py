@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+
+from agents.task_router import RouteDecision
+from utils.batch_runner import BatchRunner
+
+
+class FakeAgent:
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def execute(self, task):
+        with self._lock:
+            self.calls.append(task)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return "❌ boom" if "fail" in task else f"done: {task}"
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.sub_agents = {'executor': FakeAgent()}
+
+    def run_task(self, task):
+        return self.sub_agents['executor'].execute(task), RouteDecision('executor', 'keyword', 1.0, 0.0)
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+
+def test_batch_runs_concurrently_and_resumes(tmp_path):
+    tasks = tmp_path / "tasks.jsonl"
+    out = tmp_path / "out.jsonl"
+    write_jsonl(tasks, [{'id': f"t{i}", 'task': f"task {i}"} for i in range(8)] + [{'id': 'bad', 'task': 'fail'}])
+
+    orchestrator = FakeOrchestrator()
+    summary = BatchRunner(orchestrator, workers=4).run(str(tasks), str(out))
+    agent = orchestrator.sub_agents['executor']
+    assert (summary['ok'], summary['error'], summary['skipped']) == (8, 1, 0)
+    assert 1 < agent.peak <= 4
+    assert summary['latency_p50_s'] >= 0.05
+
+    # Restart: only the failed task is retried
+    agent.calls.clear()
+    summary = BatchRunner(orchestrator, workers=4).run(str(tasks), str(out))
+    assert agent.calls == ['fail']
+    assert (summary['skipped'], summary['error']) == (8, 1)
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(rows) == 10 and {r['id'] for r in rows if r['status'] == 'ok'} == {f"t{i}" for i in range(8)}
+
+
+class WordPressPlugin:
+    name = "wordpress"
+    capabilities = ['wordpress', 'blog post']
+
+    def can_handle(self, task):
+        return 'wordpress' in task.lower()
+
+    def execute(self, task, **kwargs):
+        return f"published: {task}"
+
+
+def test_batch_uses_the_orchestrators_plugin_routing(tmp_path):
+    from agents.orchestrator import Orchestrator
+    orchestrator = Orchestrator(llm=None)
+    orchestrator.register_plugin(WordPressPlugin())
+    for name in ('researcher', 'coder', 'executor'):
+        orchestrator.sub_agents.add(name, FakeAgent())
+
+    tasks, out = tmp_path / "tasks.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(tasks, [{'id': 'wp', 'task': 'Draft a WordPress blog post'}, {'id': 'x', 'task': 'zxqv blorp'}])
+    BatchRunner(orchestrator, workers=2).run(str(tasks), str(out))
+    rows = {r['id']: r for r in map(json.loads, out.read_text().splitlines())}
+    assert (rows['wp']['agent'], rows['wp']['result']) == ('wordpress', "published: Draft a WordPress blog post")
+    assert (rows['x']['status'], rows['x']['result']) == ('ok', "done: zxqv blorp")
+
+
+def test_lines_that_are_not_task_records_are_skipped(tmp_path):
+    tasks, out = tmp_path / "tasks.jsonl", tmp_path / "out.jsonl"
+    tasks.write_text('[1, 2]\n42\nnull\n"plain task"\n{"id": "t", "task": "object task"}\n')
+    out.write_text('7\n')      # A partial line left by an interrupted run
+    summary = BatchRunner(FakeOrchestrator(), workers=2).run(str(tasks), str(out))
+    assert (summary['ok'], summary['error']) == (2, 0)
+    rows = [json.loads(line) for line in out.read_text().splitlines()[1:]]
+    assert sorted(r['task'] for r in rows) == ["object task", "plain task"]
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from utils import command_capture
+from utils.command_capture import CommandCapture, clean_output
+
+
+@pytest.fixture
+def capture():
+    capture = CommandCapture()
+    yield capture
+    capture.close()
+
+
+def run(capture, job_id, command, output, exit_code=0):
+    capture.start(job_id, command)
+    capture.feed(job_id, output.encode())
+    capture.finish(job_id, exit_code, duration_s=0.5)
+
+
+def test_clean_output_strips_escapes_and_carriage_returns():
+    assert clean_output("\x1b[31merror\x1b[0m\r\n\x1b]0;title\x0710%\r100%") == "error\n10%100%"
+
+
+def test_small_results_are_verbatim_and_read_once(capture):
+    run(capture, 1, "ls", "a.txt\nb.txt\n")
+    run(capture, 2, "false", "", exit_code=1)
+    digest = capture.take_digest(1000)
+    assert "$ ls\n[finished, exit 0, 0.5s, 12 bytes]\na.txt\nb.txt\n" in digest
+    assert "$ false\n[finished, exit 1, 0.5s, 0 bytes]" in digest
+    assert capture.take_digest(1000) is None
+
+
+def test_large_results_keep_head_and_tail_on_line_boundaries(capture):
+    output = "".join(f"line {i:04d}\n" for i in range(2000))
+    run(capture, 1, "build", output)
+    digest = capture.take_digest(100)
+
+    assert len(digest) <= 100 * command_capture.CHARS_PER_TOKEN
+    assert "line 0000\n" in digest and digest.rstrip().endswith("line 1999")
+    head, tail = digest.split(" bytes omitted] …\n")
+    head_lines = head.split("\n")[2:-1]     # After the header, before "… [N"
+    assert len(head_lines) < len(tail.splitlines())     # The tail gets the bigger share
+    assert all(line.startswith("line ") and len(line) == 9 for line in head_lines + tail.splitlines())
+
+
+def test_output_past_the_spill_size_goes_to_a_temp_file(capture, monkeypatch):
+    monkeypatch.setattr(command_capture, "SPILL_BYTES", 1024)
+    monkeypatch.setattr(command_capture, "HEAD_BYTES", 256)
+    monkeypatch.setattr(command_capture, "TAIL_BYTES", 256)
+    capture.start(1, "yes")
+    for i in range(200):
+        capture.feed(1, f"chunk {i:03d}\n".encode())
+    capture.finish(1, 0)
+
+    captured = capture.get(1)
+    with open(captured.spill_path, "rb") as f:
+        assert f.read().decode().count("chunk") == 200
+    digest = capture.take_digest(1000)
+    assert "chunk 000" in digest and "chunk 199" in digest
+    assert f"full output: {captured.spill_path}" in digest
+
+    capture.close()
+    assert not os.path.exists(captured.spill_path)
+
+
+def test_oldest_results_are_forgotten():
+    capture = CommandCapture(max_captured=2)
+    for job_id in range(1, 4):
+        run(capture, job_id, f"echo {job_id}", f"{job_id}\n")
+    digest = capture.take_digest(1000)
+    assert "$ echo 1" not in digest and "$ echo 2" in digest and "$ echo 3" in digest
+    capture.close()
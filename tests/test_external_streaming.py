@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.external_agents import ChatGPTAgent, ClaudeAgent, GeminiAgent, PerplexityAgent
+from agents.http_transport import HttpTransport, iter_sse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "sse")
+PIECE = 7   # Replay in tiny chunks so events and UTF-8 characters straddle reads
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    hold = None     # threading.Event: pause before the last event until set
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        name = self.path.strip("/").split(":")[0].split("?")[0]
+        path = os.path.join(FIXTURES, f"{name}.sse")
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        head, _, tail = body.rstrip(b"\n").rpartition(b"\n\n")
+        for part, pause in ((head + b"\n\n", True), (tail + b"\n\n", False)):
+            for i in range(0, len(part), PIECE):
+                piece = part[i:i + PIECE]
+                self.wfile.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+                self.wfile.flush()
+            if pause and self.hold is not None:
+                self.hold.wait(5)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    ReplayHandler.hold = None
+    server.shutdown()
+
+
+def make(agent_class, endpoint):
+    agent = agent_class("test-key")
+    agent.endpoint = endpoint
+    agent.transport = HttpTransport()
+    return agent
+
+
+def test_sse_parser_handles_multiline_data_and_comments():
+    lines = ["event: a", "data: one", "data: two", "", ": ping", "data: x", ""]
+    assert list(iter_sse(lines)) == [("a", "one\ntwo"), ("message", "x")]
+
+
+@pytest.mark.parametrize("agent_class, path, expected", [
+    (ClaudeAgent, "/anthropic", ["Hello", " from", " Claude — ünïcode ✓"]),
+    (ChatGPTAgent, "/openai", ["Hello", " from", " ChatGPT"]),
+    (GeminiAgent, "/gemini:generateContent", ["Hello", " from Gemini"]),
+])
+def test_providers_yield_text_deltas(server, agent_class, path, expected):
+    assert list(make(agent_class, server + path).stream_execute("hi")) == expected
+
+
+def test_perplexity_appends_streamed_citations(server):
+    deltas = list(make(PerplexityAgent, server + "/perplexity").stream_execute("capital of France?"))
+    assert deltas[:2] == ["Paris", " is the capital."]
+    assert "1. https://example.com/a" in deltas[2]
+
+
+def test_deltas_arrive_before_the_stream_ends(server):
+    ReplayHandler.hold = threading.Event()
+    stream = make(ChatGPTAgent, server + "/openai").stream_execute("hi")
+    assert next(stream) == "Hello"      # Server is still holding back [DONE]
+    ReplayHandler.hold.set()
+    assert list(stream) == [" from", " ChatGPT"]
+
+
+def test_http_errors_become_error_deltas(server):
+    agent = make(ChatGPTAgent, server + "/missing")
+    deltas = list(agent.stream_execute("hi"))
+    assert len(deltas) == 1 and deltas[0].startswith("❌ ChatGPT Error")
+    assert agent.last_call_failed
+
+
+def test_errors_after_some_text_mark_the_call_failed(server):
+    agent = make(ClaudeAgent, server + "/anthropic_overloaded")
+    deltas = list(agent.stream_execute("hi"))
+    assert deltas[0] == "Hello" and deltas[1].startswith("❌ Claude Error: Overloaded")
+    assert agent.last_call_failed
+
+    agent.endpoint = server + "/anthropic"
+    assert "".join(agent.stream_execute("hi")) == "Hello from Claude — ünïcode ✓"
+    assert not agent.last_call_failed
+
+
+def test_orchestrator_records_a_mid_stream_error_as_a_failure(server, tmp_path, monkeypatch):
+    from agents.smart_orchestrator import SmartOrchestrator
+    monkeypatch.chdir(tmp_path)     # MemorySystem reads ./memory
+    orchestrator = SmartOrchestrator(llm=None, stats_file=None)
+    orchestrator.external_agents = {'claude': make(ClaudeAgent, server + "/anthropic_overloaded")}
+
+    deltas = list(orchestrator.stream_execute("analyze this"))
+    assert deltas[0] == "Hello"
+    stats = orchestrator.stats_report()['Claude']
+    assert (stats['calls'], stats['failures']) == (0, 1)
+
+
+class EndlessHandler(BaseHTTPRequestHandler):
+    """Streams OpenAI-style tokens until the client hangs up"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    sent = None      # Events written before the client hung up
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        event = b'data: {"choices": [{"delta": {"content": "x"}}]}\n\n'
+        try:
+            for i in range(500):
+                self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                self.wfile.flush()
+                time.sleep(0.01)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            EndlessHandler.sent = i
+
+    def log_message(self, *args):
+        pass
+
+
+class QuickAgent:
+    def execute(self, task):
+        time.sleep(0.05)
+        return "quick answer"
+
+
+def test_hedge_loser_hangs_up_its_stream(monkeypatch):
+    from agents import execution_policy
+    from agents.execution_policy import ExecutionEngine
+    monkeypatch.setattr(execution_policy, "DEFAULT_HEDGE_AFTER_S", 0.1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EndlessHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        slow = make(ChatGPTAgent, f"http://127.0.0.1:{server.server_address[1]}/openai")
+        slow.name = "hedge-loser"
+        engine = ExecutionEngine(max_workers=2)
+        result = engine.run_hedged([("slow", slow), ("quick", QuickAgent())], "hi")
+        assert (result.name, result.text, result.hedged) == ("quick", "quick answer", True)
+
+        deadline = time.monotonic() + 5
+        while EndlessHandler.sent is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert EndlessHandler.sent is not None and EndlessHandler.sent < 100     # Not all 500 tokens
+        assert 'slow' not in engine.stats.report()      # Being cut off is not the agent's failure
+        engine.shutdown()
+    finally:
+        server.shutdown()
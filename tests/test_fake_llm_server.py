@@ -0,0 +1,77 @@
+import os
+import time
+
+import pytest
+import requests
+
+from agents.external_agents import ChatGPTAgent, ClaudeAgent, GeminiAgent
+from agents.http_transport import HttpTransport
+from agents.resilience import RetryPolicy
+from tools.fake_llm_server import FakeLLMServer, FakeLLMConfig
+
+CASSETTE = os.path.join(os.path.dirname(__file__), "fixtures", "cassettes", "basic.json")
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer(FakeLLMConfig(reply="echo: {prompt}", cassette=CASSETTE)) as server:
+        yield server
+
+
+def make(agent_class, url, name=None):
+    agent = agent_class("test-key")
+    agent.endpoint = url
+    agent.transport = HttpTransport()
+    agent.retry_policy = RetryPolicy(max_retries=1, sleep=lambda s: None)
+    if name:
+        agent.name = name      # Separate circuit breaker per test
+    return agent
+
+
+def test_ollama_endpoints_work_with_chat_ollama(server):
+    from langchain_ollama import ChatOllama
+    llm = ChatOllama(model="fake-model", base_url=server.url)
+
+    assert llm.invoke("What is the capital of France?").content == "The capital of France is Paris."
+    assert "".join(c.content for c in llm.stream("hello")) == "echo: hello"
+    tags = requests.get(f"{server.url}/api/tags").json()
+    assert [m['name'] for m in tags['models']] == ["fake-model"]
+    generated = requests.post(f"{server.url}/api/generate", json={"prompt": "hi", "stream": False}).json()
+    assert generated['response'] == "echo: hi" and generated['done']
+
+
+@pytest.mark.parametrize("agent_class,path", [
+    (ClaudeAgent, "/v1/messages"),
+    (ChatGPTAgent, "/v1/chat/completions"),
+    (GeminiAgent, "/v1beta/models/fake:generateContent"),
+])
+def test_provider_endpoints_stream_and_report_usage(server, agent_class, path):
+    agent = make(agent_class, server.url + path)
+    assert agent.execute("ping") == "echo: ping"
+    assert agent.last_usage['output_tokens'] == 2
+    assert "".join(agent.stream_execute("ping")) == "echo: ping"
+    assert agent.last_usage['output_tokens'] == 2
+
+
+def test_cassette_errors_and_timing(server):
+    agent = make(ChatGPTAgent, server.url + "/v1/chat/completions", name="ChatGPT-fake-server")
+    assert agent.execute("the model is overloaded").startswith("❌ ChatGPT Error")
+    assert server.stats['errors'] == 2     # First try + one retry
+
+    start = time.monotonic()
+    stream = agent.stream_execute("slow please")
+    assert next(stream) == "one "
+    assert time.monotonic() - start >= 0.2
+    assert "".join(stream) == "two three"
+
+
+def test_error_injection_is_seeded():
+    def statuses():
+        with FakeLLMServer(FakeLLMConfig(error_rate=0.5, error_status=429, seed=3)) as server:
+            return [requests.post(f"{server.url}/v1/chat/completions",
+                                  json={"messages": [{"role": "user", "content": "x"}]}).status_code
+                    for _ in range(10)]
+
+    first = statuses()
+    assert first == statuses()
+    assert set(first) == {200, 429}
@@ -0,0 +1,129 @@
+from agents.coder import CoderAgent
+from agents.llm_cache import LLMCache, CachedLLM, SEMANTIC
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class CountingLLM:
+    model = "fake"
+    temperature = 0.7
+
+    def __init__(self, reply="def add(a, b): return a + b"):
+        self.reply = reply
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return Message(self.reply)
+
+    def stream(self, prompt):
+        self.calls += 1
+        for word in self.reply.split(" "):
+            yield Message(word + " ")
+
+
+def test_exact_hits_ignore_whitespace_and_respect_ttl(tmp_path):
+    clock = FakeClock()
+    cache = LLMCache(str(tmp_path / "cache.db"), ttl_s=60, mode="exact", clock=clock)
+    cache.put("m", 0.7, "  write add()\n\n\n\nplease  ", "answer")
+
+    assert cache.get("m", 0.7, "write add()\n\nplease") == "answer"
+    assert cache.get("m", 0.2, "write add()\n\nplease") is None     # Temperature is part of the key
+    assert cache.get("other", 0.7, "write add()\n\nplease") is None
+
+    clock.now += 61
+    assert cache.get("m", 0.7, "write add()\n\nplease") is None
+
+
+def test_lru_eviction_by_size(tmp_path):
+    clock = FakeClock()
+    cache = LLMCache(str(tmp_path / "cache.db"), max_bytes=350, mode="exact", clock=clock)
+    for i in range(3):
+        clock.now += 1
+        cache.put("m", 0, f"prompt {i}", "x" * 100)
+    clock.now += 1
+    cache.get("m", 0, "prompt 0")       # Recently used, so prompt 1 is evicted instead
+    clock.now += 1
+    cache.put("m", 0, "prompt 3", "x" * 100)
+
+    assert cache.get("m", 0, "prompt 0") is not None
+    assert cache.get("m", 0, "prompt 1") is None
+    assert cache.get_stats()["bytes"] <= 350
+
+
+def test_semantic_mode_matches_close_prompts(tmp_path):
+    vectors = {"capital of france?": [1.0, 0.0], "what is france's capital?": [0.98, 0.05],
+               "tallest mountain?": [0.0, 1.0]}
+    cache = LLMCache(str(tmp_path / "cache.db"), mode=SEMANTIC, similarity=0.95,
+                     embed=lambda text: vectors[text.lower()])
+    cache.put("m", 0, "capital of France?", "Paris")
+
+    assert cache.get("m", 0, "What is France's capital?") == "Paris"
+    assert cache.get("m", 0, "Tallest mountain?") is None
+    assert cache.get_stats()['semantic_hits'] == 1
+
+
+def test_agents_share_cache_with_per_call_opt_out(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"), mode="exact")
+    llm = CountingLLM()
+    coder = CoderAgent(CachedLLM(llm, cache))
+
+    first = coder.execute("add two numbers")
+    assert coder.execute("add two numbers") == first
+    assert llm.calls == 1
+    coder.execute("add two numbers", cache=False)
+    assert llm.calls == 2
+
+    # Streams are stored too, and a cached answer streams back as one chunk
+    chunks = [c.content for c in coder.llm.stream("stream me")]
+    assert [c.content for c in coder.llm.stream("stream me")] == ["".join(chunks)]
+    assert llm.calls == 3
+
+
+def test_errors_are_not_cached(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"), mode="exact")
+    llm = CountingLLM(reply="❌ model not found")
+    wrapped = CachedLLM(llm, cache)
+    wrapped.invoke("hi")
+    wrapped.invoke("hi")
+    assert llm.calls == 2
+
+
+class CountingSearch:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, max_results=5):
+        self.calls += 1
+        return f"result set #{self.calls} for {query}"    # Differs on every search
+
+
+def test_research_answers_are_cached_by_task_before_searching(tmp_path):
+    from agents.researcher import ResearchAgent
+    cache = LLMCache(str(tmp_path / "cache.db"), mode="exact")
+    llm = CountingLLM(reply="Paris is the capital")
+    researcher = ResearchAgent(CachedLLM(llm, cache))
+    researcher._search_tool = search = CountingSearch()
+
+    first = researcher.execute("capital of France")
+    assert researcher.execute("capital of France") == first
+    assert "".join(researcher.stream_execute("capital of France")) == first
+    assert (search.calls, llm.calls) == (1, 1)
+
+    streamed = "".join(researcher.stream_execute("capital of Spain"))
+    assert researcher.execute("capital of Spain") == streamed
+    assert (search.calls, llm.calls) == (2, 2)
+
+    researcher.execute("capital of France", cache=False)
+    assert (search.calls, llm.calls) == (3, 3)
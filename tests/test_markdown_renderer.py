@@ -0,0 +1,64 @@
+from ui import markdown_renderer
+from ui.markdown_renderer import StreamingMarkdownRenderer, render_markdown
+
+SAMPLE = """# Plan
+
+Some **bold**, *italic* and `inline <code>` with a [link](https://example.com).
+
+- first item
+- second item
+  continued
+
+```python
+def add(a, b):
+    return a + b
+```
+
+> quoted line
+Trailing paragraph
+"""
+
+
+def test_incremental_matches_full_render_at_every_prefix():
+    renderer = StreamingMarkdownRenderer()
+    for i in range(len(SAMPLE) + 1):
+        assert renderer.render("msg", SAMPLE[:i]) == render_markdown(SAMPLE[:i])
+
+
+def test_closed_blocks_are_not_rendered_again(monkeypatch):
+    renderer = StreamingMarkdownRenderer()
+    renderer.render("msg", "# Title\n\nfirst paragraph\n\nsecond")
+
+    rendered = []
+    original = markdown_renderer.render_block
+    monkeypatch.setattr(markdown_renderer, "render_block",
+                        lambda block: rendered.append(block.kind) or original(block))
+
+    renderer.render("msg", "# Title\n\nfirst paragraph\n\nsecond paragraph")
+    assert rendered == ["para"]
+
+
+def test_code_highlighted_only_after_fence_closes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(markdown_renderer, "highlight_code",
+                        lambda code, lang="": calls.append(lang) or code)
+
+    renderer = StreamingMarkdownRenderer()
+    renderer.render("msg", "```python\nx = 1\n")
+    assert calls == []
+
+    renderer.render("msg", "```python\nx = 1\n```\n")
+    renderer.render("msg", "```python\nx = 1\n```\nafter")
+    assert calls == ["python"]
+
+
+def test_html_is_escaped():
+    html = render_markdown("a <b>tag</b> & more")
+    assert "&lt;b&gt;" in html
+    assert "<b>tag</b>" not in html
+
+
+def test_non_append_edit_resets_state():
+    renderer = StreamingMarkdownRenderer()
+    renderer.render("msg", "old paragraph\n\nmore")
+    assert renderer.render("msg", "new text") == render_markdown("new text")
@@ -0,0 +1,117 @@
+import threading
+import time
+
+from agents.memory import MemorySystem
+from agents.model_scheduler import AdaptiveScheduler, ModelRung, UPGRADE_WINDOW_S
+
+
+class FakeObserver:
+    def __init__(self, status="HEALTHY", cpu_ewma=10.0, cpu_p95=10.0, available_gb=32.0):
+        self.status = status
+        self.cpu_ewma = cpu_ewma
+        self.cpu_p95 = cpu_p95
+        self.available_gb = available_gb
+
+    def get_system_status(self):
+        return {'status': self.status, 'cpu': {'usage': self.cpu_ewma},
+                'memory': {'used_percent': 50.0, 'available_gb': self.available_gb}}
+
+    def get_load_summary(self, seconds=UPGRADE_WINDOW_S):
+        return {'cpu': {'ewma': self.cpu_ewma, 'p95': self.cpu_p95}}
+
+
+LADDER = [ModelRung("small:3b", 2048), ModelRung("medium:8b", 4096), ModelRung("large:14b", 8192)]
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_ladder_steps_down_under_load_and_up_one_rung_at_a_time():
+    observer = FakeObserver()
+    scheduler = AdaptiveScheduler(observer, LADDER)
+    assert scheduler.choose().model == "large:14b"
+
+    observer.status = "STRESSED"
+    assert scheduler.choose().model == "small:3b"
+
+    observer.status, observer.cpu_p95 = "HEALTHY", 10.0
+    assert [scheduler.choose().num_ctx for _ in range(2)] == [4096, 8192]
+
+    observer.cpu_ewma = 90.0
+    assert scheduler.choose().reason.startswith("cpu ewma")
+    assert scheduler.tier == 1
+
+
+def test_ladder_never_picks_a_model_that_does_not_fit_in_memory():
+    observer = FakeObserver(available_gb=4.0)
+    scheduler = AdaptiveScheduler(observer, LADDER)
+    scheduler.tier = 0
+    decision = scheduler.choose()
+    assert decision.model == "small:3b"     # 8b needs ~5.8 GB free
+
+
+def test_background_jobs_wait_for_load_to_drop():
+    observer = FakeObserver(status="STRESSED")
+    scheduler = AdaptiveScheduler(observer, LADDER, poll_s=0.01)
+    ran = []
+
+    assert scheduler.run_background(ran.append, 1) is True
+    assert scheduler.run_background(ran.append, 2) is True
+    time.sleep(0.05)
+    assert ran == [] and scheduler.deferred_count() == 2
+
+    observer.status = "HEALTHY"
+    assert wait_until(lambda: ran == [1, 2])
+    assert scheduler.run_background(ran.append, 3) is False
+    assert wait_until(lambda: ran == [1, 2, 3])
+
+
+def test_jobs_appended_while_the_drain_thread_exits_still_run():
+    observer = FakeObserver(status="STRESSED")
+    scheduler = AdaptiveScheduler(observer, LADDER, poll_s=0.001)
+    ran = []
+    lock = threading.Lock()
+
+    def job(i):
+        with lock:
+            ran.append(i)
+
+    def submit(start):
+        for i in range(start, start + 200):
+            scheduler.run_background(job, i)
+            observer.status = "STRESSED" if i % 3 else "HEALTHY"
+
+    threads = [threading.Thread(target=submit, args=(n * 200,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    observer.status = "HEALTHY"
+    assert wait_until(lambda: len(ran) == 800)
+    assert sorted(ran) == list(range(800))
+
+
+def test_flush_runs_deferred_jobs_even_while_stressed():
+    scheduler = AdaptiveScheduler(FakeObserver(status="STRESSED"), LADDER, poll_s=0.01)
+    ran = []
+    scheduler.run_background(ran.append, "saved")
+    scheduler.flush(timeout=1)
+    assert ran == ["saved"] and scheduler.deferred_count() == 0
+
+
+def test_conversation_writes_are_saved_in_the_background(tmp_path, monkeypatch):
+    scheduler = AdaptiveScheduler(FakeObserver(status="STRESSED"), LADDER, poll_s=0.01)
+    monkeypatch.setattr("agents.model_scheduler._shared", scheduler)
+    path = tmp_path / "context.json"
+    memory = MemorySystem(str(path))
+
+    memory.add_conversation("hi", "hello", "Executor")
+    memory.add_conversation("again", "hello again", "Executor")
+    assert not path.exists() and scheduler.deferred_count() == 1   # Coalesced into one save
+
+    scheduler.flush(timeout=1)
+    assert [c['user'] for c in MemorySystem(str(path)).conversations] == ["hi", "again"]
@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+from plugins.plugin_base import AgentPlugin
+from plugins.plugin_host import PluginHost, PluginHostError, PluginTimeout
+
+
+class EchoPlugin(AgentPlugin):
+    def __init__(self, llm):
+        self.llm = llm
+        self.name = "Echo"
+        self.description = "Echoes tasks"
+        self.capabilities = ['echo']
+
+    def execute(self, task, **kwargs):
+        if task == "crash":
+            os._exit(3)
+        if task == "hang":
+            time.sleep(30)
+        if task == "raise":
+            raise ValueError("bad task")
+        return f"{os.getpid()}:{task}:{kwargs.get('suffix', '')}"
+
+    def stream_execute(self, task, **kwargs):
+        for word in task.split():
+            yield word + " "
+
+
+SPEC = f"{__file__}:EchoPlugin"
+
+
+@pytest.fixture
+def host():
+    host = PluginHost(max_workers=1, timeout_s=10, use_llm=False)
+    yield host
+    host.shutdown()
+
+
+def test_calls_reuse_a_warm_worker_and_stream(host):
+    first = host.execute(SPEC, "hi", suffix="!")
+    second = host.execute(SPEC, "there")
+    assert first.endswith(":hi:!") and second.endswith(":there:")
+    assert first.split(":")[0] == second.split(":")[0]
+    assert list(host.stream(SPEC, "a b c")) == ["a ", "b ", "c "]
+
+    plugin = host.plugin(SPEC)
+    assert (plugin.name, plugin.capabilities) == ("Echo", ['echo'])
+    assert host.get_stats()['workers_started'] == 1
+
+
+def test_timeouts_and_crashes_only_cost_the_worker(host):
+    pid = host.execute(SPEC, "x").split(":")[0]
+
+    with pytest.raises(PluginTimeout):
+        host.execute(SPEC, "hang", timeout_s=0.5)
+    with pytest.raises(PluginHostError, match="exited"):
+        host.execute(SPEC, "crash")
+    with pytest.raises(PluginHostError, match="ValueError: bad task"):
+        host.execute(SPEC, "raise")
+
+    assert host.execute(SPEC, "ok").split(":")[0] != pid
+    assert host.plugin(SPEC).execute("crash").startswith("❌ Plugin Echo failed")
+    stats = host.get_stats()
+    assert (stats['timeouts'], stats['crashes']) == (1, 2)
@@ -0,0 +1,56 @@
+from plugins.plugin_base import AgentPlugin
+from plugins.plugin_registry import KeywordAutomaton, PluginRegistry
+
+
+class StubPlugin(AgentPlugin):
+    def __init__(self, name, capabilities):
+        self.llm = None
+        self.name = name
+        self.capabilities = capabilities
+
+    def execute(self, task, **kwargs):
+        return task
+
+
+class CustomPlugin(StubPlugin):
+    def can_handle(self, task):
+        return task.startswith("custom:")
+
+
+def test_automaton_finds_overlapping_keywords():
+    found = sorted(k for _, k in KeywordAutomaton(["he", "she", "hers", "photo", "photography"]).find("ushers photography"))
+    assert found == ["he", "hers", "photo", "photography", "she"]
+
+
+def test_registry_ranks_plugins_and_matches_can_handle():
+    registry = PluginRegistry()
+    wordpress = StubPlugin("WordPress", ['wordpress', 'wp', 'seo', 'post', 'page'])
+    photo = StubPlugin("Photography", ['photo', 'image', 'camera', 'exif', 'portfolio', 'client'])
+    for plugin in (wordpress, photo, CustomPlugin("Custom", [])):
+        registry.register(plugin)
+
+    task = "Write SEO keywords for my Photo portfolio page"
+    matches = registry.match(task)
+    # Tied scores: the longer matched capability wins
+    assert [m.name for m in matches] == ["Photography", "WordPress"]
+    assert {m.name for m in matches} == {p.name for p in (wordpress, photo) if p.can_handle(task)}
+    assert matches[0].score == 2.0 and matches[0].keywords == ["photo", "portfolio"]
+
+    # Hits inside longer words count for less than whole words
+    assert registry.best("photographers' clients wanted").name == "Photography"
+    assert registry.best("reposting a wpa config").score == 1.0
+    assert not registry.best("reposting a wpa config").whole_word
+    assert registry.best("publish the post").whole_word
+
+    assert registry.best("custom: anything").name == "Custom"
+    registry.unregister("Photography")
+    assert registry.best("photo portfolio") is None
+
+
+def test_orchestrator_only_hands_whole_word_hits_to_plugins():
+    from agents.orchestrator import Orchestrator
+    orchestrator = Orchestrator(llm=None)
+    orchestrator.register_plugin(StubPlugin("WordPress", ['wordpress', 'wp', 'post']))
+
+    assert orchestrator.analyze_task("Publish a WordPress post about spring") == "WordPress"
+    assert orchestrator.analyze_task("Write a Python function to tune postgres wpa settings") == "coder"
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from agents.rate_limiter import RateLimiter, RateLimitTimeout, estimate_tokens, limits_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_requests_per_minute_queue_in_arrival_order():
+    clock = FakeClock()
+    limiter = RateLimiter("test", rpm=60, clock=clock)    # 1 request/second, burst of 60
+
+    waits = [limiter.reserve() for _ in range(62)]
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0)
+    assert waits[61] == pytest.approx(2.0)
+
+    clock.now = 10.0
+    assert limiter.reserve() == pytest.approx(0.0)     # Refilled 10 slots, 2 were owed
+    assert limiter.snapshot()['waited'] == 2
+
+
+def test_tokens_per_minute_and_max_wait():
+    clock = FakeClock()
+    limiter = RateLimiter("test", tpm=6000, clock=clock)    # 100 tokens/second
+
+    assert limiter.reserve(5000) == 0.0
+    assert limiter.reserve(2000) == pytest.approx(10.0)
+    with pytest.raises(RateLimitTimeout):
+        limiter.reserve(1000, max_wait_s=5)
+    # A rejected call reserves nothing
+    clock.now = 20.0
+    assert limiter.reserve(1000) == 0.0
+    assert limiter.snapshot()['rejected'] == 1
+
+
+def test_acquire_async_does_not_block_the_loop():
+    limiter = RateLimiter("test", rpm=600)     # 10/second
+    for _ in range(600):
+        limiter.reserve()
+
+    async def main():
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        waited, _ = await asyncio.gather(limiter.acquire_async(), ticker())
+        return waited, ticks
+
+    waited, ticks = asyncio.run(main())
+    assert waited > 0
+    assert len(ticks) == 3
+
+
+def test_model_limits_override_provider_limits():
+    rate_limits = {'rpm': 50, 'tpm': 40000, 'models': {'small': {'rpm': 5}}}
+    assert limits_for(rate_limits, 'big') == {'rpm': 50, 'tpm': 40000}
+    assert limits_for(rate_limits, 'small') == {'rpm': 5, 'tpm': 40000}
+    assert limits_for(None, 'any') == {}
+    assert estimate_tokens("x" * 400, max_tokens=16) == 116
@@ -0,0 +1,115 @@
+import pytest
+import requests
+
+from agents.external_agents import ChatGPTAgent
+from agents.rate_limiter import RateLimitTimeout
+from agents.resilience import (CircuitBreaker, CircuitOpenError, RetryPolicy, CLOSED, OPEN, HALF_OPEN,
+                               parse_retry_after)
+
+
+def response(status, body=b'{"choices": [{"message": {"content": "ok"}}]}', headers=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = body
+    r.headers.update(headers or {})
+    return r
+
+
+class ScriptedTransport:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        item = self.responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+def make_agent(transport, sleeps, name="ChatGPT-test"):
+    agent = ChatGPTAgent("key")
+    agent.name = name
+    agent.transport = transport
+    agent.retry_policy = RetryPolicy(max_retries=2, base_delay_s=1, sleep=sleeps.append)
+    return agent
+
+
+def test_retries_429_and_5xx_honoring_retry_after():
+    sleeps = []
+    transport = ScriptedTransport(response(429, headers={"Retry-After": "3"}),
+                                  requests.ConnectionError("reset"),
+                                  response(200))
+    agent = make_agent(transport, sleeps, "retry-test")
+    assert agent.execute("hi") == "ok"
+    assert transport.calls == 3
+    assert sleeps[0] == 3.0 and 0 <= sleeps[1] <= 2
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_client_errors_are_not_retried_and_do_not_trip_the_breaker():
+    sleeps = []
+    agent = make_agent(ScriptedTransport(response(401, b'{}')), sleeps, "auth-test")
+    assert agent.execute("hi").startswith("❌ ChatGPT Error")
+    assert sleeps == [] and agent.breaker.state == CLOSED
+
+
+def test_breaker_opens_sheds_calls_and_recovers_after_a_probe():
+    now = [0.0]
+    breaker = CircuitBreaker("svc", failure_threshold=2, reset_timeout_s=10, clock=lambda: now[0])
+    policy = RetryPolicy(max_retries=0, sleep=lambda s: None)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise requests.Timeout("slow")
+
+    for _ in range(2):
+        try:
+            policy.run(failing, breaker)
+        except requests.Timeout:
+            pass
+    assert breaker.state == OPEN and breaker.is_open()
+
+    try:
+        policy.run(failing, breaker)
+    except Exception as e:
+        assert "circuit open" in str(e)
+    assert len(calls) == 2      # Rejected without calling the provider
+
+    now[0] = 11
+    assert breaker.state == HALF_OPEN and not breaker.is_open()
+    assert policy.run(lambda: "pong", breaker) == "pong"
+    assert breaker.snapshot()['state'] == CLOSED
+
+
+def test_open_breaker_rejects_before_using_rate_limit_capacity():
+    now = [0.0]
+    breaker = CircuitBreaker("svc", failure_threshold=1, reset_timeout_s=10, clock=lambda: now[0])
+    breaker.record_failure()
+    waits = []
+    with pytest.raises(CircuitOpenError):
+        RetryPolicy(sleep=lambda s: None).run(lambda: "pong", breaker, lambda: waits.append(1))
+    assert waits == []
+
+    # A half-open probe that the rate limiter turns away is given back, not lost
+    now[0] = 11
+    def limited():
+        raise RateLimitTimeout("svc rate limit")
+    with pytest.raises(RateLimitTimeout):
+        RetryPolicy(sleep=lambda s: None).run(lambda: "pong", breaker, limited)
+    assert breaker.state == HALF_OPEN and not breaker.is_open()
+    assert RetryPolicy(sleep=lambda s: None).run(lambda: "pong", breaker, lambda: None) == "pong"
+
+
+def test_open_breaker_message_does_not_blame_the_api_key():
+    sleeps = []
+    transport = ScriptedTransport()
+    agent = make_agent(transport, sleeps, "open-test")
+    for _ in range(agent.breaker.failure_threshold):
+        agent.breaker.record_failure()
+    for result in (agent.execute("hi", cache=False), "".join(agent.stream_execute("hi"))):
+        assert result.startswith("❌ ChatGPT skipped: open-test is unavailable (circuit open")
+        assert "API key" not in result
+    assert transport.calls == 0 and agent.last_call_failed
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agents.single_flight import CoalescingLLM
+
+
+class Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class GatedLLM:
+    """Blocks every generation until `release` is set"""
+
+    def __init__(self, fail=False):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+        self.fail = fail
+
+    def invoke(self, prompt):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return Message(f"answer to {prompt}")
+
+    def stream(self, prompt):
+        self.calls += 1
+        for word in ["one ", "two ", "three"]:
+            self.started.set()
+            self.release.wait(5)
+            yield Message(word)
+
+
+def wait_for_waiters(llm, flights, n):
+    llm.started.wait(5)
+    for _ in range(500):
+        if flights.stats['coalesced'] + flights.stats['stream_subscribers'] >= n:
+            return
+        threading.Event().wait(0.01)
+
+
+def test_concurrent_identical_invokes_share_one_generation():
+    llm = GatedLLM()
+    wrapped = CoalescingLLM(llm)
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(wrapped.invoke, "route this") for _ in range(4)]
+        wait_for_waiters(llm, wrapped.flights, 3)
+        llm.release.set()
+        results = [f.result(5) for f in futures]
+
+    assert llm.calls == 1
+    assert {r.content for r in results} == {"answer to route this"}
+    # Once finished, the next call generates again
+    wrapped.invoke("route this")
+    assert llm.calls == 2
+
+
+def test_followers_get_the_leaders_error():
+    llm = GatedLLM(fail=True)
+    wrapped = CoalescingLLM(llm)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(wrapped.invoke, "x") for _ in range(3)]
+        wait_for_waiters(llm, wrapped.flights, 2)
+        llm.release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                f.result(5)
+    assert llm.calls == 1
+
+
+def test_streams_fan_out_including_late_joiners():
+    llm = GatedLLM()
+    llm.release.set()
+    wrapped = CoalescingLLM(llm)
+    first = wrapped.stream("tell me")
+    assert next(first).content == "one "
+
+    late = wrapped.stream("tell me")        # Joins mid-stream and replays from the start
+    assert [m.content for m in late] == ["one ", "two ", "three"]
+    assert [m.content for m in first] == ["two ", "three"]
+    assert llm.calls == 1
+    assert wrapped.flights.get_stats()['in_flight'] == 0
+
+
+def test_concurrent_stream_consumers_share_the_model_stream():
+    llm = GatedLLM()
+    wrapped = CoalescingLLM(llm)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(lambda: "".join(m.content for m in wrapped.stream("hi"))) for _ in range(3)]
+        wait_for_waiters(llm, wrapped.flights, 2)
+        llm.release.set()
+        assert [f.result(5) for f in futures] == ["one two three"] * 3
+    assert llm.calls == 1
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from agents.task_planner import DagExecutor, SubTask, TaskPlanner, merge_results, validate_dag
+
+
+def plan(task):
+    return [(n.task, n.depends_on) for n in TaskPlanner().plan(task)]
+
+
+@pytest.mark.parametrize("task", [
+    "Explain the pros and cons of Rust and Go",
+    "Write a function that reads a file and parses the JSON",
+    "Tell me about salt and pepper shakers",
+    "Explain how to read and write files in Python",
+    "Find the next prime after 100",
+    "Use e.g. numpy to plot sin and cos",
+])
+def test_single_step_requests_are_not_split(task):
+    assert plan(task) == [(task, [])]
+
+
+def test_and_splits_only_before_a_new_verb_clause():
+    assert plan("Research the latest Python release and write a script that uses its new features") == [
+        ("Research the latest Python release", []),
+        ("write a script that uses its new features", ["s1"]),      # "its" refers back
+    ]
+    assert plan("research the latest python release, and write a script that prints hello") == [
+        ("research the latest python release", []),
+        ("write a script that prints hello", []),                  # A relative "that" is not a reference
+    ]
+    assert plan("Look up the Rust release notes and explain the pros and cons of async") == [
+        ("Look up the Rust release notes", []),
+        ("explain the pros and cons of async", []),
+    ]
+
+
+def test_sequencing_connectors_and_aggregate_steps():
+    assert plan("research X, then write code for Y and summarize") == [
+        ("research X", []),
+        ("write code for Y", ["s1"]),
+        ("summarize", ["s1", "s2"]),
+    ]
+    assert plan("Search for flights to Tokyo. Then book the cheapest one") == [
+        ("Search for flights to Tokyo", []),
+        ("book the cheapest one", ["s1"]),
+    ]
+
+
+def test_semicolons_and_numbered_steps():
+    assert plan("Find a pancake recipe; find a waffle recipe") == [
+        ("Find a pancake recipe", []),
+        ("find a waffle recipe", []),
+    ]
+    assert plan("1. Research vector databases 2. Compare Pinecone and Weaviate 3. Draft an email") == [
+        ("Research vector databases", []),
+        ("Compare Pinecone and Weaviate", ["s1"]),
+        ("Draft an email", ["s2"]),
+    ]
+
+
+class RecordingAgent:
+    def __init__(self, name, barrier=None, fail=False):
+        self.name = name
+        self.barrier = barrier
+        self.fail = fail
+        self.inputs = []
+
+    def execute(self, task):
+        self.inputs.append(task)
+        if self.barrier:
+            self.barrier.wait(5)     # Only passes if the other branch runs at the same time
+        if self.fail:
+            raise RuntimeError("agent down")
+        return f"{self.name} did: {task.splitlines()[-1]}"
+
+
+def test_dag_runs_independent_steps_concurrently_and_passes_results_on():
+    barrier = threading.Barrier(2)
+    agents = {'researcher': RecordingAgent("researcher", barrier),
+              'coder': RecordingAgent("coder", barrier),
+              'executor': RecordingAgent("executor")}
+    nodes = [SubTask("s1", "researcher", "find A"), SubTask("s2", "coder", "write B"),
+             SubTask("s3", "executor", "summarize", ["s1", "s2"])]
+
+    order = [node.id for node in DagExecutor(agents, max_workers=2).run_iter(nodes)]
+    assert set(order[:2]) == {"s1", "s2"} and order[2] == "s3"
+    summary_input = agents['executor'].inputs[0]
+    assert "researcher did: find A" in summary_input and "coder did: write B" in summary_input
+    assert merge_results(nodes) == nodes[2].result     # The aggregate step is the answer
+
+
+def test_dag_reports_failed_steps_and_falls_back_to_executor():
+    agents = {'researcher': RecordingAgent("researcher", fail=True), 'executor': RecordingAgent("executor")}
+    nodes = [SubTask("s1", "researcher", "find A"), SubTask("s2", "vision", "describe B")]
+    result = DagExecutor(agents).run(nodes)
+    assert "❌ agent down" in result
+    assert "executor did: describe B" in result
+
+
+def test_invalid_plans_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        validate_dag([SubTask("s1", "executor", "x", ["s9"])])
+    with pytest.raises(ValueError, match="Cycle"):
+        validate_dag([SubTask("s1", "executor", "x", ["s2"]), SubTask("s2", "executor", "y", ["s1"])])
+
+
+def test_mcp_runs_compound_requests_as_a_plan(tmp_path, monkeypatch):
+    from mcp.core import MCP
+    monkeypatch.chdir(tmp_path)     # MemorySystem writes ./memory
+    mcp = MCP(llm=None)
+    for name in ('researcher', 'coder', 'executor'):
+        mcp.register_agent(name, RecordingAgent(name))
+
+    result, agent = mcp.process_task("Look up the Rust release notes, then write a script that uses them")
+    assert (result, agent) == ("coder did: Your step: write a script that uses them", "Planner")
+    assert "researcher did: Look up the Rust release notes" in mcp.agents['coder'].inputs[0]
+
+    result, agent = mcp.process_task("Explain the pros and cons of Rust and Go")
+    assert (result, agent) == ("executor did: Explain the pros and cons of Rust and Go", "Executor")
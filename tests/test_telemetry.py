@@ -0,0 +1,70 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import telemetry
+from utils.telemetry import TelemetrySampler
+
+
+class FakePsutil:
+    """Just enough of psutil for the sampler, with scripted CPU readings"""
+    NoSuchProcess = AccessDenied = RuntimeError
+
+    def __init__(self, cpu_readings):
+        self.cpu_readings = list(cpu_readings)
+        self.sent = 0
+
+    def cpu_percent(self, interval=None):
+        return self.cpu_readings.pop(0) if self.cpu_readings else 0.0
+
+    def cpu_count(self):
+        return 8
+
+    def virtual_memory(self):
+        return SimpleNamespace(percent=50.0, total=16 * 1024 ** 3, available=8 * 1024 ** 3)
+
+    def disk_usage(self, path):
+        return SimpleNamespace(percent=25.0, total=500 * 1024 ** 3, free=375 * 1024 ** 3)
+
+    def net_io_counters(self):
+        self.sent += 1024
+        return SimpleNamespace(bytes_sent=self.sent, bytes_recv=0)
+
+    def sensors_battery(self):
+        return None
+
+    def process_iter(self, attrs):
+        return []
+
+
+def test_placeholder_until_the_first_sample(monkeypatch):
+    monkeypatch.setattr(telemetry, "psutil", FakePsutil([0.0, 42.0]))
+    sampler = TelemetrySampler(interval=0.01)
+    before = sampler.latest()
+    assert before['placeholder'] and abs(before['timestamp'] - time.time()) < 5
+
+    sampler.start()
+    try:
+        assert sampler.wait_ready(5)
+    finally:
+        sampler.stop()
+    latest = sampler.latest()
+    assert not latest['placeholder'] and latest['cpu'] == 42.0 and latest['cpu_count'] == 8
+
+
+def test_ring_buffer_wraps_and_aggregates(monkeypatch):
+    monkeypatch.setattr(telemetry, "psutil", FakePsutil([10.0, 20.0, 30.0, 40.0, 50.0, 60.0]))
+    sampler = TelemetrySampler(capacity=4, ewma_alpha=0.5)
+    for _ in range(6):
+        sampler._sample_once()
+
+    window = sampler.window()
+    assert window[:, telemetry.FIELD_INDEX['cpu']].tolist() == [30.0, 40.0, 50.0, 60.0]    # Oldest first
+    assert (window[1:, 0] >= window[:-1, 0]).all()
+
+    stats = sampler.aggregate('cpu', seconds=None)
+    assert stats['samples'] == 4
+    assert (stats['mean'], stats['max']) == (45.0, 60.0)
+    assert stats['ewma'] == pytest.approx(50.3125)     # Over all six samples, not just the retained four
+    assert sampler.aggregate('memory')['mean'] == 50.0
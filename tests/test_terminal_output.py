@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from ui.terminal_output import (ANSI_BRIGHT_COLORS, ANSI_COLORS, AnsiParser,
+                                TerminalOutputPipeline, xterm_256_color)
+
+RED, BRIGHT_RED = ANSI_COLORS[1], ANSI_BRIGHT_COLORS[1]
+
+
+def feed_all(parser, *chunks):
+    segments = []
+    for chunk in chunks:
+        segments.extend(parser.feed(chunk))
+    return segments
+
+
+def test_sgr_colors_bold_and_reset():
+    segments = AnsiParser().feed("plain \x1b[31mred \x1b[1mbold\x1b[22m red\x1b[0m done")
+    assert segments == [("plain ", None), ("red ", RED), ("bold", BRIGHT_RED), (" red", RED), (" done", None)]
+
+
+def test_extended_colors():
+    parser = AnsiParser()
+    assert parser.feed("\x1b[38;5;196mx")[0][1] == xterm_256_color(196) == "#ff0000"
+    assert parser.feed("\x1b[38;2;1;2;3my")[0][1] == "#010203"
+    assert parser.feed("\x1b[48;5;21mz")[0][1] == "#010203"    # Backgrounds are ignored
+
+
+@pytest.mark.parametrize("chunks", [
+    ("\x1b", "[31mred"),
+    ("\x1b[", "31mred"),
+    ("\x1b[3", "1mred"),
+    ("\x1b[31", "mred"),
+])
+def test_sgr_split_across_chunks(chunks):
+    assert feed_all(AnsiParser(), "a", *chunks) == [("a", None), ("red", RED)]
+
+
+def test_non_color_sequences_are_dropped_even_when_split():
+    parser = AnsiParser()
+    segments = feed_all(parser, "\x1b]0;win", "dow title\x07text", " \x1b[2K\x1b[1", "Gmore")
+    assert "".join(text for text, _ in segments) == "text more"
+    assert parser.feed("\x1b(Bok") == [("ok", None)]
+
+
+def test_carriage_returns_do_not_pile_up():
+    assert AnsiParser().feed("10%\r50%\r100%\r\n") == [("10%50%100%\n", None)]
+
+
+def wait_parsed(pipeline):
+    """Wait until the parser thread has handled everything queued"""
+    deadline = time.monotonic() + 5
+    while pipeline._inflight and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = TerminalOutputPipeline(max_lines=5)
+    yield pipeline
+    pipeline.close()
+
+
+def test_pipeline_decodes_utf8_and_escapes_split_across_reads(pipeline):
+    data = "é \x1b[31mred\x1b[0m\n".encode()
+    for i in range(len(data)):
+        pipeline.feed(data[i:i + 1], source="job-1")
+    pipeline.finish("job-1")
+    wait_parsed(pipeline)
+    assert pipeline.take() == ([("é ", None), ("red", RED), ("\n", None)], 0)
+
+
+def test_pipeline_keeps_only_the_last_max_lines(pipeline):
+    pipeline.write("".join(f"line {i}\n" for i in range(8)))
+    pipeline.write("tail without newline")
+    wait_parsed(pipeline)
+    segments, dropped = pipeline.take()
+    assert dropped == 3
+    assert "".join(text for text, _ in segments) == "".join(f"line {i}\n" for i in range(3, 8)) + "tail without newline"
+    assert pipeline.take() == ([], 0)
+
+
+def test_pipeline_trims_whole_and_partial_segments(pipeline):
+    pipeline.write("a\n", color=RED)
+    pipeline.write("b\nc\nd\n")
+    pipeline.write("e\nf\ng\n", color=RED)
+    wait_parsed(pipeline)
+    segments, dropped = pipeline.take()
+    assert dropped == 2
+    assert segments == [("c\nd\n", None), ("e\nf\ng\n", RED)]
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Fake LLM Server - Local stand-in for Ollama, OpenAI, Anthropic and Gemini
+
+Speaks enough of each API for this project's clients (ChatOllama and the
+ExternalAgents), streaming or not, with a deterministic reply and
+configurable timing, so benchmarks and load tests run offline and measure
+the project's own overhead rather than model speed.
+
+Endpoints:
+  Ollama      GET /api/tags, POST /api/chat, POST /api/generate
+  OpenAI      POST /v1/chat/completions (also /chat/completions, Perplexity-style)
+  Anthropic   POST /v1/messages
+  Gemini      POST /v1beta/models/<model>:generateContent / :streamGenerateContent
+
+Knobs (FakeLLMConfig / CLI flags):
+  ttft_s        delay before the first token
+  tokens_per_s  generation speed after that (0 = instant)
+  error_rate    fraction of requests answered with error_status (seeded, so repeatable)
+  cassette      JSON list of {"prompt" | "match", "reply", optional "status",
+                "ttft_s", "tokens_per_s"}; a request whose last user message equals
+                "prompt" (or contains "match") is answered from that entry
+
+Usage:
+  python -m tools.fake_llm_server --port 11434 --ttft 0.2 --tps 40
+  OLLAMA_BASE_URL=http://127.0.0.1:11434 python main.py
+
+  with FakeLLMServer(FakeLLMConfig(ttft_s=0)) as server:
+      llm = ChatOllama(model="fake", base_url=server.url)
+"""
+import argparse
+import json
+import random
+import re
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+TOKEN_RE = re.compile(r"\s*\S+\s*|\s+")
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class FakeLLMConfig:
+    ttft_s: float = 0.0
+    tokens_per_s: float = 0.0           # 0 = no per-token delay
+    reply: str = "This is a fake answer to: {prompt}"
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 0
+    cassette: Optional[str] = None
+    models: tuple = ("fake-model",)
+
+
+def load_cassette(path: Optional[str]) -> List[Dict]:
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a reply into word-sized tokens that join back to the original text"""
+    return TOKEN_RE.findall(text) or [""]
+
+
+class Reply:
+    """What to send for one request: text, status and timing"""
+
+    def __init__(self, text: str, status: int, ttft_s: float, tokens_per_s: float, prompt: str):
+        self.text = text
+        self.status = status
+        self.ttft_s = ttft_s
+        self.tokens_per_s = tokens_per_s
+        self.tokens = tokenize(text)
+        self.prompt_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+
+    @property
+    def completion_tokens(self) -> int:
+        return len(self.tokens)
+
+    def pace(self):
+        """Yield tokens on the configured schedule"""
+        time.sleep(self.ttft_s)
+        for i, token in enumerate(self.tokens):
+            if i and self.tokens_per_s:
+                time.sleep(1 / self.tokens_per_s)
+            yield token
+
+    def wait_full(self):
+        """Sleep as long as streaming the whole reply would take"""
+        generation_s = (len(self.tokens) - 1) / self.tokens_per_s if self.tokens_per_s else 0.0
+        time.sleep(self.ttft_s + generation_s)
+
+
+def _last_user_text(messages) -> str:
+    for message in reversed(messages or []):
+        if message.get('role') in ('user', None):
+            content = message.get('content', '')
+            if isinstance(content, list):   # Anthropic/OpenAI content blocks
+                content = " ".join(block.get('text', '') for block in content if isinstance(block, dict))
+            return content
+    return ""
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "FakeLLM/1.0"
+
+    # === DISPATCH ===
+
+    def setup(self):
+        super().setup()
+        self.server.fake.count('connections')
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/api/tags":
+            self._json(200, {'models': [{'name': m, 'model': m, 'size': 0, 'digest': 'fake',
+                                         'modified_at': _now()} for m in self.server.fake.config.models]})
+        elif path in ("/", "/api/version"):
+            self._json(200, {'version': 'fake'})
+        else:
+            self._json(404, {'error': f"no route for GET {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except json.JSONDecodeError:
+            self._json(400, {'error': 'invalid JSON'})
+            return
+
+        if path == "/api/chat":
+            prompt, api = _last_user_text(body.get('messages')), "ollama_chat"
+        elif path == "/api/generate":
+            prompt, api = body.get('prompt', ''), "ollama_generate"
+        elif path in ("/v1/chat/completions", "/chat/completions"):
+            prompt, api = _last_user_text(body.get('messages')), "openai"
+        elif path == "/v1/messages":
+            prompt, api = _last_user_text(body.get('messages')), "anthropic"
+        elif ":generateContent" in path or ":streamGenerateContent" in path:
+            parts = [p for c in body.get('contents', []) for p in c.get('parts', [])]
+            prompt, api = " ".join(p.get('text', '') for p in parts), "gemini"
+        else:
+            self._json(404, {'error': f"no route for POST {path}"})
+            return
+
+        fake = self.server.fake
+        fake.count(api)
+        reply = fake.reply_for(prompt)
+        if reply.status != 200:
+            fake.count('errors')
+            self._error(api, reply.status)
+            return
+
+        model = body.get('model') or path.split("/models/")[-1].split(":")[0] or "fake-model"
+        stream = body.get('stream', api.startswith("ollama")) or ":streamGenerateContent" in path
+        getattr(self, f"_{api}")(reply, model, stream, body)
+
+    # === PROVIDER FORMATS ===
+
+    def _ollama_chat(self, reply, model, stream, body):
+        self._ollama(reply, model, stream, lambda text: {'message': {'role': 'assistant', 'content': text}})
+
+    def _ollama_generate(self, reply, model, stream, body):
+        self._ollama(reply, model, stream, lambda text: {'response': text})
+
+    def _ollama(self, reply, model, stream, payload):
+        start = time.monotonic()
+
+        def final(text):
+            elapsed_ns = int((time.monotonic() - start) * 1e9)
+            return {'model': model, 'created_at': _now(), **payload(text), 'done': True, 'done_reason': 'stop',
+                    'total_duration': elapsed_ns, 'load_duration': 0,
+                    'prompt_eval_count': reply.prompt_tokens, 'prompt_eval_duration': 0,
+                    'eval_count': reply.completion_tokens, 'eval_duration': elapsed_ns}
+
+        if not stream:
+            reply.wait_full()
+            self._json(200, final(reply.text))
+            return
+        self._start_chunked("application/x-ndjson")
+        for token in reply.pace():
+            self._chunk(json.dumps({'model': model, 'created_at': _now(), **payload(token), 'done': False}) + "\n")
+        self._chunk(json.dumps(final("")) + "\n")
+        self._end_chunked()
+
+    def _openai(self, reply, model, stream, body):
+        usage = {'prompt_tokens': reply.prompt_tokens, 'completion_tokens': reply.completion_tokens,
+                 'total_tokens': reply.prompt_tokens + reply.completion_tokens}
+        base = {'id': 'chatcmpl-fake', 'created': int(time.time()), 'model': model}
+        if not stream:
+            reply.wait_full()
+            self._json(200, {**base, 'object': 'chat.completion', 'usage': usage, 'choices': [
+                {'index': 0, 'message': {'role': 'assistant', 'content': reply.text}, 'finish_reason': 'stop'}]})
+            return
+        chunk = {**base, 'object': 'chat.completion.chunk'}
+        self._start_chunked("text/event-stream")
+        for i, token in enumerate(reply.pace()):
+            delta = {'role': 'assistant', 'content': token} if i == 0 else {'content': token}
+            self._sse({**chunk, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+        self._sse({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+        if (body.get('stream_options') or {}).get('include_usage'):
+            self._sse({**chunk, 'choices': [], 'usage': usage})
+        self._chunk("data: [DONE]\n\n")
+        self._end_chunked()
+
+    def _anthropic(self, reply, model, stream, body):
+        if not stream:
+            reply.wait_full()
+            self._json(200, {'id': 'msg_fake', 'type': 'message', 'role': 'assistant', 'model': model,
+                             'content': [{'type': 'text', 'text': reply.text}], 'stop_reason': 'end_turn',
+                             'usage': {'input_tokens': reply.prompt_tokens, 'output_tokens': reply.completion_tokens}})
+            return
+        self._start_chunked("text/event-stream")
+        self._sse({'type': 'message_start', 'message': {
+            'id': 'msg_fake', 'type': 'message', 'role': 'assistant', 'content': [], 'model': model,
+            'usage': {'input_tokens': reply.prompt_tokens, 'output_tokens': 1}}}, event='message_start')
+        self._sse({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+                  event='content_block_start')
+        for token in reply.pace():
+            self._sse({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': token}},
+                      event='content_block_delta')
+        self._sse({'type': 'content_block_stop', 'index': 0}, event='content_block_stop')
+        self._sse({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                   'usage': {'output_tokens': reply.completion_tokens}}, event='message_delta')
+        self._sse({'type': 'message_stop'}, event='message_stop')
+        self._end_chunked()
+
+    def _gemini(self, reply, model, stream, body):
+        def candidate(text, done):
+            item = {'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}
+            return {**item, 'finishReason': 'STOP'} if done else item
+
+        usage = {'promptTokenCount': reply.prompt_tokens, 'candidatesTokenCount': reply.completion_tokens,
+                 'totalTokenCount': reply.prompt_tokens + reply.completion_tokens}
+        if not stream:
+            reply.wait_full()
+            self._json(200, {'candidates': [candidate(reply.text, True)], 'usageMetadata': usage})
+            return
+        self._start_chunked("text/event-stream")
+        tokens = list(reply.pace())
+        for i, token in enumerate(tokens):
+            done = i == len(tokens) - 1
+            self._sse({'candidates': [candidate(token, done)], **({'usageMetadata': usage} if done else {})})
+        self._end_chunked()
+
+    def _error(self, api, status):
+        message = "rate limited (fake)" if status == 429 else f"injected error {status} (fake)"
+        headers = {"Retry-After": "0"} if status in (429, 503) else {}
+        if api == "anthropic":
+            body = {'type': 'error', 'error': {'type': 'api_error', 'message': message}}
+        elif api == "gemini":
+            body = {'error': {'code': status, 'message': message, 'status': 'UNAVAILABLE'}}
+        elif api == "openai":
+            body = {'error': {'message': message, 'type': 'server_error'}}
+        else:
+            body = {'error': message}
+        self._json(status, body, headers)
+
+    # === WIRE HELPERS ===
+
+    def _json(self, status, data, headers=None):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _sse(self, data, event=None):
+        self._chunk((f"event: {event}\n" if event else "") + f"data: {json.dumps(data)}\n\n")
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FakeLLMServer:
+    """Runs FakeLLMHandler on a background thread; usable as a context manager"""
+
+    def __init__(self, config: FakeLLMConfig = None, host: str = "127.0.0.1", port: int = 0,
+                 ssl_context: ssl.SSLContext = None):
+        self.config = config or FakeLLMConfig()
+        self.cassette = load_cassette(self.config.cassette)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.httpd = ThreadingHTTPServer((host, port), FakeLLMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.scheme = "http"
+        if ssl_context is not None:
+            self.httpd.socket = ssl_context.wrap_socket(self.httpd.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def reply_for(self, prompt: str) -> Reply:
+        config = self.config
+        entry = self._match(prompt)
+        with self._lock:
+            failed = config.error_rate and self._rng.random() < config.error_rate
+        if entry is not None:
+            text = entry.get('reply', '')
+            status = entry.get('status', 200)
+        else:
+            text = config.reply.format(prompt=prompt.strip()[:200])
+            status = config.error_status if failed else 200
+        return Reply(text, status,
+                     entry.get('ttft_s', config.ttft_s) if entry else config.ttft_s,
+                     entry.get('tokens_per_s', config.tokens_per_s) if entry else config.tokens_per_s,
+                     prompt)
+
+    def _match(self, prompt: str) -> Optional[Dict]:
+        normalized = prompt.strip()
+        for entry in self.cassette:
+            if 'prompt' in entry and entry['prompt'].strip() == normalized:
+                return entry
+        for entry in self.cassette:
+            if 'match' in entry and entry['match'] in prompt:
+                return entry
+        return None
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        daemon=True, name="fake-llm")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Ollama / OpenAI / Anthropic / Gemini server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--ttft", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--tps", type=float, default=0.0, help="Tokens per second (0 = instant)")
+    parser.add_argument("--reply", default=FakeLLMConfig.reply, help="Reply template ({prompt} is replaced)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", help="JSON list of {prompt|match, reply, status, ttft_s, tokens_per_s}")
+    parser.add_argument("--models", default="fake-model", help="Comma-separated names for /api/tags")
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(ttft_s=args.ttft, tokens_per_s=args.tps, reply=args.reply,
+                           error_rate=args.error_rate, error_status=args.error_status, seed=args.seed,
+                           cassette=args.cassette, models=tuple(args.models.split(",")))
+    server = FakeLLMServer(config, args.host, args.port)
+    print(f"🧪 Fake LLM server on {server.url} (TTFT {args.ttft}s, {args.tps or '∞'} tokens/s, "
+          f"{args.error_rate:.0%} errors)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
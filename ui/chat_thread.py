@@ -1,10 +1,18 @@
+"""
+Chat Thread - Virtualized transcript view (model/view)
+Only visible rows are painted; laid-out text documents are cached per row
+and older history is paged in from ConversationDB on scroll-up.
+"""
 import sys
+import html
+import itertools
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
-    QScrollArea, QSizePolicy, QToolButton, QApplication, QMenu
+    QListView, QStyledItemDelegate, QAbstractItemView, QApplication, QMenu
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QSize
-from PyQt6.QtGui import QFont, QCursor, QIcon, QClipboard
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from PyQt6.QtGui import QFont, QCursor, QColor, QPalette, QTextDocument, QAbstractTextDocumentLayout
+from ui.markdown_renderer import StreamingMarkdownRenderer
 
 # === CONFIGURATION ===
 # The exact font stack used by premium AI interfaces
@@ -12,132 +20,219 @@ FONT_FAMILY = ".AppleSystemUIFont" if sys.platform == "darwin" else "Segoe UI"
 FONT_SIZE = 15
 LINE_HEIGHT = 1.5
 
-class ActionMenuButton(QToolButton):
-    """The 'Three Dots' button that appears on hover"""
-    def __init__(self, text_content, parent=None):
-        super().__init__(parent)
-        self.text_content = text_content
-        self.setText("⋮")
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.setStyleSheet("""
-            QToolButton {
-                color: #666;
-                background: transparent;
-                border: none;
-                font-size: 18px;
-                padding: 4px;
-                border-radius: 12px;
-            }
-            QToolButton:hover {
-                background: #2a2a2a;
-                color: #fff;
-            }
-        """)
-        self.clicked.connect(self.show_menu)
+TEXT_COLOR = "#ececf1"
+H_MARGIN = 20          # Left/right padding inside each row
+V_MARGIN = 10          # Top/bottom padding inside each row
+USER_MAX_RATIO = 0.7   # User messages wrap at 70% of the row width
 
-    def show_menu(self):
-        menu = QMenu(self)
-        menu.setStyleSheet("""
-            QMenu { background-color: #1e1e1e; border: 1px solid #333; border-radius: 8px; }
-            QMenu::item { padding: 8px 24px; color: #ddd; }
-            QMenu::item:selected { background-color: #2a2a2a; }
-        """)
-        
-        copy_action = menu.addAction("Copy Text")
-        copy_action.triggered.connect(self.copy_to_clipboard)
-        
-        # Add more actions here (Regenerate, etc.)
-        
-        menu.exec(QCursor.pos())
+PAGE_SIZE = 100        # Messages fetched per history page
+LOAD_MORE_THRESHOLD = 40  # Pixels from the top that trigger the next page
+DOC_CACHE_SIZE = 512   # Laid-out documents kept in memory
 
-    def copy_to_clipboard(self):
-        QApplication.clipboard().setText(self.text_content)
+TextRole = Qt.ItemDataRole.UserRole + 1
+IsUserRole = Qt.ItemDataRole.UserRole + 2
+KeyRole = Qt.ItemDataRole.UserRole + 3
 
 
-class ChatBubble(QFrame):
-    """A Single Message Component (User or AI)"""
-    def __init__(self, text, is_user=False, parent=None):
-        super().__init__(parent)
-        self.is_user = is_user
-        self.full_text = text
-        self.current_text = ""
-        self.typing_speed = 12 # Lower = Faster
-        
-        # Main Layout
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(20, 10, 20, 10)
-        layout.setSpacing(15)
-        
-        # CONTENT AREA (No avatars - clean like Gemini)
-        self.content = QLabel("")
-        self.content.setFont(QFont(FONT_FAMILY, FONT_SIZE))
-        self.content.setWordWrap(True)
-        self.content.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-        self.content.setStyleSheet("color: #ececf1; padding-top: 5px;")
-        
-        # ACTION MENU (Create BEFORE calling update_display_text)
-        self.action_menu = ActionMenuButton(text)
-        if is_user:
-            self.action_menu.hide()
-        
-        # NOW update the display text
-        self.update_display_text(text if is_user else "")
-
-        # LAYOUT ASSEMBLY - Clean and minimal
-        # AI: Text -> Actions
-        # User: Text (right-aligned)
-        
-        if is_user:
-            layout.addStretch()
-            layout.addWidget(self.content)
-        else:
-            layout.addWidget(self.content, 1) # 1 = Stretch to fill width
-            layout.addWidget(self.action_menu, 0, Qt.AlignmentFlag.AlignTop)
-
-    def update_display_text(self, text):
-        """Updates text with HTML formatting for line height"""
-        # We replace newlines with <br> and wrap in styling span
-        formatted = text.replace("\n", "<br>")
-        html = f"""
+def format_message_html(text):
+    """Wrap plain message text (user input) in HTML with line-height styling"""
+    formatted = html.escape(text).replace("\n", "<br>")
+    return f"""
         <style>
-            p {{ line-height: 150%; margin: 0; }}
+            p {{ line-height: {int(LINE_HEIGHT * 100)}%; margin: 0; color: {TEXT_COLOR}; }}
         </style>
         <p>{formatted}</p>
         """
-        self.content.setText(html)
-        # Only update action menu for AI messages (not user messages)
-        if hasattr(self, 'action_menu') and not self.is_user:
-            self.action_menu.text_content = text
 
-    def update_typed_text(self, new_chunk):
-        """Called by streaming events to add text smoothly"""
-        self.full_text = new_chunk  # Replace full text (not append)
-        self.update_display_text(self.full_text)
-
-    def start_typing_animation(self):
-        """Visual effect for initial load"""
-        self.timer = QTimer()
-        self.timer.timeout.connect(self._animate_step)
-        self.timer.start(self.typing_speed)
-
-    def _animate_step(self):
-        if len(self.current_text) < len(self.full_text):
-            self.current_text += self.full_text[len(self.current_text)]
-            self.update_display_text(self.current_text)
+
+class ChatMessageModel(QAbstractListModel):
+    """Flat list of transcript rows: {'key', 'text', 'is_user', 'db_id'}"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages = []
+        self._keys = itertools.count(1)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        msg = self._messages[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, TextRole):
+            return msg['text']
+        if role == IsUserRole:
+            return msg['is_user']
+        if role == KeyRole:
+            return msg['key']
+        return None
+
+    def _make_row(self, text, is_user, db_id=None):
+        return {'key': next(self._keys), 'text': text, 'is_user': is_user, 'db_id': db_id}
+
+    def append_message(self, text, is_user=False, db_id=None):
+        """Append a row and return its stable key"""
+        row = self._make_row(text, is_user, db_id)
+        position = len(self._messages)
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._messages.append(row)
+        self.endInsertRows()
+        return row['key']
+
+    def prepend_messages(self, messages):
+        """Insert older history (oldest first) above the current rows"""
+        if not messages:
+            return
+        rows = [self._make_row(m['content'], m['role'] == 'user', m.get('id')) for m in messages]
+        self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+        self._messages[0:0] = rows
+        self.endInsertRows()
+
+    def row_for_key(self, key):
+        # Streaming updates almost always target the newest rows, so scan backwards
+        for row in range(len(self._messages) - 1, -1, -1):
+            if self._messages[row]['key'] == key:
+                return row
+        return -1
+
+    def update_text(self, key, text):
+        """Replace a row's text; returns the changed index (invalid if gone)"""
+        row = self.row_for_key(key)
+        if row < 0:
+            return QModelIndex()
+        self._messages[row]['text'] = text
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [TextRole])
+        return index
+
+    def oldest_db_id(self):
+        for msg in self._messages:
+            if msg['db_id'] is not None:
+                return msg['db_id']
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self._messages = []
+        self.endResetModel()
+
+
+class ChatBubbleDelegate(QStyledItemDelegate):
+    """Paints a message row from a cached, laid-out QTextDocument"""
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self._docs = OrderedDict()  # key -> (width, text, QTextDocument)
+        self._font = QFont(FONT_FAMILY, FONT_SIZE)
+        self.renderer = StreamingMarkdownRenderer(cache_size=DOC_CACHE_SIZE)
+
+    def _available_width(self):
+        return max(self.view.viewport().width() - 2 * H_MARGIN, 50)
+
+    def document(self, index):
+        key = index.data(KeyRole)
+        text = index.data(TextRole) or ""
+        width = self._available_width()
+
+        cached = self._docs.get(key)
+        if cached and cached[0] == width and cached[1] == text:
+            self._docs.move_to_end(key)
+            return cached[2]
+
+        doc = QTextDocument()
+        doc.setDefaultFont(self._font)
+        doc.setDocumentMargin(5)
+
+        if index.data(IsUserRole):
+            doc.setHtml(format_message_html(text))
+            # User text hugs the right edge, so shrink to its natural width
+            max_width = width * USER_MAX_RATIO
+            doc.setTextWidth(max_width)
+            ideal = doc.idealWidth()
+            if ideal < max_width:
+                doc.setTextWidth(ideal)
         else:
-            self.timer.stop()
+            # AI replies are Markdown; only the open tail block is re-rendered per token
+            doc.setHtml(self.renderer.render(key, text))
+            doc.setTextWidth(width)
+
+        self._docs[key] = (width, text, doc)
+        if len(self._docs) > DOC_CACHE_SIZE:
+            self._docs.popitem(last=False)
+        return doc
+
+    def invalidate(self, key=None):
+        """Drop one cached document, or all of them"""
+        if key is None:
+            self._docs.clear()
+        else:
+            self._docs.pop(key, None)
+        self.renderer.forget(key)
+
+    def sizeHint(self, option, index):
+        doc = self.document(index)
+        return QSize(self.view.viewport().width(), int(doc.size().height()) + 2 * V_MARGIN)
 
+    def paint(self, painter, option, index):
+        doc = self.document(index)
+        painter.save()
+
+        x = option.rect.left() + H_MARGIN
+        if index.data(IsUserRole):
+            x = option.rect.right() - H_MARGIN - int(doc.textWidth())
+        painter.translate(x, option.rect.top() + V_MARGIN)
+        painter.setClipRect(0, 0, int(doc.textWidth()) + 1, int(doc.size().height()) + 1)
+
+        context = QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QPalette.ColorRole.Text, QColor(TEXT_COLOR))
+        doc.documentLayout().draw(painter, context)
+
+        painter.restore()
+
+
+class MessageHandle:
+    """Reference to a transcript row, returned by add_message for streaming updates"""
+
+    def __init__(self, thread, key, text):
+        self._thread = thread
+        self.key = key
+        self.full_text = text
+
+    def update_typed_text(self, new_chunk):
+        """Called by streaming events with the full text so far (not a delta)"""
+        self.full_text = new_chunk
+        self._thread.update_message(self.key, new_chunk)
+
+
+class ChatThread(QListView):
+    """The Main Chat Container - virtualized list of messages"""
 
-class ChatThread(QScrollArea):
-    """The Main Chat Container replacing QTextEdit"""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWidgetResizable(True)
+        self.message_model = ChatMessageModel(self)
+        self.delegate = ChatBubbleDelegate(self)
+        self.setModel(self.message_model)
+        self.setItemDelegate(self.delegate)
+
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setUniformItemSizes(False)
+        self.setSpacing(0)  # Google has no major gaps between bubbles
+        self.setViewportMargins(0, 0, 0, 40)  # Bottom padding
+
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+
         self.setStyleSheet("""
-            QScrollArea { 
-                border: none; 
-                background: transparent; 
+            QListView {
+                border: none;
+                background: transparent;
             }
             QScrollBar:vertical {
                 background: transparent;
@@ -159,37 +254,96 @@ class ChatThread(QScrollArea):
                 background: none;
             }
         """)
-        
-        # Container widget for the bubbles
-        self.container = QWidget()
-        self.container.setStyleSheet("background: transparent;")
-        self.layout = QVBoxLayout(self.container)
-        self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.layout.setSpacing(0) # Google has no major gaps between bubbles
-        self.layout.setContentsMargins(0, 0, 0, 40) # Bottom padding
-        
-        self.setWidget(self.container)
+
+        # History paging state
+        self.conversation_db = None
+        self.conversation_id = None
+        self.has_more_history = False
+        self._bottom_anchor = None
+
+        scrollbar = self.verticalScrollBar()
+        scrollbar.valueChanged.connect(self._on_scroll)
+        scrollbar.rangeChanged.connect(self._on_range_changed)
 
     def add_message(self, text, is_user=False):
-        """Adds a bubble and auto-scrolls"""
-        bubble = ChatBubble(text, is_user)
-        self.layout.addWidget(bubble)
-        
-        # Force layout update to calculate height
-        QApplication.processEvents()
+        """Adds a row and auto-scrolls"""
+        key = self.message_model.append_message(text, is_user)
         self.scroll_to_bottom()
-        
-        # Return bubble so we can update it later (for streaming)
-        return bubble
 
-    def scroll_to_bottom(self):
-        """Smooth scroll to bottom"""
+        # Return handle so we can update it later (for streaming)
+        return MessageHandle(self, key, text)
+
+    def update_message(self, key, text):
+        """Re-render one row; no-op if the row was cleared meanwhile"""
+        index = self.message_model.update_text(key, text)
+        if index.isValid():
+            # Height may have changed - ask the view to re-query the size hint
+            self.delegate.sizeHintChanged.emit(index)
+
+    def load_conversation(self, conversation_db, conversation_id, page_size=PAGE_SIZE):
+        """Show the newest page of a conversation; older pages load on scroll-up"""
+        self.clear()
+        self.conversation_db = conversation_db
+        self.conversation_id = conversation_id
+
+        messages = conversation_db.get_messages_page(conversation_id, limit=page_size)
+        self.has_more_history = len(messages) == page_size
+        self.message_model.prepend_messages(messages)
+        self.scroll_to_bottom()
+
+    def load_older_messages(self, page_size=PAGE_SIZE):
+        """Prepend the previous page of history, keeping the viewport in place"""
+        if not (self.has_more_history and self.conversation_db):
+            return
+
+        messages = self.conversation_db.get_messages_page(
+            self.conversation_id, before_id=self.message_model.oldest_db_id(), limit=page_size
+        )
+        self.has_more_history = len(messages) == page_size
+        if not messages:
+            return
+
         scrollbar = self.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
-        
+        self._bottom_anchor = scrollbar.maximum() - scrollbar.value()
+        self.message_model.prepend_messages(messages)
+
+    def _on_scroll(self, value):
+        if value <= LOAD_MORE_THRESHOLD and self.has_more_history and self._bottom_anchor is None:
+            self.load_older_messages()
+
+    def _on_range_changed(self, minimum, maximum):
+        # After a prepend the content grows upwards; keep the same rows on screen
+        if self._bottom_anchor is not None:
+            self.verticalScrollBar().setValue(maximum - self._bottom_anchor)
+            self._bottom_anchor = None
+
+    def show_context_menu(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+
+        menu = QMenu(self)
+        menu.setStyleSheet("""
+            QMenu { background-color: #1e1e1e; border: 1px solid #333; border-radius: 8px; }
+            QMenu::item { padding: 8px 24px; color: #ddd; }
+            QMenu::item:selected { background-color: #2a2a2a; }
+        """)
+
+        copy_action = menu.addAction("Copy Text")
+        text = index.data(TextRole) or ""
+        copy_action.triggered.connect(lambda: QApplication.clipboard().setText(text))
+
+        menu.exec(QCursor.pos())
+
+    def scroll_to_bottom(self):
+        """Scroll to the newest message"""
+        self.scrollToBottom()
+
     def clear(self):
-        # Delete all bubbles
-        while self.layout.count():
-            item = self.layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        # Drop all rows, cached layouts and paging state
+        self.message_model.clear()
+        self.delegate.invalidate()
+        self.conversation_db = None
+        self.conversation_id = None
+        self.has_more_history = False
+        self._bottom_anchor = None
@@ -0,0 +1,288 @@
+"""
+Streaming Markdown Renderer - Incremental Markdown -> Qt rich-text HTML
+Finished blocks are rendered once and cached per message; only the open
+tail block is re-rendered as new tokens arrive. Code blocks are syntax
+highlighted (Pygments, if installed) once their closing fence arrives.
+"""
+import re
+import html
+from collections import OrderedDict
+
+TEXT_COLOR = "#ececf1"
+CODE_BACKGROUND = "#2b2d31"
+CODE_STYLE = "monokai"
+LINE_HEIGHT = 1.5
+
+FENCE_RE = re.compile(r'^\s{0,3}(`{3,}|~{3,})\s*([^`\s]*)')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+HR_RE = re.compile(r'^\s{0,3}([-*_])(\s*\1){2,}\s*$')
+ULIST_RE = re.compile(r'^\s*[-*+]\s+(.*)$')
+OLIST_RE = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+QUOTE_RE = re.compile(r'^\s*>\s?(.*)$')
+
+CODE_SPAN_RE = re.compile(r'(`[^`\n]+`)')
+BOLD_RE = re.compile(r'\*\*(?!\s)(.+?)(?<!\s)\*\*|__(?!\s)(.+?)(?<!\s)__')
+ITALIC_RE = re.compile(r'(?<![\*\w])\*(?![\s\*])(.+?)(?<![\s\*])\*(?!\*)|(?<!\w)_(?![\s_])(.+?)(?<![\s_])_(?!\w)')
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+
+
+class Block:
+    """One parsed Markdown block and the source span it covers"""
+
+    def __init__(self, kind, lines, end, closed, lang=""):
+        self.kind = kind
+        self.lines = lines
+        self.end = end          # Source offset just past this block
+        self.closed = closed    # Closed blocks can never change again
+        self.lang = lang
+
+
+def _iter_lines(src, pos):
+    """Yield (line, end_offset, complete) from pos; only the last line may be partial"""
+    while pos < len(src):
+        newline = src.find('\n', pos)
+        if newline == -1:
+            yield src[pos:], len(src), False
+            return
+        yield src[pos:newline], newline + 1, True
+        pos = newline + 1
+
+
+def line_kind(line):
+    """Classify a single source line"""
+    if not line.strip():
+        return 'blank'
+    if FENCE_RE.match(line):
+        return 'fence'
+    if HEADING_RE.match(line):
+        return 'heading'
+    if HR_RE.match(line):
+        return 'hr'
+    if ULIST_RE.match(line):
+        return 'ulist'
+    if OLIST_RE.match(line):
+        return 'olist'
+    if QUOTE_RE.match(line):
+        return 'quote'
+    return 'para'
+
+
+def split_blocks(src, pos=0):
+    """
+    Split src[pos:] into blocks. Every block except possibly the last is
+    closed, and a closed block's end is the same no matter how much more
+    text is appended later - which is what makes incremental parsing safe.
+    """
+    lines = list(_iter_lines(src, pos))
+    blocks = []
+    i = 0
+
+    while i < len(lines):
+        line, end, complete = lines[i]
+        kind = line_kind(line)
+
+        if kind == 'fence':
+            opening = FENCE_RE.match(line)
+            marker = opening.group(1)
+            body = []
+            closed = False
+            j = i + 1
+            while j < len(lines):
+                body_line, body_end, _ = lines[j]
+                stripped = body_line.strip()
+                end = body_end
+                j += 1
+                if stripped and stripped[0] == marker[0] and set(stripped) == {marker[0]} \
+                        and len(stripped) >= len(marker):
+                    closed = True
+                    break
+                body.append(body_line)
+            if not closed and not complete:
+                # Still typing the opening fence line
+                end = lines[i][1]
+            blocks.append(Block('code', body, end, closed, opening.group(2) if complete else ""))
+            i = j
+            continue
+
+        if kind in ('blank', 'heading', 'hr'):
+            blocks.append(Block(kind, [line], end, complete))
+            i += 1
+            continue
+
+        # Paragraphs, lists and quotes run until a line of another kind
+        group = [line]
+        j = i + 1
+        while j < len(lines):
+            next_line = lines[j][0]
+            next_kind = line_kind(next_line)
+            continuation = (kind in ('ulist', 'olist') and next_kind == 'para'
+                            and next_line[:1].isspace())
+            if next_kind != kind and not continuation:
+                break
+            group.append(next_line)
+            j += 1
+
+        if j < len(lines):
+            # Terminated by another line; only final once that line is complete
+            closed = lines[j][2]
+            block_end = lines[j - 1][1]
+        else:
+            closed = False
+            block_end = lines[j - 1][1]
+        blocks.append(Block(kind, group, block_end, closed))
+        i = j
+
+    return blocks
+
+
+def render_inline(text):
+    """Render inline Markdown (code spans, bold, italic, links)"""
+    out = []
+    for part in CODE_SPAN_RE.split(text):
+        if len(part) > 2 and part.startswith('`') and part.endswith('`'):
+            out.append(
+                f'<code style="background-color: {CODE_BACKGROUND};">{html.escape(part[1:-1])}</code>'
+            )
+            continue
+        escaped = html.escape(part)
+        escaped = BOLD_RE.sub(lambda m: f"<b>{m.group(1) or m.group(2)}</b>", escaped)
+        escaped = ITALIC_RE.sub(lambda m: f"<i>{m.group(1) or m.group(2)}</i>", escaped)
+        escaped = LINK_RE.sub(r'<a href="\2" style="color: #8ab4f8;">\1</a>', escaped)
+        out.append(escaped)
+    return "".join(out)
+
+
+def highlight_code(code, lang=""):
+    """Syntax-highlight a finished code block; plain escaped text without Pygments"""
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name, TextLexer
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return html.escape(code)
+
+    try:
+        lexer = get_lexer_by_name(lang) if lang else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+    formatter = HtmlFormatter(noclasses=True, nowrap=True, style=CODE_STYLE)
+    return highlight(code, lexer, formatter).rstrip("\n")
+
+
+def render_block(block):
+    """Render one block to HTML"""
+    if block.kind == 'blank':
+        return ""
+
+    if block.kind == 'code':
+        code = "\n".join(block.lines)
+        # Open fences are shown plain; highlighting waits for the closing fence
+        body = highlight_code(code, block.lang) if block.closed else html.escape(code)
+        return (f'<pre style="background-color: {CODE_BACKGROUND}; padding: 8px;">'
+                f'<code>{body}</code></pre>')
+
+    if block.kind == 'heading':
+        match = HEADING_RE.match(block.lines[0])
+        level = len(match.group(1))
+        return f"<h{level}>{render_inline(match.group(2))}</h{level}>"
+
+    if block.kind == 'hr':
+        return "<hr>"
+
+    if block.kind in ('ulist', 'olist'):
+        item_re = ULIST_RE if block.kind == 'ulist' else OLIST_RE
+        items = []
+        for line in block.lines:
+            match = item_re.match(line)
+            if match:
+                items.append(match.group(1))
+            elif items:
+                items[-1] += " " + line.strip()
+        tag = 'ul' if block.kind == 'ulist' else 'ol'
+        body = "".join(f"<li>{render_inline(item)}</li>" for item in items)
+        return f"<{tag}>{body}</{tag}>"
+
+    if block.kind == 'quote':
+        text = "<br>".join(render_inline(QUOTE_RE.match(line).group(1)) for line in block.lines)
+        return f'<blockquote style="color: #aaaaaa;">{text}</blockquote>'
+
+    return "<p>" + "<br>".join(render_inline(line) for line in block.lines) + "</p>"
+
+
+def wrap_html(body):
+    """Wrap rendered blocks in the chat stylesheet"""
+    return f"""
+        <style>
+            p {{ line-height: {int(LINE_HEIGHT * 100)}%; margin: 0 0 8px 0; color: {TEXT_COLOR}; }}
+            li, h1, h2, h3, h4, h5, h6 {{ color: {TEXT_COLOR}; }}
+            pre {{ color: {TEXT_COLOR}; }}
+        </style>
+        {body}
+        """
+
+
+class _MessageState:
+    """Per-message render state: the immutable prefix and its HTML"""
+
+    def __init__(self):
+        self.committed_src = ""
+        self.committed_html = []
+        self.last_text = None
+        self.last_html = ""
+
+
+class StreamingMarkdownRenderer:
+    """
+    Renders a growing Markdown string, re-parsing only the open tail block.
+    Rendered HTML is cached per message id (LRU).
+    """
+
+    def __init__(self, cache_size=256):
+        self.cache_size = cache_size
+        self._states = OrderedDict()
+
+    def render(self, message_id, text):
+        """Return HTML for the current full text of a message"""
+        state = self._states.get(message_id)
+        if state is None:
+            state = _MessageState()
+            self._states[message_id] = state
+            if len(self._states) > self.cache_size:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(message_id)
+
+        if text == state.last_text:
+            return state.last_html
+
+        if not text.startswith(state.committed_src):
+            # Not an append (edit/regenerate) - start over
+            state.committed_src = ""
+            state.committed_html = []
+
+        tail_html = []
+        for block in split_blocks(text, len(state.committed_src)):
+            rendered = render_block(block)
+            if block.closed and not tail_html:
+                # Closed blocks before the first open one become immutable
+                state.committed_html.append(rendered)
+                state.committed_src = text[:block.end]
+            else:
+                tail_html.append(rendered)
+
+        state.last_text = text
+        state.last_html = wrap_html("".join(state.committed_html) + "".join(tail_html))
+        return state.last_html
+
+    def forget(self, message_id=None):
+        """Drop cached state for one message, or for all of them"""
+        if message_id is None:
+            self._states.clear()
+        else:
+            self._states.pop(message_id, None)
+
+
+def render_markdown(text):
+    """One-shot render of a complete Markdown string"""
+    return wrap_html("".join(render_block(block) for block in split_blocks(text)))
@@ -9,6 +9,10 @@ class StreamWorker(QThread):
     """
     Worker thread for streaming LLM responses
     Emits tokens in real-time for live chat feel
+    
+    Works with Riley (stream_process), any agent or orchestrator with
+    stream_execute (local agents, external providers over SSE), and falls
+    back to a single execute() call otherwise.
     """
     
     token_received = pyqtSignal(str)  # Individual token
@@ -33,7 +37,14 @@ class StreamWorker(QThread):
                 context = {'conversation_history': messages}
             
             # Stream with context
-            for token in self.companion.stream_process(self.message, context):
+            if hasattr(self.companion, 'stream_process'):
+                stream = self.companion.stream_process(self.message, context)
+            elif hasattr(self.companion, 'stream_execute'):
+                stream = self.companion.stream_execute(self.message)
+            else:
+                stream = iter([self.companion.execute(self.message)])
+            
+            for token in stream:
                 self.full_response += token
                 self.token_received.emit(self.full_response)
             
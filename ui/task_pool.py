@@ -0,0 +1,172 @@
+"""
+AgentTaskPool - Runs gem dispatches off the GUI thread
+QThreadPool-backed executor with per-gem concurrency limits, queue depth
+metrics, and result streaming for agents that expose stream_execute().
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskSignals(QObject):
+    """
+    Signals for one task. Created on the GUI thread, so emits from the
+    worker thread are delivered to GUI slots as queued calls.
+    """
+    started = pyqtSignal(int)        # task id
+    chunk = pyqtSignal(int, str)     # task id, text so far (streaming agents only)
+    finished = pyqtSignal(int, str)  # task id, final result
+    error = pyqtSignal(int, str)     # task id, error message
+
+    def __init__(self, task_id):
+        super().__init__()
+        self.task_id = task_id
+
+
+class AgentTask(QRunnable):
+    """One agent call executed on a pool thread"""
+
+    def __init__(self, pool, task_id, gem, agent, message):
+        super().__init__()
+        self.pool = pool
+        self.task_id = task_id
+        self.gem = gem
+        self.agent = agent
+        self.message = message
+        self.signals = TaskSignals(task_id)
+        self.submitted_at = time.monotonic()
+        self.setAutoDelete(True)
+
+    def run(self):
+        started_at = time.monotonic()
+        ok = False
+        try:
+            self.signals.started.emit(self.task_id)
+            if hasattr(self.agent, 'stream_execute'):
+                result = ""
+                for delta in self.agent.stream_execute(self.message):
+                    result += delta
+                    self.signals.chunk.emit(self.task_id, result)
+            else:
+                result = self.agent.execute(self.message)
+            ok = True
+            self.signals.finished.emit(self.task_id, result)
+        except Exception as e:
+            self.signals.error.emit(self.task_id, str(e))
+        finally:
+            self.pool._task_done(self, started_at, ok)
+
+
+class AgentTaskPool(QObject):
+    """
+    Shared executor for agent calls.
+
+    Each gem has its own concurrency limit; extra submissions wait in a
+    per-gem FIFO queue instead of occupying pool threads.
+    """
+
+    def __init__(self, max_threads=4, gem_limits=None, default_limit=1, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self.gem_limits = dict(gem_limits or {})
+        self.default_limit = default_limit
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._queues = {}    # gem -> deque of pending AgentTask
+        self._running = {}   # gem -> running count
+        self._stats = {}     # gem -> counters
+
+    def _gem_stats(self, gem):
+        return self._stats.setdefault(gem, {
+            'submitted': 0, 'completed': 0, 'failed': 0,
+            'total_wait_s': 0.0, 'total_run_s': 0.0, 'max_queue_depth': 0,
+        })
+
+    def submit(self, gem, agent, message, on_chunk=None, on_finished=None, on_error=None):
+        """
+        Queue agent.execute(message) (or stream_execute) for a gem.
+        Callbacks are connected before the task can start, so no result is missed.
+        Returns the task's TaskSignals.
+        """
+        task = AgentTask(self, next(self._ids), gem, agent, message)
+        if on_chunk:
+            task.signals.chunk.connect(on_chunk)
+        if on_finished:
+            task.signals.finished.connect(on_finished)
+        if on_error:
+            task.signals.error.connect(on_error)
+
+        with self._lock:
+            stats = self._gem_stats(gem)
+            stats['submitted'] += 1
+            queue = self._queues.setdefault(gem, deque())
+            queue.append(task)
+            stats['max_queue_depth'] = max(stats['max_queue_depth'], len(queue))
+            to_start = self._drain_locked(gem)
+
+        for pending in to_start:
+            self.thread_pool.start(pending)
+        return task.signals
+
+    def _drain_locked(self, gem):
+        """Pop as many queued tasks as the gem's limit allows (lock held)"""
+        limit = self.gem_limits.get(gem, self.default_limit)
+        queue = self._queues.get(gem)
+        ready = []
+        while queue and self._running.get(gem, 0) < limit:
+            task = queue.popleft()
+            self._running[gem] = self._running.get(gem, 0) + 1
+            self._gem_stats(gem)['total_wait_s'] += time.monotonic() - task.submitted_at
+            ready.append(task)
+        return ready
+
+    def _task_done(self, task, started_at, ok):
+        """Called from the worker thread when a task ends"""
+        with self._lock:
+            gem = task.gem
+            self._running[gem] -= 1
+            stats = self._gem_stats(gem)
+            stats['completed' if ok else 'failed'] += 1
+            stats['total_run_s'] += time.monotonic() - started_at
+            to_start = self._drain_locked(gem)
+
+        for pending in to_start:
+            self.thread_pool.start(pending)
+
+    def queue_depth(self, gem=None):
+        """Tasks waiting for a slot (for one gem, or all gems)"""
+        with self._lock:
+            if gem is not None:
+                return len(self._queues.get(gem, ()))
+            return sum(len(q) for q in self._queues.values())
+
+    def metrics(self):
+        """Per-gem snapshot: running, queued, counters and mean wait/run times"""
+        with self._lock:
+            snapshot = {}
+            for gem, stats in self._stats.items():
+                done = stats['completed'] + stats['failed']
+                started = done + self._running.get(gem, 0)
+                snapshot[gem] = {
+                    'running': self._running.get(gem, 0),
+                    'queued': len(self._queues.get(gem, ())),
+                    'limit': self.gem_limits.get(gem, self.default_limit),
+                    'submitted': stats['submitted'],
+                    'completed': stats['completed'],
+                    'failed': stats['failed'],
+                    'max_queue_depth': stats['max_queue_depth'],
+                    'avg_wait_s': round(stats['total_wait_s'] / started, 3) if started else 0.0,
+                    'avg_run_s': round(stats['total_run_s'] / done, 3) if done else 0.0,
+                }
+            return snapshot
+
+    def shutdown(self, wait_ms=-1):
+        """Drop queued tasks and wait for running ones"""
+        with self._lock:
+            for queue in self._queues.values():
+                queue.clear()
+        self.thread_pool.waitForDone(wait_ms)
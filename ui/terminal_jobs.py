@@ -0,0 +1,316 @@
+"""
+Terminal Job Manager - Concurrent shell commands with per-job state
+Each command becomes a job with its own QProcess, output buffer, timeout
+and exit code. Jobs run in parallel up to max_parallel, or in order when a
+job is submitted `after` another. submit() / wait() are safe to call from
+worker threads (e.g. Riley's StreamWorker); processes always live on the
+GUI thread.
+"""
+import itertools
+import os
+import shutil
+import threading
+import time
+from PyQt6.QtCore import QObject, QProcess, QThread, QTimer, QCoreApplication, pyqtSignal
+
+MAX_JOB_OUTPUT_BYTES = 1024 * 1024   # Per-job buffer keeps the newest 1 MB
+MAX_FINISHED_JOBS = 50               # Finished jobs kept for result lookup
+TIMEOUT_EXIT_CODE = 124              # Same as coreutils `timeout`
+KILLED_EXIT_CODE = 137               # 128 + SIGKILL
+KILL_GRACE_MS = 1000                 # SIGTERM first; SIGKILL if still running after this
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"         # Could not start / crashed
+KILLED = "killed"
+TIMED_OUT = "timed_out"
+DONE_STATES = (FINISHED, FAILED, KILLED, TIMED_OUT)
+
+
+def shell_command(command):
+    """Program and args to run a command line in the user's shell"""
+    if os.name == 'nt':  # Windows
+        return "cmd", ["/c", command]
+    shell = "zsh" if shutil.which("zsh") else "/bin/sh"  # Mac default, then POSIX
+    return shell, ["-c", command]
+
+
+def stop_exit_code(reason):
+    return TIMEOUT_EXIT_CODE if reason == TIMED_OUT else KILLED_EXIT_CODE
+
+
+class TerminalJob:
+    """One command and everything known about its run"""
+
+    def __init__(self, job_id, command, timeout=None, cwd=None, after=None):
+        self.id = job_id
+        self.command = command
+        self.timeout = timeout
+        self.cwd = cwd or os.getcwd()
+        self.after = after
+        self.status = QUEUED
+        self.stop_reason = None      # KILLED / TIMED_OUT once a stop was requested
+        self.exit_code = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self.process = None
+        self.timer = None
+        self._output = bytearray()
+        self.output_bytes = 0        # Total bytes produced, including dropped ones
+        self._done = threading.Event()
+
+    def append_output(self, data):
+        self._output += data
+        self.output_bytes += len(data)
+        if len(self._output) > MAX_JOB_OUTPUT_BYTES:
+            del self._output[:len(self._output) - MAX_JOB_OUTPUT_BYTES]
+
+    @property
+    def output(self):
+        return self._output.decode('utf-8', errors='replace')
+
+    @property
+    def done(self):
+        return self.status in DONE_STATES
+
+    @property
+    def duration(self):
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'command': self.command,
+            'status': self.status,
+            'exit_code': self.exit_code,
+            'error': self.error,
+            'output': self.output,
+            'output_bytes': self.output_bytes,
+            'truncated': self.output_bytes > len(self._output),
+            'duration_s': round(self.duration, 3),
+        }
+
+
+class TerminalJobManager(QObject):
+    """
+    Runs terminal jobs on the GUI thread's event loop.
+
+    max_parallel=1 runs everything sequentially; otherwise jobs start as soon
+    as a slot is free and the job they were submitted `after` has finished.
+    """
+    job_started = pyqtSignal(int)          # job id
+    job_output = pyqtSignal(int, bytes)    # job id, raw output chunk
+    job_finished = pyqtSignal(int, int)    # job id, exit code
+
+    _start_requested = pyqtSignal()
+    _kill_requested = pyqtSignal(int, str)
+
+    def __init__(self, max_parallel=4, default_timeout=None, parent=None):
+        super().__init__(parent)
+        self.max_parallel = max(1, max_parallel)
+        self.default_timeout = default_timeout
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.jobs = {}           # id -> TerminalJob (recent finished ones kept for lookup)
+        self._queue = []         # ids waiting to start, in submit order
+
+        # Calls from worker threads are queued onto this object's thread
+        self._start_requested.connect(self._start_ready_jobs)
+        self._kill_requested.connect(self._kill)
+
+    # === SUBMIT / CONTROL (any thread) ===
+
+    def submit(self, command, timeout=None, cwd=None, after=None):
+        """Queue a command; returns its job id. `after` delays it until that job is done"""
+        with self._lock:
+            job = TerminalJob(next(self._ids), command,
+                              timeout if timeout is not None else self.default_timeout, cwd, after)
+            self.jobs[job.id] = job
+            self._queue.append(job.id)
+        self._start_requested.emit()
+        return job.id
+
+    def submit_batch(self, commands, parallel=True, timeout=None, cwd=None):
+        """Queue several commands, either independent or chained in order"""
+        ids = []
+        for command in commands:
+            after = ids[-1] if ids and not parallel else None
+            ids.append(self.submit(command, timeout=timeout, cwd=cwd, after=after))
+        return ids
+
+    def kill(self, job_id):
+        """Kill a running job (or cancel a queued one)"""
+        self._kill_requested.emit(job_id, KILLED)
+
+    def kill_all(self):
+        for job in self._snapshot():
+            if not job.done:
+                self.kill(job.id)
+
+    def set_max_parallel(self, max_parallel):
+        self.max_parallel = max(1, max_parallel)
+        self._start_requested.emit()
+
+    def job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def result(self, job_id):
+        """Snapshot dict of a job (status, exit_code, output, duration)"""
+        job = self.job(job_id)
+        return job.to_dict() if job else None
+
+    def wait(self, job_id, timeout=None):
+        """
+        Block until a job is done and return its result (None on timeout).
+        On the GUI thread this keeps the event loop running while it waits.
+        """
+        job = self.job(job_id)
+        if not job:
+            return None
+        if QThread.currentThread() == self.thread():
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            while not job._done.is_set():
+                if deadline is not None and time.monotonic() > deadline:
+                    return None
+                QCoreApplication.processEvents()
+                job._done.wait(0.005)
+        elif not job._done.wait(timeout):
+            return None
+        return job.to_dict()
+
+    def running(self):
+        return [j for j in self._snapshot() if j.status == RUNNING]
+
+    def _snapshot(self):
+        """The jobs as a list (submit() may add to the dict from another thread)"""
+        with self._lock:
+            return list(self.jobs.values())
+
+    # === EXECUTION (GUI thread) ===
+
+    def _start_ready_jobs(self):
+        with self._lock:
+            running = sum(1 for j in self.jobs.values() if j.status == RUNNING)
+            ready = []
+            for job_id in list(self._queue):
+                if running + len(ready) >= self.max_parallel:
+                    break
+                job = self.jobs[job_id]
+                if job.status != QUEUED:
+                    self._queue.remove(job_id)
+                    continue
+                blocker = self.jobs.get(job.after)
+                if blocker and not blocker.done:
+                    continue
+                self._queue.remove(job_id)
+                ready.append(job)
+
+        for job in ready:
+            self._launch(job)
+
+    def _launch(self, job):
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        process.setWorkingDirectory(job.cwd)
+        process.readyReadStandardOutput.connect(lambda: self._read_output(job))
+        process.finished.connect(lambda code, status: self._on_finished(job, code, status))
+        process.errorOccurred.connect(lambda error: self._on_error(job, error))
+        job.process = process
+
+        if job.timeout:
+            job.timer = QTimer(self)
+            job.timer.setSingleShot(True)
+            job.timer.timeout.connect(lambda: self._kill(job.id, TIMED_OUT))
+            job.timer.start(int(job.timeout * 1000))
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        self.job_started.emit(job.id)
+        program, args = shell_command(job.command)
+        process.start(program, args)
+
+    def _read_output(self, job):
+        data = bytes(job.process.readAllStandardOutput())
+        if data:
+            job.append_output(data)
+            self.job_output.emit(job.id, data)
+
+    def _on_error(self, job, error):
+        # Only a failed start never reaches finished(); crashes are handled there
+        if error == QProcess.ProcessError.FailedToStart and not job.done:
+            job.error = job.process.errorString()
+            self._complete(job, FAILED, 127)
+
+    def _on_finished(self, job, exit_code, exit_status):
+        if job.done:
+            return
+        self._read_output(job)
+        if job.stop_reason:
+            # Stopped by _kill(); report why, not the signal's exit status
+            self._complete(job, job.stop_reason, stop_exit_code(job.stop_reason))
+            return
+        if exit_status == QProcess.ExitStatus.CrashExit:
+            job.error = "process crashed"
+            self._complete(job, FAILED, -1)
+        else:
+            self._complete(job, FINISHED, exit_code)
+
+    def _kill(self, job_id, reason):
+        """
+        Stop a job without blocking the event loop: SIGTERM now, SIGKILL after
+        KILL_GRACE_MS if it is still running. _on_finished completes the job.
+        """
+        job = self.job(job_id)
+        if not job or job.done or job.stop_reason:
+            return
+        if job.status == QUEUED:
+            self._complete(job, KILLED, KILLED_EXIT_CODE)
+            return
+        job.stop_reason = reason
+        process = job.process
+        process.terminate()
+        QTimer.singleShot(KILL_GRACE_MS, lambda: self._force_kill(job, process))
+
+    def _force_kill(self, job, process):
+        if not job.done and job.process is process:
+            process.kill()
+
+    def _complete(self, job, status, exit_code):
+        job.status = status
+        job.exit_code = exit_code
+        job.finished_at = time.time()
+        if job.timer:
+            job.timer.stop()
+        if job.process:
+            job.process.deleteLater()
+            job.process = None
+        job._done.set()
+        self.job_finished.emit(job.id, exit_code)
+        self._prune_finished()
+        self._start_ready_jobs()
+
+    def _prune_finished(self):
+        with self._lock:
+            finished = [j.id for j in self.jobs.values() if j.done]
+            for job_id in finished[:-MAX_FINISHED_JOBS]:
+                del self.jobs[job_id]
+
+    def shutdown(self):
+        """Kill running jobs synchronously (the event loop is stopping, so no escalation timer)"""
+        for job in self._snapshot():
+            if job.status == RUNNING:
+                job.stop_reason = job.stop_reason or KILLED
+                job.process.kill()
+                job.process.waitForFinished(1000)
+                if not job.done:
+                    self._read_output(job)
+                    self._complete(job, job.stop_reason, stop_exit_code(job.stop_reason))
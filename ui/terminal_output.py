@@ -0,0 +1,278 @@
+"""
+Terminal Output Pipeline - Buffered, bounded output for TerminalWidget
+Process output is decoded and ANSI-parsed on a background thread into
+(text, color) segments. The widget drains them at most once per display
+frame, and the pending buffer keeps only the last max_lines lines, so a
+flood of output (find /, verbose builds) can't stall the GUI or grow memory.
+"""
+import codecs
+import queue
+import re
+import threading
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal
+
+MAX_SCROLLBACK_LINES = 10000
+
+DEFAULT_COLOR = "#cccccc"
+
+# Standard and bright ANSI colors (SGR 30-37 / 90-97)
+ANSI_COLORS = [
+    "#000000", "#cd3131", "#0dbc79", "#e5e510", "#2472c8", "#bc3fbc", "#11a8cd", "#e5e5e5",
+]
+ANSI_BRIGHT_COLORS = [
+    "#666666", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#ffffff",
+]
+
+# SGR (colors) is applied; every other CSI / OSC / charset sequence is dropped
+ESCAPE_RE = re.compile(
+    r'\x1b\[(?P<sgr>[0-9;]*)m'
+    r'|\x1b\[[0-9;?]*[ -/]*[@-~]'
+    r'|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'
+    r'|\x1b[()][A-Za-z0-9]'
+    r'|\x1b[=>78DEHMc]'
+)
+INCOMPLETE_ESCAPE_RE = re.compile(r'\x1b(?:\[[0-9;?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()])?$')
+
+
+def xterm_256_color(n):
+    """Hex color for an xterm 256-color index"""
+    if n < 8:
+        return ANSI_COLORS[n]
+    if n < 16:
+        return ANSI_BRIGHT_COLORS[n - 8]
+    if n < 232:
+        n -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        r, g, b = levels[n // 36], levels[(n // 6) % 6], levels[n % 6]
+        return f"#{r:02x}{g:02x}{b:02x}"
+    gray = 8 + (n - 232) * 10
+    return f"#{gray:02x}{gray:02x}{gray:02x}"
+
+
+class AnsiParser:
+    """
+    Incremental ANSI parser for one output stream.
+    feed() returns [(text, color)] with color None for the default foreground;
+    an escape sequence split across chunks is carried to the next feed().
+    """
+
+    def __init__(self):
+        self.color = None
+        self.bold = False
+        self._base = None   # Color index 0-7 so bold can brighten it
+        self._carry = ""
+
+    def feed(self, text):
+        text = self._carry + text
+        self._carry = ""
+
+        esc = text.rfind('\x1b')
+        if esc != -1 and not ESCAPE_RE.match(text, esc) and INCOMPLETE_ESCAPE_RE.match(text, esc):
+            self._carry = text[esc:]
+            text = text[:esc]
+
+        # Keep newlines only; a lone \r (progress bars) would otherwise pile up
+        text = text.replace('\r\n', '\n').replace('\r', '')
+
+        segments = []
+        pos = 0
+        for match in ESCAPE_RE.finditer(text):
+            if match.start() > pos:
+                segments.append((text[pos:match.start()], self.color))
+            if match.group('sgr') is not None:
+                self._apply_sgr(match.group('sgr'))
+            pos = match.end()
+        if pos < len(text):
+            segments.append((text[pos:], self.color))
+        return segments
+
+    def _apply_sgr(self, params):
+        codes = [int(p) if p else 0 for p in params.split(';')] if params else [0]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                self.color, self.bold, self._base = None, False, None
+            elif code == 1:
+                self.bold = True
+                if self._base is not None:
+                    self.color = ANSI_BRIGHT_COLORS[self._base]
+            elif code == 22:
+                self.bold = False
+                if self._base is not None:
+                    self.color = ANSI_COLORS[self._base]
+            elif 30 <= code <= 37:
+                self._base = code - 30
+                self.color = (ANSI_BRIGHT_COLORS if self.bold else ANSI_COLORS)[self._base]
+            elif 90 <= code <= 97:
+                self._base = None
+                self.color = ANSI_BRIGHT_COLORS[code - 90]
+            elif code == 39:
+                self.color, self._base = None, None
+            elif code in (38, 48) and i + 1 < len(codes):
+                # Extended color: 38;5;n or 38;2;r;g;b (backgrounds are skipped)
+                if codes[i + 1] == 5 and i + 2 < len(codes):
+                    if code == 38:
+                        self.color, self._base = xterm_256_color(codes[i + 2] % 256), None
+                    i += 2
+                elif codes[i + 1] == 2 and i + 4 < len(codes):
+                    if code == 38:
+                        r, g, b = (min(c, 255) for c in codes[i + 2:i + 5])
+                        self.color, self._base = f"#{r:02x}{g:02x}{b:02x}", None
+                    i += 4
+            i += 1
+
+
+class TerminalOutputPipeline(QObject):
+    """
+    Decodes and parses output off the GUI thread.
+
+    feed() / write() may be called from any thread and never block. data_ready
+    fires when segments become available after the buffer was drained, so the
+    widget schedules at most one flush per batch; take() drains everything.
+    """
+    data_ready = pyqtSignal()
+
+    def __init__(self, max_lines=MAX_SCROLLBACK_LINES, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pending = deque()       # (text, color) ready for the GUI
+        self._pending_lines = 0
+        self._dropped_lines = 0
+        self._inflight = 0            # Items queued but not yet parsed
+        self._streams = {}            # source -> (incremental decoder, AnsiParser)
+
+        self._thread = threading.Thread(target=self._run, name="TerminalAnsiParser", daemon=True)
+        self._thread.start()
+
+    # === PRODUCERS (any thread) ===
+
+    def feed(self, data, source=None):
+        """Raw process bytes for a stream (UTF-8, may contain ANSI escapes)"""
+        self._enqueue(('raw', source, bytes(data)))
+
+    def finish(self, source=None):
+        """End of a stream: flush its decoder and forget its ANSI state"""
+        self._enqueue(('end', source, b''))
+
+    def write(self, text, color=None):
+        """Already-formatted text (prompts, commands, errors) in a fixed color"""
+        self._enqueue(('text', color, text))
+
+    def _enqueue(self, item):
+        with self._lock:
+            self._inflight += 1
+        self._queue.put(item)
+
+    # === PARSER THREAD ===
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            batch = [b for b in batch if b is not None]
+
+            segments = []
+            for kind, key, payload in batch:
+                try:
+                    segments.extend(self._parse(kind, key, payload))
+                except Exception as e:
+                    segments.append((f"\n[output decode error: {e}]\n", None))
+
+            with self._lock:
+                was_empty = not self._pending
+                for segment in segments:
+                    if segment[0]:
+                        self._pending.append(segment)
+                        self._pending_lines += segment[0].count('\n')
+                self._trim_locked()
+                self._inflight -= len(batch)
+                notify = was_empty and bool(self._pending)
+            if notify:
+                self.data_ready.emit()
+            if stop:
+                return
+
+    def _parse(self, kind, key, payload):
+        if kind == 'text':
+            return [(payload, key)]
+
+        decoder, parser = self._streams.get(key) or (None, None)
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            parser = AnsiParser()
+            self._streams[key] = (decoder, parser)
+
+        if kind == 'end':
+            # An unterminated escape sequence at end of stream is dropped
+            del self._streams[key]
+            return parser.feed(decoder.decode(b'', final=True))
+        return parser.feed(decoder.decode(payload))
+
+    def _trim_locked(self):
+        """Keep only the last max_lines lines pending; older ones are counted as dropped"""
+        while self._pending_lines > self.max_lines and self._pending:
+            text, color = self._pending[0]
+            lines = text.count('\n')
+            excess = self._pending_lines - self.max_lines
+            if lines <= excess:
+                self._pending.popleft()
+                self._pending_lines -= lines
+                self._dropped_lines += lines
+            else:
+                # Cut the oldest `excess` lines out of this segment
+                cut = 0
+                for _ in range(excess):
+                    cut = text.index('\n', cut) + 1
+                self._pending[0] = (text[cut:], color)
+                self._pending_lines -= excess
+                self._dropped_lines += excess
+
+    # === CONSUMER (GUI thread) ===
+
+    def take(self):
+        """
+        Drain pending output. Returns (segments, dropped_lines) with adjacent
+        segments of the same color merged.
+        """
+        with self._lock:
+            pending = self._pending
+            dropped = self._dropped_lines
+            self._pending = deque()
+            self._pending_lines = 0
+            self._dropped_lines = 0
+
+        merged = []
+        for text, color in pending:
+            if merged and merged[-1][1] == color:
+                merged[-1][0].append(text)
+            else:
+                merged.append(([text], color))
+        return [("".join(parts), color) for parts, color in merged], dropped
+
+    def reset(self):
+        """Discard output that hasn't been shown yet"""
+        with self._lock:
+            self._pending.clear()
+            self._pending_lines = 0
+            self._dropped_lines = 0
+
+    def is_idle(self):
+        """True when nothing is queued, being parsed, or waiting to be shown"""
+        with self._lock:
+            return self._inflight == 0 and not self._pending
+
+    def close(self):
+        self._queue.put(None)
@@ -3,18 +3,62 @@ Embedded Terminal Widget - Real shell execution within Command Center
 Activated only when Terminal gem is selected (security)
 """
 import os
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QLineEdit, QLabel
-from PyQt6.QtCore import QProcess, Qt, pyqtSignal
-from PyQt6.QtGui import QFont, QTextCursor, QColor, QPalette
+import time
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit, QLineEdit, QLabel
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QCoreApplication
+from PyQt6.QtGui import QFont, QTextCursor, QColor, QPalette, QTextCharFormat
+from ui.terminal_output import TerminalOutputPipeline, MAX_SCROLLBACK_LINES, DEFAULT_COLOR
+from ui.terminal_jobs import TerminalJobManager, KILLED, TIMED_OUT
+from utils.command_capture import CommandCapture
+from ui.typing_animator import display_refresh_rate
+
+COMMAND_COLOR = "#00ff00"
+ERROR_COLOR = "#ff4444"
+PROMPT_COLOR = "#5865f2"
+NOTICE_COLOR = "#808080"
 
 class TerminalWidget(QWidget):
     """Embedded terminal with real shell execution"""
     
-    def __init__(self, parent=None):
+    # History is only touched on the GUI thread; agents on worker threads
+    # add to it through this (queued) signal
+    history_added = pyqtSignal(str)
+    
+    def __init__(self, parent=None, max_lines=MAX_SCROLLBACK_LINES):
         super().__init__(parent)
         self.command_history = []
         self.history_index = 0
-        self.current_process = None
+        self.max_lines = max_lines
+        self.history_added.connect(self._add_history)
+        
+        # Each command runs as a job: own process, buffer, timeout and exit code
+        self.jobs = TerminalJobManager(
+            max_parallel=int(os.getenv("TERMINAL_MAX_PARALLEL", "4")),
+            parent=self
+        )
+        self.jobs.job_started.connect(self._on_job_started)
+        self.jobs.job_output.connect(self._on_job_output)
+        self.jobs.job_finished.connect(self._on_job_finished)
+        self._last_output_job = None
+        
+        # Results Riley reads back on her next reply (see CompanionAgent)
+        self.capture = CommandCapture()
+        
+        # Kill leftover jobs and delete spilled output files on exit
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.jobs.shutdown)
+            app.aboutToQuit.connect(self.capture.close)
+        
+        # Output is parsed off the GUI thread and painted at most once per frame
+        self.pipeline = TerminalOutputPipeline(max_lines=max_lines, parent=self)
+        self.pipeline.data_ready.connect(self._schedule_flush)
+        self.frame_interval_ms = max(1, int(1000 / display_refresh_rate()))
+        self._last_flush = 0.0
+        self._formats = {}
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush_output)
         
         self.setup_ui()
         
@@ -34,12 +78,13 @@ class TerminalWidget(QWidget):
         """)
         layout.addWidget(header)
         
-        # Output display
-        self.output = QTextEdit()
+        # Output display (scrollback capped at max_lines blocks)
+        self.output = QPlainTextEdit()
         self.output.setReadOnly(True)
+        self.output.setMaximumBlockCount(self.max_lines)
         self.output.setFont(QFont("Menlo, Monaco, Courier New", 13))
         self.output.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #0d0d0d;
                 color: #00ff00;
                 border: none;
@@ -107,11 +152,13 @@ class TerminalWidget(QWidget):
         # Execute via the programmatic method
         self.execute_command_programmatic(command)
     
-    def execute_command_programmatic(self, command):
-        """Execute command programmatically (can be called by AI agents)"""
-        # Add to history
-        self.command_history.append(command)
-        self.history_index = len(self.command_history)
+    def execute_command_programmatic(self, command, timeout=None, after=None):
+        """
+        Execute command programmatically (can be called by AI agents, from any thread).
+        Returns the job id, or None if the command was blocked.
+        Use self.jobs.wait(job_id) / self.jobs.result(job_id) to read the exit code and output.
+        """
+        self.history_added.emit(command)
         
         # Display command
         self.append_output(command + "\n", is_command=True)
@@ -120,55 +167,90 @@ class TerminalWidget(QWidget):
         if self.is_dangerous_command(command):
             self.append_output(f"⚠️  Blocked: '{command}' requires confirmation\n", is_error=True)
             self.append_output("$ ", is_prompt=True)
-            return
+            return None
         
-        # Execute command
-        self.current_process = QProcess(self)
-        self.current_process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
-        self.current_process.readyReadStandardOutput.connect(self.handle_output)
-        self.current_process.finished.connect(self.handle_finished)
-        
-        # Set working directory
-        self.current_process.setWorkingDirectory(os.getcwd())
-        
-        # Execute in shell
-        if os.name == 'nt':  # Windows
-            self.current_process.start("cmd", ["/c", command])
-        else:  # Mac/Linux
-            self.current_process.start("zsh", ["-c", command])
-    
-    def handle_output(self):
-        """Stream output from process"""
-        if self.current_process:
-            data = self.current_process.readAllStandardOutput()
-            text = bytes(data).decode('utf-8', errors='replace')
-            self.append_output(text)
-    
-    def handle_finished(self):
-        """Process completed"""
+        return self.jobs.submit(command, timeout=timeout, after=after)
+    
+    def _add_history(self, command):
+        self.command_history.append(command)
+        self.history_index = len(self.command_history)
+    
+    def _on_job_started(self, job_id):
+        self.capture.start(job_id, self.jobs.job(job_id).command)
+    
+    def _on_job_output(self, job_id, data):
+        """Hand raw job output to the parser thread (no decoding here)"""
+        self.capture.feed(job_id, data)
+        if job_id != self._last_output_job and len(self.jobs.running()) > 1:
+            self.append_output(f"\n── [{job_id}] {self.jobs.job(job_id).command} ──\n", is_notice=True)
+        self._last_output_job = job_id
+        self.pipeline.feed(data, source=job_id)
+    
+    def _on_job_finished(self, job_id, exit_code):
+        self.pipeline.finish(source=job_id)
+        job = self.jobs.job(job_id)
+        if job:
+            self.capture.finish(job_id, exit_code, job.status, job.duration)
+        label = f"[{job_id}] " if self.jobs.running() else ""  # Others still running
+        if job and job.status == TIMED_OUT:
+            self.append_output(f"\n⚠️  {label}Timed out after {job.timeout}s", is_error=True)
+        elif job and job.status == KILLED:
+            self.append_output(f"\n⚠️  {label}Process terminated", is_error=True)
+        elif exit_code != 0:
+            self.append_output(f"\n{label}exit {exit_code}", is_error=True)
         self.append_output("\n$ ", is_prompt=True)
-        self.current_process = None
     
-    def append_output(self, text, is_command=False, is_error=False, is_prompt=False):
-        """Append text to output with styling"""
-        cursor = self.output.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        
-        # Set color based on type
-        fmt = cursor.charFormat()
+    def append_output(self, text, is_command=False, is_error=False, is_prompt=False, is_notice=False):
+        """Queue styled text; it is painted in order with process output"""
         if is_command:
-            fmt.setForeground(QColor("#00ff00"))
+            color = COMMAND_COLOR
         elif is_error:
-            fmt.setForeground(QColor("#ff4444"))
+            color = ERROR_COLOR
         elif is_prompt:
-            fmt.setForeground(QColor("#5865f2"))
+            color = PROMPT_COLOR
+        elif is_notice:
+            color = NOTICE_COLOR
         else:
-            fmt.setForeground(QColor("#cccccc"))
+            color = None
+        self.pipeline.write(text, color)
+    
+    def _schedule_flush(self):
+        """Arm one single-shot flush, no sooner than one frame after the last"""
+        if self.flush_timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        self.flush_timer.start(max(0, int(self.frame_interval_ms - elapsed_ms)))
+    
+    def _format(self, color):
+        fmt = self._formats.get(color)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color or DEFAULT_COLOR))
+            self._formats[color] = fmt
+        return fmt
+    
+    def flush_output(self):
+        """Paint everything parsed since the last frame in a single edit block"""
+        self._last_flush = time.monotonic()
+        segments, dropped = self.pipeline.take()
+        if not segments and not dropped:
+            return
+        
+        # Follow the output only if the user hasn't scrolled up
+        scrollbar = self.output.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
         
-        cursor.setCharFormat(fmt)
-        cursor.insertText(text)
-        self.output.setTextCursor(cursor)
-        self.output.ensureCursorVisible()
+        cursor = QTextCursor(self.output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        if dropped:
+            cursor.insertText(f"[… {dropped} lines skipped …]\n", self._format(NOTICE_COLOR))
+        for text, color in segments:
+            cursor.insertText(text, self._format(color))
+        cursor.endEditBlock()
+        
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
     
     def is_dangerous_command(self, cmd):
         """Check if command is potentially dangerous"""
@@ -177,12 +259,14 @@ class TerminalWidget(QWidget):
     
     def clear_terminal(self):
         """Clear the output"""
+        self.pipeline.reset()
         self.output.clear()
         cwd = os.getcwd()
         self.append_output(f"Terminal Cleared\nWorking Directory: {cwd}\n$ ", is_prompt=True)
     
-    def stop_process(self):
-        """Stop current running process"""
-        if self.current_process and self.current_process.state() == QProcess.ProcessState.Running:
-            self.current_process.kill()
-            self.append_output("\n⚠️  Process terminated\n$ ", is_error=True)
+    def stop_process(self, job_id=None):
+        """Stop one job, or every running and queued job"""
+        if job_id is not None:
+            self.jobs.kill(job_id)
+        else:
+            self.jobs.kill_all()
@@ -1,66 +1,105 @@
+import math
+import time
 from PyQt6.QtCore import pyqtSignal, QTimer, QObject
+from PyQt6.QtGui import QGuiApplication
+
+DEFAULT_REFRESH_HZ = 60
+CATCH_UP_FRAMES = 12  # Adaptive mode aims to drain the backlog within ~12 frames
+
+
+def display_refresh_rate():
+    """Refresh rate of the primary screen (falls back to 60 Hz)"""
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app else None
+    rate = screen.refreshRate() if screen else 0
+    return rate if rate and rate > 0 else DEFAULT_REFRESH_HZ
+
 
 class TypingWorker(QObject):
     """
     Frontend animator for text revealing.
-    INSTANT MODE: No typing delay, immediate display for maximum speed.
+    Event-driven: a single-shot frame is scheduled only when update_buffer
+    receives new data, and frames are clamped to the display refresh rate,
+    so the worker costs nothing while idle.
+
+    INSTANT MODE: each frame shows everything received so far.
+    ADAPTIVE REVEAL: each frame reveals at most max_chars_per_frame characters,
+    speeding up as the backlog grows.
     """
     char_typed = pyqtSignal(str)
     finished = pyqtSignal()
 
-    def __init__(self, instant_mode=True):
+    def __init__(self, instant_mode=True, max_chars_per_frame=None, refresh_rate=None):
         super().__init__()
         self.full_text = ""
         self.display_text = ""
         self.stream_active = True
         self.instant_mode = instant_mode
-        
-        if instant_mode:
-            # INSTANT MODE: Update as fast as possible (1ms)
-            self.timer = QTimer()
-            self.timer.timeout.connect(self.process_instant)
-            self.timer.start(1)
-        else:
-            # Classic typing mode (if ever needed)
-            self.timer = QTimer()
-            self.timer.timeout.connect(self.process_next_char)
-            self.timer.start(10)
+
+        # Classic typing mode is adaptive reveal with a small per-frame budget
+        if max_chars_per_frame is None and not instant_mode:
+            max_chars_per_frame = 5
+        self.max_chars_per_frame = max_chars_per_frame
+
+        self.frame_interval_ms = max(1, int(1000 / (refresh_rate or display_refresh_rate())))
+        self._last_frame = 0.0
+        self._finished_emitted = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.process_frame)
 
     def update_buffer(self, new_text):
         """Called whenever a new token arrives from the LLM"""
         self.full_text = new_text
-        
-        if not self.timer.isActive() and self.stream_active:
-            self.timer.start(1 if self.instant_mode else 10)
+        self._schedule_frame()
 
-    def process_instant(self):
-        """INSTANT MODE: Display everything immediately"""
-        if self.full_text != self.display_text:
-            self.display_text = self.full_text
-            self.char_typed.emit(self.display_text)
-        elif not self.stream_active:
-            self.timer.stop()
-            self.finished.emit()
+    def _schedule_frame(self):
+        """Arm one single-shot frame, no sooner than one refresh after the last"""
+        if self.timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_frame) * 1000
+        self.timer.start(max(0, int(self.frame_interval_ms - elapsed_ms)))
 
-    def process_next_char(self):
-        """Classic typing mode (legacy)"""
-        diff = len(self.full_text) - len(self.display_text)
-        
-        if diff > 0:
-            # Adaptive speed
-            chunk_size = 1
-            if diff > 50: chunk_size = 5
-            elif diff > 20: chunk_size = 3
-            elif diff > 10: chunk_size = 2
-            
-            next_chars = self.full_text[len(self.display_text) : len(self.display_text) + chunk_size]
-            self.display_text += next_chars
+    def _frame_budget(self, backlog):
+        if not self.max_chars_per_frame:
+            return backlog
+        return max(1, min(self.max_chars_per_frame, math.ceil(backlog / CATCH_UP_FRAMES)))
+
+    def process_frame(self):
+        """Reveal the next slice of text, then re-arm only if more is pending"""
+        self._last_frame = time.monotonic()
+
+        if not self.full_text.startswith(self.display_text):
+            # Buffer was replaced rather than extended
+            self.display_text = ""
+
+        backlog = len(self.full_text) - len(self.display_text)
+        if backlog > 0:
+            end = len(self.display_text) + self._frame_budget(backlog)
+            self.display_text = self.full_text[:end]
             self.char_typed.emit(self.display_text)
-            
-        elif not self.stream_active and diff == 0:
-            self.timer.stop()
-            self.finished.emit()
+
+        if self.display_text != self.full_text:
+            self._schedule_frame()
+        elif not self.stream_active:
+            self._emit_finished()
 
     def stop_stream(self):
         """Called when LLM is done generating"""
         self.stream_active = False
+        self._schedule_frame()
+
+    def flush(self):
+        """Show everything buffered immediately and finish (no animation)"""
+        self.stream_active = False
+        self.timer.stop()
+        if self.display_text != self.full_text:
+            self.display_text = self.full_text
+            self.char_typed.emit(self.display_text)
+        self._emit_finished()
+
+    def _emit_finished(self):
+        if not self._finished_emitted:
+            self._finished_emitted = True
+            self.finished.emit()
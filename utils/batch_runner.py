@@ -0,0 +1,159 @@
+"""
+Batch Runner - JSONL in, JSONL out, with bounded concurrency and resume
+Input lines:  {"id": "t1", "task": "...", "parallel": false}
+              ("id" defaults to the line number, "parallel" runs the task
+              through the DAG planner)
+Output lines: {"id", "task", "status", "agent", "result", "latency_s", "finished_at"}
+
+Tasks whose id already has an "ok" line in the output file are skipped, so
+an interrupted run can simply be restarted with the same arguments.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Set
+
+import numpy as np
+
+
+def read_tasks(path: str) -> Iterator[Dict]:
+    """Stream task records from a JSONL file (blank / invalid lines are reported and skipped)"""
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  {path}:{line_no} is not valid JSON ({e}), skipping")
+                continue
+            if isinstance(record, str):
+                record = {'task': record}
+            if not isinstance(record, dict):
+                print(f"⚠️  {path}:{line_no} is not a task object or string, skipping")
+                continue
+            if not record.get('task'):
+                print(f"⚠️  {path}:{line_no} has no 'task', skipping")
+                continue
+            record['id'] = str(record.get('id', line_no))
+            yield record
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids that already finished successfully in a previous run"""
+    done = set()
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from an interrupted write
+                if isinstance(record, dict) and record.get('status') == 'ok':
+                    done.add(str(record.get('id')))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+class BatchRunner:
+    """Runs task records through an Orchestrator with at most `workers` in flight"""
+
+    def __init__(self, orchestrator, workers: int = 4):
+        self.orchestrator = orchestrator
+        self.workers = max(1, workers)
+        self._write_lock = threading.Lock()
+
+    def _run_one(self, record: Dict) -> Dict:
+        start = time.monotonic()
+        agent = None
+        try:
+            if record.get('parallel'):
+                result = self.orchestrator.process_plan(record['task'])
+                agent = 'planner'
+            else:
+                result, route = self.orchestrator.run_task(record['task'])
+                agent = route.agent
+            status = 'error' if str(result).lstrip().startswith('❌') else 'ok'
+        except Exception as e:
+            result, status = str(e), 'error'
+
+        return {
+            'id': record['id'],
+            'task': record['task'],
+            'status': status,
+            'agent': agent,
+            'result': result,
+            'latency_s': round(time.monotonic() - start, 3),
+            'finished_at': datetime.now().isoformat(),
+        }
+
+    def run(self, input_path: str, output_path: str, limit: Optional[int] = None) -> Dict:
+        done = completed_ids(output_path)
+        latencies = []
+        counts = {'ok': 0, 'error': 0, 'skipped': 0}
+        started = time.monotonic()
+
+        with open(output_path, 'a') as out, \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+
+            def collect(futures):
+                for future in futures:
+                    row = future.result()
+                    with self._write_lock:
+                        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                        out.flush()
+                    counts[row['status']] += 1
+                    latencies.append(row['latency_s'])
+                    mark = "✅" if row['status'] == 'ok' else "❌"
+                    print(f"{mark} [{row['id']}] {row['agent'] or '-'} {row['latency_s']:.2f}s")
+
+            in_flight = set()
+            submitted = 0
+            for record in read_tasks(input_path):
+                if record['id'] in done:
+                    counts['skipped'] += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+                # Bounded queue: don't read ahead of the workers
+                while len(in_flight) >= self.workers * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                in_flight.add(pool.submit(self._run_one, record))
+                submitted += 1
+
+            finished, _ = wait(in_flight)
+            collect(finished)
+
+        elapsed = time.monotonic() - started
+        processed = counts['ok'] + counts['error']
+        return {
+            **counts,
+            'processed': processed,
+            'workers': self.workers,
+            'wall_time_s': round(elapsed, 2),
+            'throughput_tasks_per_s': round(processed / elapsed, 3) if elapsed and processed else 0.0,
+            'latency_p50_s': round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+            'latency_p95_s': round(float(np.percentile(latencies, 95)), 3) if latencies else None,
+            'latency_sum_s': round(sum(latencies), 2),
+        }
+
+
+def print_summary(summary: Dict):
+    print("\n" + "=" * 60)
+    print("📊 Batch summary")
+    print("=" * 60)
+    print(f"  Processed:   {summary['processed']} ({summary['ok']} ok, {summary['error']} failed)")
+    print(f"  Skipped:     {summary['skipped']} (already done)")
+    print(f"  Workers:     {summary['workers']}")
+    print(f"  Wall time:   {summary['wall_time_s']}s")
+    print(f"  Throughput:  {summary['throughput_tasks_per_s']} tasks/s")
+    if summary['latency_p50_s'] is not None:
+        print(f"  Latency:     p50 {summary['latency_p50_s']}s, p95 {summary['latency_p95_s']}s")
+        if summary['wall_time_s']:
+            print(f"  Concurrency: {summary['latency_sum_s'] / summary['wall_time_s']:.1f}x "
+                  f"(sum of task latencies / wall time)")
@@ -0,0 +1,178 @@
+"""
+Command Capture - Terminal results the companion can read back
+Stores each terminal job's output and turns unread results into a compact
+digest for the next prompt: small outputs verbatim, large ones cut to head
+and tail within a token budget. Outputs past SPILL_BYTES are streamed to a
+temp file so memory stays bounded and the full log is still on disk.
+"""
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+HEAD_BYTES = 16 * 1024          # Kept in memory after spilling
+TAIL_BYTES = 16 * 1024
+SPILL_BYTES = 64 * 1024         # Larger outputs go to a temp file
+MAX_CAPTURED = 20               # Commands remembered (oldest temp files are deleted)
+CHARS_PER_TOKEN = 4             # Rough estimate, good enough for budgeting
+HEAD_SHARE = 0.4                # Errors usually sit at the end - favor the tail
+
+ANSI_RE = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[()=>][A-Za-z0-9]?')
+
+
+def clean_output(text):
+    """Strip ANSI escapes and carriage returns"""
+    return ANSI_RE.sub('', text).replace('\r\n', '\n').replace('\r', '')
+
+
+class CapturedCommand:
+    """Output of one command: whole in memory until SPILL_BYTES, then head + tail + file"""
+
+    def __init__(self, job_id, command):
+        self.job_id = job_id
+        self.command = command
+        self.total_bytes = 0
+        self.exit_code = None
+        self.status = "running"
+        self.duration_s = None
+        self.spill_path = None
+
+        self._buffer = bytearray()
+        self._head = None
+        self._tail = None
+        self._spill_file = None
+
+    def write(self, data):
+        self.total_bytes += len(data)
+        if self._spill_file is None:
+            self._buffer += data
+            if len(self._buffer) > SPILL_BYTES:
+                self._spill()
+            return
+
+        self._spill_file.write(data)
+        self._tail += data
+        if len(self._tail) > TAIL_BYTES:
+            del self._tail[:len(self._tail) - TAIL_BYTES]
+
+    def _spill(self):
+        fd, self.spill_path = tempfile.mkstemp(prefix=f"riley-job-{self.job_id}-", suffix=".log")
+        self._spill_file = os.fdopen(fd, 'wb')
+        self._spill_file.write(self._buffer)
+        self._head = self._buffer[:HEAD_BYTES]
+        self._tail = self._buffer[-TAIL_BYTES:]
+        self._buffer = None
+
+    def finish(self, exit_code, status="finished", duration_s=None):
+        self.exit_code = exit_code
+        self.status = status
+        self.duration_s = duration_s
+        if self._spill_file:
+            self._spill_file.close()
+
+    def discard(self):
+        """Close and delete the temp file"""
+        if self._spill_file:
+            self._spill_file.close()
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def summarize(self, char_budget):
+        """Output within char_budget: verbatim if it fits, else head … tail"""
+        if self._buffer is not None:
+            text = clean_output(self._buffer.decode('utf-8', errors='replace'))
+            if len(text) <= char_budget:
+                return text
+            head_text, tail_text = text, text
+        else:
+            head_text = clean_output(self._head.decode('utf-8', errors='replace'))
+            tail_text = clean_output(self._tail.decode('utf-8', errors='replace'))
+
+        where = f", full output: {self.spill_path}" if self.spill_path else ""
+        char_budget = max(0, char_budget - len(where) - 40)  # Room for the omission marker
+        head_chars = int(char_budget * HEAD_SHARE)
+        tail_chars = char_budget - head_chars
+
+        # Cut on line boundaries where possible
+        head = head_text[:head_chars]
+        if '\n' in head:
+            head = head[:head.rindex('\n') + 1]
+        tail = tail_text[-tail_chars:] if tail_chars > 0 else ""
+        if '\n' in tail[:-1]:
+            tail = tail[tail.index('\n') + 1:]
+
+        omitted = self.total_bytes - len(head.encode()) - len(tail.encode())
+        return f"{head}… [{max(omitted, 0):,} bytes omitted{where}] …\n{tail}"
+
+
+class CommandCapture:
+    """
+    Thread-safe store of terminal results.
+    The terminal feeds it from the GUI thread; the companion drains unread
+    results with take_digest() from its worker thread.
+    """
+
+    def __init__(self, max_captured=MAX_CAPTURED):
+        self.max_captured = max_captured
+        self._lock = threading.Lock()
+        self._commands = OrderedDict()   # job id -> CapturedCommand
+        self._unread = []                # job ids finished since the last digest
+
+    def start(self, job_id, command):
+        with self._lock:
+            self._commands[job_id] = CapturedCommand(job_id, command)
+            while len(self._commands) > self.max_captured:
+                _, old = self._commands.popitem(last=False)
+                old.discard()
+                if old.job_id in self._unread:
+                    self._unread.remove(old.job_id)
+
+    def feed(self, job_id, data):
+        with self._lock:
+            captured = self._commands.get(job_id)
+            if captured:
+                captured.write(bytes(data))
+
+    def finish(self, job_id, exit_code, status="finished", duration_s=None):
+        with self._lock:
+            captured = self._commands.get(job_id)
+            if captured:
+                captured.finish(exit_code, status, duration_s)
+                self._unread.append(job_id)
+
+    def get(self, job_id):
+        return self._commands.get(job_id)
+
+    def take_digest(self, token_budget=1500):
+        """
+        Compact digest of results finished since the last call (None if none).
+        Smallest outputs are budgeted first, so short results stay verbatim and
+        large ones split whatever is left.
+        """
+        with self._lock:
+            unread = [self._commands[j] for j in self._unread if j in self._commands]
+            self._unread = []
+            if not unread:
+                return None
+
+            char_budget = token_budget * CHARS_PER_TOKEN
+            sections = {}
+            by_size = sorted(unread, key=lambda c: c.total_bytes)
+            for i, captured in enumerate(by_size):
+                duration = f", {captured.duration_s:.1f}s" if captured.duration_s is not None else ""
+                header = (f"$ {captured.command}\n"
+                          f"[{captured.status}, exit {captured.exit_code}{duration}, "
+                          f"{captured.total_bytes:,} bytes]\n")
+                share = max(0, char_budget // (len(by_size) - i) - len(header))
+                body = captured.summarize(share) if captured.total_bytes and share else ""
+                sections[captured.job_id] = header + body
+                char_budget -= len(sections[captured.job_id])
+            return "\n".join(sections[c.job_id] for c in unread)
+
+    def close(self):
+        with self._lock:
+            for captured in self._commands.values():
+                captured.discard()
+            self._commands.clear()
+            self._unread = []
@@ -0,0 +1,111 @@
+"""
+Startup Profiler - Import and init time breakdown for --profile-startup
+Wraps builtins.__import__ to time every first-time module import (cumulative
+and self time), and times named init phases, so slow startup can be traced
+to the module or constructor responsible.
+"""
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """Collects import timings and init phases. A disabled profiler is a no-op"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.imports = {}     # module -> [cumulative_s, self_s, thread name]
+        self.phases = []      # (name, seconds)
+        self.marks = []       # (name, seconds since process start)
+        self._stack = threading.local()
+        self._original_import = None
+
+    # === IMPORTS ===
+
+    def install(self):
+        """Start timing imports (call as early as possible)"""
+        if not self.enabled or self._original_import:
+            return self
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        return self
+
+    def uninstall(self):
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        # Relative and already-loaded imports are cheap - don't time them
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._stack, 'frames', None)
+        if stack is None:
+            stack = self._stack.frames = []
+
+        frame = [0.0]  # Time spent in nested first-time imports
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            if name not in self.imports:
+                self.imports[name] = [elapsed, elapsed - frame[0], threading.current_thread().name]
+
+    # === PHASES ===
+
+    @contextmanager
+    def phase(self, name):
+        """Time an init step: `with profiler.phase("memory"): ...`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Record a milestone (e.g. 'window visible') relative to process start"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - _PROCESS_START))
+
+    # === REPORT ===
+
+    def report(self, top=25):
+        lines = ["", "=" * 64, "STARTUP PROFILE", "=" * 64]
+
+        lines.append("\nMilestones (since process start):")
+        for name, seconds in self.marks:
+            lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+
+        lines.append("\nInit phases:")
+        for name, seconds in self.phases:
+            lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+
+        lines.append(f"\nSlowest imports (top {top} by cumulative time):")
+        lines.append(f"  {'cumulative':>10}  {'self':>9}  module  [thread]")
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (cumulative, self_time, thread) in ranked[:top]:
+            where = "" if thread == "MainThread" else f"  [{thread}]"
+            lines.append(f"  {cumulative * 1000:7.1f} ms  {self_time * 1000:6.1f} ms  {name}{where}")
+
+        gui_total = sum(s for c, s, t in self.imports.values() if t == "MainThread")
+        lines.append(f"\nTotal import time on the GUI thread: {gui_total * 1000:.1f} ms")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        text = self.report()
+        print(text)
+        if path:
+            with open(path, 'w') as f:
+                f.write(text + "\n")
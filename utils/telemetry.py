@@ -0,0 +1,230 @@
+"""
+Telemetry Sampler - Background system metrics with ring-buffer history
+Samples CPU/RAM/disk/network and Ollama process RSS on a daemon thread into
+a fixed-size NumPy ring buffer. Readers never block on psutil:
+- latest() is a lock-free read of the newest immutable snapshot (a zeroed
+  placeholder with 'placeholder': True until the first sample lands)
+- window() / aggregate() give p50/p95/mean/max over recent samples
+- EWMA per metric is maintained on every sample
+"""
+import threading
+import time
+import numpy as np
+import psutil
+
+FIELDS = (
+    'timestamp',
+    'cpu',             # % (all cores)
+    'memory',          # % used
+    'disk',            # % used on /
+    'net_sent_kbps',
+    'net_recv_kbps',
+    'ollama_rss_mb',   # Sum of RSS for ollama processes
+)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+DEFAULT_INTERVAL = 1.0     # Seconds between samples
+DEFAULT_CAPACITY = 3600    # One hour at 1 Hz
+DEFAULT_EWMA_ALPHA = 0.2
+SLOW_PROBE_EVERY = 30      # Battery / process-list refresh cadence (in samples)
+FIRST_SAMPLE_DELAY = 0.25  # CPU measurement window for the first sample
+
+
+class TelemetrySampler(threading.Thread):
+    """Daemon thread that fills a ring buffer with system samples"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, capacity=DEFAULT_CAPACITY,
+                 ewma_alpha=DEFAULT_EWMA_ALPHA, disk_path='/'):
+        super().__init__(name="TelemetrySampler", daemon=True)
+        self.interval = interval
+        self.capacity = capacity
+        self.ewma_alpha = ewma_alpha
+        self.disk_path = disk_path
+
+        self._buffer = np.zeros((capacity, len(FIELDS)), dtype=np.float64)
+        self._count = 0          # Total samples ever written
+        self._lock = threading.Lock()  # Guards buffer copies, not latest()
+        self._stop_event = threading.Event()
+
+        self._ewma = None
+        self._latest = placeholder_snapshot()   # Immutable dict, swapped atomically
+        self._ready = threading.Event()
+        self._battery = None
+        self._ollama_procs = []
+        self._last_net = None
+        self._samples = 0
+
+    # === SAMPLING (sampler thread) ===
+
+    def run(self):
+        # Everything touching psutil happens here, never on the caller's thread.
+        # Prime the non-blocking CPU counter, then give it a short window so the
+        # first reading measures something.
+        psutil.cpu_percent(interval=None)
+        if self._stop_event.wait(min(self.interval, FIRST_SAMPLE_DELAY)):
+            return
+        while True:
+            try:
+                self._sample_once()
+            except Exception as e:
+                print(f"⚠️ Telemetry sample failed: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _refresh_slow_probes(self):
+        """Battery and process discovery are slow on macOS - refresh rarely"""
+        try:
+            self._battery = psutil.sensors_battery()
+        except Exception:
+            self._battery = None
+
+        procs = []
+        for proc in psutil.process_iter(['name']):
+            name = (proc.info.get('name') or '').lower()
+            if 'ollama' in name:
+                procs.append(proc)
+        self._ollama_procs = procs
+
+    def _ollama_rss_mb(self):
+        total = 0
+        alive = []
+        for proc in self._ollama_procs:
+            try:
+                total += proc.memory_info().rss
+                alive.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self._ollama_procs = alive
+        return total / (1024 ** 2)
+
+    def _sample_once(self):
+        if self._samples % SLOW_PROBE_EVERY == 0:
+            self._refresh_slow_probes()
+        self._samples += 1
+
+        now = time.time()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        net = psutil.net_io_counters()
+        sent_kbps = recv_kbps = 0.0
+        if self._last_net:
+            last_time, last_sent, last_recv = self._last_net
+            elapsed = max(now - last_time, 1e-6)
+            sent_kbps = (net.bytes_sent - last_sent) / elapsed / 1024
+            recv_kbps = (net.bytes_recv - last_recv) / elapsed / 1024
+        self._last_net = (now, net.bytes_sent, net.bytes_recv)
+
+        row = np.array([
+            now,
+            psutil.cpu_percent(interval=None),
+            memory.percent,
+            disk.percent,
+            sent_kbps,
+            recv_kbps,
+            self._ollama_rss_mb(),
+        ], dtype=np.float64)
+
+        if self._ewma is None:
+            self._ewma = row.copy()
+        else:
+            self._ewma = self.ewma_alpha * row + (1 - self.ewma_alpha) * self._ewma
+
+        with self._lock:
+            self._buffer[self._count % self.capacity] = row
+            self._count += 1
+
+        battery = self._battery
+        self._latest = {
+            **{name: float(row[i]) for i, name in enumerate(FIELDS)},
+            'ewma': {name: float(self._ewma[i]) for i, name in enumerate(FIELDS) if name != 'timestamp'},
+            'cpu_count': psutil.cpu_count(),
+            'memory_total_gb': round(memory.total / (1024 ** 3), 1),
+            'memory_available_gb': round(memory.available / (1024 ** 3), 1),
+            'disk_total_gb': round(disk.total / (1024 ** 3), 1),
+            'disk_free_gb': round(disk.free / (1024 ** 3), 1),
+            'battery_percent': battery.percent if battery else None,
+            'power_plugged': battery.power_plugged if battery else True,
+            'placeholder': False,
+        }
+        self._ready.set()
+
+    # === READING (any thread) ===
+
+    def latest(self):
+        """
+        Newest snapshot dict. Lock-free: the reference is swapped atomically.
+        Before the first sample this is a zeroed placeholder ('placeholder': True).
+        """
+        return self._latest
+
+    def wait_ready(self, timeout=None):
+        """Block until the first real sample exists (never call on the GUI thread)"""
+        return self._ready.wait(timeout)
+
+    def window(self, seconds=None):
+        """Copy of samples (oldest first) from the last `seconds`, or all retained"""
+        with self._lock:
+            count = min(self._count, self.capacity)
+            if count == 0:
+                return np.empty((0, len(FIELDS)))
+            if self._count <= self.capacity:
+                data = self._buffer[:count].copy()
+            else:
+                start = self._count % self.capacity
+                data = np.concatenate((self._buffer[start:], self._buffer[:start]))
+
+        if seconds is not None:
+            data = data[data[:, 0] >= time.time() - seconds]
+        return data
+
+    def aggregate(self, field, seconds=60):
+        """p50/p95/mean/max over a window, plus the current EWMA"""
+        column = self.window(seconds)[:, FIELD_INDEX[field]]
+        latest = self._latest
+        if column.size == 0:
+            return {'p50': 0.0, 'p95': 0.0, 'mean': 0.0, 'max': 0.0, 'ewma': 0.0, 'samples': 0}
+
+        p50, p95 = np.percentile(column, [50, 95])
+        return {
+            'p50': float(p50),
+            'p95': float(p95),
+            'mean': float(column.mean()),
+            'max': float(column.max()),
+            'ewma': latest.get('ewma', {}).get(field, float(column[-1])),
+            'samples': int(column.size),
+        }
+
+
+def placeholder_snapshot():
+    """Zeroed snapshot with the same keys as a real one, shown until sampling starts"""
+    return {
+        **{name: 0.0 for name in FIELDS},
+        'timestamp': time.time(),
+        'ewma': {name: 0.0 for name in FIELDS if name != 'timestamp'},
+        'cpu_count': 0,
+        'memory_total_gb': 0.0,
+        'memory_available_gb': 0.0,
+        'disk_total_gb': 0.0,
+        'disk_free_gb': 0.0,
+        'battery_percent': None,
+        'power_plugged': True,
+        'placeholder': True,
+    }
+
+
+_shared_sampler = None
+_shared_lock = threading.Lock()
+
+
+def get_sampler(**kwargs):
+    """Process-wide sampler, started on first use"""
+    global _shared_sampler
+    with _shared_lock:
+        if _shared_sampler is None or not _shared_sampler.is_alive():
+            _shared_sampler = TelemetrySampler(**kwargs)
+            _shared_sampler.start()
+        return _shared_sampler